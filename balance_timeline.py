@@ -0,0 +1,129 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Union
+from tx_records import TransactionRecord
+
+class BalancePoint(NamedTuple):
+    slot: int
+    block_time: Optional[int]
+    pre_balance: int
+    post_balance: int
+
+    @property
+    def delta(self) -> int:
+        return self.post_balance - self.pre_balance
+
+def account_keys(tx: Union[TransactionRecord, Dict[str, Any]]) -> List[str]:
+    if isinstance(tx, TransactionRecord):
+        return list(tx.account_keys)
+    # Statische Schlüssel der Nachricht plus per Address Lookup Table geladene Adressen (v0-Transaktionen)
+    transaction = tx.get('transaction')
+    message = transaction.get('message', {}) if isinstance(transaction, dict) else {}
+    keys = message.get('accountKeys') or tx.get('accountKeys') or []
+    keys = [key['pubkey'] if isinstance(key, dict) else key for key in keys]
+    loaded = (tx.get('meta') or {}).get('loadedAddresses') or {}
+    return keys + list(loaded.get('writable', [])) + list(loaded.get('readonly', []))
+
+def balance_point(tx: Union[TransactionRecord, Dict[str, Any]], address: Optional[str] = None) -> Optional[BalancePoint]:
+    # Ohne Adresse gilt Index 0 (Fee Payer); akzeptiert TransactionRecords, getTransaction-Ergebnisse und flache Dicts
+    if isinstance(tx, TransactionRecord):
+        slot, block_time, keys = tx.slot, tx.block_time, tx.account_keys
+        pre_balances, post_balances = tx.pre_balances, tx.post_balances
+    else:
+        meta = tx.get('meta') or tx
+        slot, block_time, keys = tx.get('slot', 0), tx.get('blockTime'), None
+        pre_balances, post_balances = meta.get('preBalances'), meta.get('postBalances')
+    if not pre_balances or not post_balances:
+        return None
+    if address is None:
+        index = 0
+    else:
+        try:
+            index = (keys if keys is not None else account_keys(tx)).index(address)
+        except ValueError:
+            return None
+    if index >= len(pre_balances) or index >= len(post_balances):
+        return None
+    return BalancePoint(slot, block_time, pre_balances[index], post_balances[index])
+
+def chronological(signatures: List[Dict[str, Any]]) -> List[int]:
+    # Positionen in signatures (neueste zuerst, innerhalb eines Slots in umgekehrter Blockreihenfolge), älteste zuerst
+    return sorted(range(len(signatures)), key=lambda position: (signatures[position]['slot'], -position))
+
+class BalanceTimeline:
+    # SOL-Kontostand einer Wallet über die Zeit, in einem Durchlauf aus bereits geladenen Transaktionen rekonstruiert
+    def __init__(self, address: Optional[str], points: List[BalancePoint]):
+        self.address = address
+        self.points = points
+
+    @classmethod
+    def from_transactions(cls, address: Optional[str], transactions: Iterable[Dict[str, Any]]) -> 'BalanceTimeline':
+        # Transaktionen ohne Kontostand der Wallet werden übergangen; innerhalb eines Slots gilt die
+        # Eingabereihenfolge (älteste zuerst). Für die Analyse eines Zeitfensters from_signatures verwenden
+        points = [point for point in (balance_point(tx, address) for tx in transactions if tx) if point is not None]
+        points.sort(key=lambda point: point.slot)
+        return cls(address, points)
+
+    @classmethod
+    def from_signatures(cls, address: str, signatures: List[Dict[str, Any]],
+                        points: Dict[str, BalancePoint]) -> Optional['BalanceTimeline']:
+        # Vollständiger Verlauf eines Zeitfensters: signatures wie von getSignaturesForAddress (neueste zuerst,
+        # innerhalb eines Slots in umgekehrter Blockreihenfolge), points die Kontostände pro Signatur.
+        # Fehlt auch nur ein Punkt, wären Startkontostand und Gewinn falsch: dann None
+        if any(tx['signature'] not in points for tx in signatures):
+            return None
+        return cls(address, [points[signatures[position]['signature']] for position in chronological(signatures)])
+
+    @classmethod
+    def from_endpoints(cls, address: str, signatures: List[Dict[str, Any]], first: BalancePoint,
+                       end_balance: int) -> 'BalanceTimeline':
+        # Verlauf nur aus dem Kontostand der ältesten Transaktion (first) und dem aktuellen Kontostand: Anzahl,
+        # letzte Aktivität, Start- und Endstand stimmen, die Transaktionen dazwischen tragen keine Änderung.
+        # Zu- und Abflüsse ergeben daher nur die Nettoänderung; für den genauen Verlauf from_signatures verwenden
+        order = chronological(signatures)
+        points = [first]
+        for position in order[1:]:
+            tx = signatures[position]
+            points.append(BalancePoint(tx['slot'], tx['blockTime'], first.post_balance, first.post_balance))
+        if len(points) > 1:
+            points[-1] = points[-1]._replace(post_balance=end_balance)
+        return cls(address, points)
+
+    def window(self, start_time: Optional[int] = None, end_time: Optional[int] = None) -> 'BalanceTimeline':
+        points = [point for point in self.points
+                  if point.block_time is not None
+                  and (start_time is None or point.block_time >= start_time)
+                  and (end_time is None or point.block_time <= end_time)]
+        return BalanceTimeline(self.address, points)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @property
+    def start_balance(self) -> Optional[int]:
+        return self.points[0].pre_balance if self.points else None
+
+    @property
+    def end_balance(self) -> Optional[int]:
+        return self.points[-1].post_balance if self.points else None
+
+    @property
+    def balance_change(self) -> int:
+        return self.end_balance - self.start_balance if self.points else 0
+
+    @property
+    def inflow(self) -> int:
+        return sum(point.delta for point in self.points if point.delta > 0)
+
+    @property
+    def outflow(self) -> int:
+        return -sum(point.delta for point in self.points if point.delta < 0)
+
+    def balance_at(self, block_time: int) -> Optional[int]:
+        # Kontostand nach der letzten Transaktion bis einschließlich block_time
+        balance = self.start_balance
+        for point in self.points:
+            if point.block_time is None or point.block_time > block_time:
+                break
+            balance = point.post_balance
+        return balance
+
+__all__ = ['BalancePoint', 'BalanceTimeline', 'account_keys', 'balance_point', 'chronological']
@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import argparse
+import resource
+import subprocess
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+# End-to-End-Benchmark von Wallet-Erkennung und -Analyse gegen den lokalen Mock-RPC-Server.
+# Jedes Szenario läuft in einem eigenen Prozess, damit der Spitzenwert des Speichers (ru_maxrss)
+# nur dieses Szenario misst und Caches, Verbindungen und Metriken nicht von einem früheren Lauf stammen.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+TARGETS = ('identify', 'analyze')
+
+def peak_rss_mb() -> float:
+    # Linux meldet ru_maxrss in KiB, macOS in Bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def latency_summary(metrics, name: str) -> Dict[str, Any]:
+    # Histogramme aller Label-Kombinationen (Endpoint, Methode bzw. Stufe) zusammenfassen
+    from metrics import Histogram
+    total = Histogram()
+    for (metric, _), histogram in metrics.histograms.items():
+        if metric == name:
+            total.merge(histogram)
+    to_ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {"count": total.count, "p50_ms": to_ms(total.quantile(0.5)), "p99_ms": to_ms(total.quantile(0.99))}
+
+def stage_summaries(metrics) -> Dict[str, Dict[str, Any]]:
+    stages = {}
+    for (metric, labels), histogram in sorted(metrics.histograms.items(), key=lambda item: item[0]):
+        if metric == 'stage_seconds':
+            stages[dict(labels)['stage']] = {
+                "count": histogram.count, "total_s": round(histogram.sum, 3),
+                "p50_ms": round(histogram.quantile(0.5) * 1000, 2), "p99_ms": round(histogram.quantile(0.99) * 1000, 2),
+            }
+    return stages
+
+async def run_scenario(target: str, size: int, trace_memory: bool) -> Dict[str, Any]:
+    # Projektmodule erst hier importieren: config liest die vom Elternprozess gesetzten Umgebungsvariablen
+    sys.path.insert(0, PROJECT_DIR)
+    sys.path.insert(0, BENCH_DIR)
+    import tracemalloc
+    from mock_rpc_server import synthetic_wallet
+    from wallet_identification import identify_active_wallets_from_signatures
+    from wallet_analysis import analyze_active_wallets
+    from solana_api import close_connections
+    from tx_cache import close_tx_cache
+    from wallet_state import close_wallet_state_store
+    from metrics import get_metrics
+
+    baseline_rss = peak_rss_mb()
+    wallets = [synthetic_wallet(index) for index in range(size)] if target == 'analyze' else None
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        if target == 'identify':
+            found = await identify_active_wallets_from_signatures(num_signatures=size, min_transactions=1, max_wallets=size)
+            result = {"wallets_found": len(found)}
+        else:
+            summary = await analyze_active_wallets(wallets, time_frame_days=30)
+            result = {"active_wallets": summary.count, "top_traders": summary.top_trader_count}
+        elapsed = time.perf_counter() - start
+    finally:
+        rpc_stats = await close_connections()
+        close_wallet_state_store()
+        close_tx_cache()
+    if trace_memory:
+        result["python_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+
+    metrics = get_metrics()
+    requests = sum(value for (name, _), value in metrics.counters.items() if name == 'rpc_requests_total')
+    rate_limited = sum(value for (name, _), value in metrics.counters.items() if name == 'rpc_rate_limited_total')
+    result.update(
+        target=target, wallets=size, seconds=round(elapsed, 3),
+        wallets_per_second=round(size / elapsed, 1) if elapsed else None,
+        http_requests=int(requests), requests_per_second=round(requests / elapsed, 1) if elapsed else None,
+        rate_limited=int(rate_limited), rpc_calls=rpc_stats["requests"] if rpc_stats else 0,
+        rpc_latency=latency_summary(metrics, 'rpc_request_seconds'), stages=stage_summaries(metrics),
+        baseline_rss_mb=round(baseline_rss, 1), peak_rss_mb=round(peak_rss_mb(), 1),
+    )
+    return result
+
+def wait_for_server(url: str, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url.rstrip('/') + '/stats', timeout=1):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Mock RPC server at {url} did not start")
+            time.sleep(0.1)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(args) -> subprocess.Popen:
+    command = [sys.executable, os.path.join(BENCH_DIR, 'mock_rpc_server.py'), '--port', str(args.port),
+               '--processes', str(args.server_processes), '--latency-ms', str(args.latency_ms),
+               '--jitter-ms', str(args.jitter_ms), '--rate-limit-rate', str(args.rate_limit_rate),
+               '--max-rps', str(args.max_rps), '--error-rate', str(args.error_rate),
+               '--txs-per-wallet', str(args.txs_per_wallet), '--signature-limit', str(max(args.sizes)),
+               '--seed', '1']
+    return subprocess.Popen(command)
+
+def scenario_env(args, url: str, work_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    # Kalter Lauf ohne persistente Caches; das Rate-Limit des Clients soll nicht der Engpass sein
+    env.update({
+        'RPC_ENDPOINTS': url,
+        'RPC_REQUESTS_PER_SECOND': str(args.client_rps),
+        'RPC_MAX_REQUESTS_PER_SECOND': str(args.client_rps),
+        'TX_CACHE_ENABLED': 'false',
+        'TX_CACHE_PATH': os.path.join(work_dir, 'tx_cache.sqlite'),
+        'INCREMENTAL_ANALYSIS': 'false',
+        'WALLET_STATE_PATH': os.path.join(work_dir, 'wallet_state.sqlite'),
+        'METRICS_DIR': os.path.join(work_dir, 'metrics'),
+        # Logs und identified_wallets_*.json nicht ins logs/ des Projekts schreiben
+        'LOG_DIR': os.path.join(work_dir, 'logs'),
+        'RESULTS_DIR': os.path.join(work_dir, 'results'),
+        'RUN_JOURNAL_DIR': os.path.join(work_dir, 'runs'),
+    })
+    return env
+
+def run_child(args, target: str, size: int, env: Dict[str, str]) -> Dict[str, Any]:
+    command = [sys.executable, os.path.abspath(__file__), '--child', target, '--sizes', str(size)]
+    if args.tracemalloc:
+        command.append('--tracemalloc')
+    # Der Space-Saving-Zähler der Erkennung muss alle Wallets des Szenarios fassen, sonst misst wallets_found
+    # bei großen Szenarien nur seine Kapazität (Standard 10000)
+    env = dict(env, HEAVY_HITTER_CAPACITY=str(max(size, int(env.get('HEAVY_HITTER_CAPACITY', 10000)))))
+    output = subprocess.run(command, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def format_row(result: Dict[str, Any]) -> str:
+    latency = result['rpc_latency']
+    return (f"{result['target']:<9} {result['wallets']:>8} {result['seconds']:>9.2f} {result['wallets_per_second']:>10.1f} "
+            f"{result['http_requests']:>9} {result['requests_per_second']:>9.1f} {latency['p50_ms'] or 0:>8.1f} "
+            f"{latency['p99_ms'] or 0:>8.1f} {result['peak_rss_mb']:>9.1f}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark von Wallet-Erkennung und -Analyse gegen den Mock-RPC-Server")
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')], default=[100, 10_000, 100_000],
+                        help="Kommagetrennte Anzahl Wallets pro Szenario")
+    parser.add_argument('--targets', type=lambda value: value.split(','), default=list(TARGETS),
+                        help="identify (identify_active_wallets_from_signatures), analyze (analyze_active_wallets)")
+    parser.add_argument('--url', help="Bereits laufenden Server verwenden statt einen zu starten")
+    parser.add_argument('--port', type=int, default=0, help="Port des gestarteten Servers (0 = frei wählen)")
+    parser.add_argument('--server-processes', type=int, default=1)
+    parser.add_argument('--latency-ms', type=float, default=5)
+    parser.add_argument('--jitter-ms', type=float, default=5)
+    parser.add_argument('--rate-limit-rate', type=float, default=0)
+    parser.add_argument('--max-rps', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--txs-per-wallet', type=int, default=5)
+    parser.add_argument('--client-rps', type=float, default=100_000, help="Rate-Limit des Clients pro Endpoint")
+    parser.add_argument('--tracemalloc', action='store_true', help="Zusätzlich Python-Heap-Spitze messen (langsamer)")
+    parser.add_argument('--output', metavar='FILE', help="Ergebnisse zusätzlich als JSON schreiben")
+    parser.add_argument('--child', choices=TARGETS, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        import asyncio
+        result = asyncio.run(run_scenario(args.child, args.sizes[0], args.tracemalloc))
+        print(json.dumps(result))
+        return
+
+    server: Optional[subprocess.Popen] = None
+    url = args.url
+    if url is None:
+        args.port = args.port or free_port()
+        url = f"http://127.0.0.1:{args.port}/"
+        server = start_server(args)
+    results: List[Dict[str, Any]] = []
+    try:
+        wait_for_server(url)
+        print(f"{'target':<9} {'wallets':>8} {'seconds':>9} {'wallets/s':>10} {'requests':>9} {'req/s':>9} "
+              f"{'p50 ms':>8} {'p99 ms':>8} {'peak MB':>9}")
+        with tempfile.TemporaryDirectory(prefix='bench_') as work_dir:
+            env = scenario_env(args, url, work_dir)
+            for target in args.targets:
+                for size in args.sizes:
+                    result = run_child(args, target, size, env)
+                    results.append(result)
+                    print(format_row(result), flush=True)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
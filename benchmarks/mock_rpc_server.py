@@ -0,0 +1,273 @@
+import os
+import sys
+import time
+import zlib
+import random
+import signal
+import asyncio
+import argparse
+import multiprocessing
+from typing import Any, Dict, List, Optional, Tuple
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rate_limiter import TokenBucket
+from tx_records import dumps, loads
+from known_accounts import VOTE_PROGRAM_ID
+
+# Lokaler Ersatz für einen Solana-RPC-Knoten: synthetische (oder aufgezeichnete) Antworten für
+# getSignaturesForAddress, getTransaction, getBalance und getMultipleAccounts, einzeln oder als Batch.
+# Latenz, 429-Antworten und Fehler sind einstellbar, damit Benchmarks und Tests ohne Mainnet laufen.
+
+SYSTEM_PROGRAM_ID = "11111111111111111111111111111111"
+LAMPORTS_PER_SOL = 1_000_000_000
+
+def synthetic_wallet(index: int) -> str:
+    # 44 Zeichen wie eine echte Base58-Adresse; Benchmarks erzeugen dieselben Adressen
+    return f"Wallet{index:038d}"
+
+def split_signature(signature: str) -> Optional[Tuple[str, int]]:
+    # Synthetische Signaturen haben die Form <Adresse>:<Index der Transaktion>
+    address, _, index = signature.rpartition(':')
+    if not address or not index.isdigit():
+        return None
+    return address, int(index)
+
+class SyntheticChain:
+    # Deterministische Historie pro Adresse: txs_per_wallet Transaktionen über history_days verteilt,
+    # Kontostände aus einem Seed der Adresse, damit Pre-/Post-Balances lückenlos zusammenpassen
+    def __init__(self, txs_per_wallet: int = 5, history_days: float = 20, hub_address: str = VOTE_PROGRAM_ID,
+                 base_slot: int = 300_000_000, now: Optional[int] = None):
+        self.txs_per_wallet = txs_per_wallet
+        self.history_seconds = int(history_days * 86400)
+        self.hub_address = hub_address
+        self.base_slot = base_slot
+        self.now = now if now is not None else int(time.time())
+
+    def _seed(self, address: str) -> int:
+        return zlib.crc32(address.encode())
+
+    def block_time(self, index: int, count: int) -> int:
+        return self.now - self.history_seconds * (count - index) // (count + 1)
+
+    def balances(self, address: str) -> List[int]:
+        # Kontostand vor Transaktion 0, nach Transaktion 0, ..., nach der letzten Transaktion
+        seed = self._seed(address)
+        balance = (seed % 100 + 1) * LAMPORTS_PER_SOL
+        history = [balance]
+        for index in range(self.txs_per_wallet):
+            balance = max(0, balance + ((seed >> (index % 24)) % 9 - 3) * LAMPORTS_PER_SOL // 10)
+            history.append(balance)
+        return history
+
+    def slot(self, address: str, index: int) -> int:
+        return self.base_slot + index * 1000 + self._seed(address) % 1000
+
+    def _entry(self, address: str, index: int) -> Dict[str, Any]:
+        return {"signature": f"{address}:{index}", "slot": self.slot(address, index), "err": None, "memo": None,
+                "blockTime": self.block_time(index, self.txs_per_wallet), "confirmationStatus": "finalized"}
+
+    def signatures(self, address: str, limit: int = 1000, before: Optional[str] = None,
+                   until: Optional[str] = None) -> List[Dict[str, Any]]:
+        # Neueste zuerst; before/until wie beim echten Knoten (exklusiv)
+        if address == self.hub_address:
+            # Der Hub (Standard: Vote-Programm) hat für jede synthetische Wallet deren letzte Transaktion,
+            # damit die Wallet-Erkennung beliebig viele verschiedene Wallets findet
+            start = self._hub_position(before) + 1 if before else 0
+            stop = start + limit
+            if until:
+                stop = min(stop, self._hub_position(until))
+            return [self._entry(synthetic_wallet(position), self.txs_per_wallet - 1) for position in range(start, stop)]
+        start = self.txs_per_wallet - 1
+        parsed = split_signature(before) if before else None
+        if parsed and parsed[0] == address:
+            start = parsed[1] - 1
+        floor = -1
+        parsed = split_signature(until) if until else None
+        if parsed and parsed[0] == address:
+            floor = parsed[1]
+        return [self._entry(address, index) for index in range(start, max(floor, start - limit), -1)]
+
+    @staticmethod
+    def _hub_position(signature: str) -> int:
+        parsed = split_signature(signature)
+        if parsed is None or not parsed[0].startswith("Wallet") or not parsed[0][len("Wallet"):].isdigit():
+            return 0
+        return int(parsed[0][len("Wallet"):])
+
+    def transaction(self, signature: str) -> Optional[Dict[str, Any]]:
+        parsed = split_signature(signature)
+        if parsed is None or parsed[1] >= self.txs_per_wallet:
+            return None
+        address, index = parsed
+        history = self.balances(address)
+        return {
+            "slot": self.slot(address, index),
+            "blockTime": self.block_time(index, self.txs_per_wallet),
+            "meta": {
+                "err": None,
+                "fee": 5000,
+                "preBalances": [history[index], LAMPORTS_PER_SOL],
+                "postBalances": [history[index + 1], LAMPORTS_PER_SOL],
+                "loadedAddresses": {"writable": [], "readonly": []},
+            },
+            "transaction": {
+                "signatures": [signature],
+                "message": {"accountKeys": [address, SYSTEM_PROGRAM_ID], "recentBlockhash": "11111111111111111111111111111111"},
+            },
+            "version": 0,
+        }
+
+    def balance(self, address: str) -> int:
+        return self.balances(address)[-1]
+
+    def account(self, address: str) -> Dict[str, Any]:
+        return {"lamports": self.balance(address), "owner": SYSTEM_PROGRAM_ID, "data": ["", "base64"],
+                "executable": False, "rentEpoch": 18446744073709551615, "space": 0}
+
+def load_recorded(path: str) -> Dict[str, Any]:
+    # Aufgezeichnete Antworten: JSON-Liste oder eine JSON-Zeile pro Eintrag mit method, params und result
+    with open(path, 'rb') as f:
+        content = f.read()
+    entries = loads(content) if content.lstrip().startswith(b'[') else [loads(line) for line in content.splitlines() if line.strip()]
+    return {recorded_key(entry['method'], entry.get('params', [])): entry['result'] for entry in entries}
+
+def recorded_key(method: str, params: Any) -> str:
+    return dumps([method, params]).decode()
+
+class MockRPCServer:
+    def __init__(self, chain: SyntheticChain, latency_ms: float = 0, jitter_ms: float = 0, rate_limit_rate: float = 0,
+                 retry_after: Optional[float] = None, max_rps: float = 0, error_rate: float = 0,
+                 http_error_rate: float = 0, recorded: Optional[Dict[str, Any]] = None, seed: Optional[int] = None,
+                 signature_limit: int = 1000):
+        self.chain = chain
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.bucket = TokenBucket(max_rps) if max_rps > 0 else None
+        self.error_rate = error_rate
+        self.http_error_rate = http_error_rate
+        self.recorded = recorded or {}
+        # Obergrenze für limit bei getSignaturesForAddress (echte Knoten: 1000)
+        self.signature_limit = signature_limit
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "items": 0, "rate_limited": 0, "errors": 0, "http_errors": 0}
+
+    def result(self, method: str, params: List[Any]) -> Any:
+        recorded = self.recorded.get(recorded_key(method, params))
+        if recorded is not None:
+            return recorded
+        options = params[1] if len(params) > 1 and isinstance(params[1], dict) else {}
+        if method == 'getSignaturesForAddress':
+            return self.chain.signatures(params[0], limit=min(options.get('limit', 1000), self.signature_limit),
+                                         before=options.get('before'), until=options.get('until'))
+        if method == 'getTransaction':
+            return self.chain.transaction(params[0])
+        if method == 'getBalance':
+            return {"context": {"slot": self.chain.base_slot}, "value": self.chain.balance(params[0])}
+        if method == 'getMultipleAccounts':
+            return {"context": {"slot": self.chain.base_slot}, "value": [self.chain.account(address) for address in params[0]]}
+        if method == 'getSlot':
+            return self.chain.base_slot
+        raise KeyError(method)
+
+    def respond(self, item: Any) -> Dict[str, Any]:
+        if not isinstance(item, dict) or 'method' not in item:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid request"}}
+        self.stats["items"] += 1
+        request_id = item.get('id')
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32000, "message": "Mock node failure"}}
+        try:
+            return {"jsonrpc": "2.0", "id": request_id, "result": self.result(item['method'], item.get('params', []))}
+        except KeyError:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32601, "message": "Method not found"}}
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self.random.uniform(0, self.jitter))
+        if (self.bucket is not None and not self.bucket.try_acquire()) or \
+                (self.rate_limit_rate and self.random.random() < self.rate_limit_rate):
+            self.stats["rate_limited"] += 1
+            headers = {"Retry-After": f"{self.retry_after:g}"} if self.retry_after is not None else None
+            return web.Response(status=429, text="Too many requests", headers=headers)
+        if self.http_error_rate and self.random.random() < self.http_error_rate:
+            self.stats["http_errors"] += 1
+            return web.Response(status=503, text="Service unavailable")
+        try:
+            payload = loads(await request.read())
+        except ValueError:
+            return web.Response(body=dumps({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}}),
+                                content_type='application/json')
+        body = [self.respond(item) for item in payload] if isinstance(payload, list) else self.respond(payload)
+        return web.Response(body=dumps(body), content_type='application/json')
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.Response(body=dumps(dict(self.stats, pid=os.getpid())), content_type='application/json')
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post('/', self.handle)
+        app.router.add_get('/stats', self.handle_stats)
+        return app
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Lokaler Mock-RPC-Server für Benchmarks und Tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18899)
+    parser.add_argument('--processes', type=int, default=1, help="Server-Prozesse (SO_REUSEPORT), damit der Server nicht zum Engpass wird")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Feste Latenz pro HTTP-Anfrage")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Zusätzliche, gleichverteilte Latenz 0..jitter")
+    parser.add_argument('--rate-limit-rate', type=float, default=0, help="Anteil der Anfragen, die mit 429 beantwortet werden")
+    parser.add_argument('--retry-after', type=float, help="Retry-After-Header (Sekunden) bei 429")
+    parser.add_argument('--max-rps', type=float, default=0, help="429 oberhalb dieser Rate pro Prozess (0 = unbegrenzt)")
+    parser.add_argument('--error-rate', type=float, default=0, help="Anteil der Einträge mit JSON-RPC-Fehler")
+    parser.add_argument('--http-error-rate', type=float, default=0, help="Anteil der Anfragen mit HTTP 503")
+    parser.add_argument('--signature-limit', type=int, default=1000,
+                        help="Maximales limit für getSignaturesForAddress (höher, um die Wallet-Erkennung zu skalieren)")
+    parser.add_argument('--txs-per-wallet', type=int, default=5)
+    parser.add_argument('--history-days', type=float, default=20, help="Zeitraum, über den die Transaktionen einer Wallet verteilt sind")
+    parser.add_argument('--recorded', metavar='FILE', help="Aufgezeichnete Antworten (method, params, result), vor den synthetischen")
+    parser.add_argument('--seed', type=int, help="Seed für Latenz- und Fehlerinjektion")
+    return parser.parse_args(argv)
+
+def serve(args, now: int):
+    server = MockRPCServer(
+        SyntheticChain(args.txs_per_wallet, args.history_days, now=now),
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after, max_rps=args.max_rps, error_rate=args.error_rate,
+        http_error_rate=args.http_error_rate, recorded=load_recorded(args.recorded) if args.recorded else None,
+        seed=args.seed, signature_limit=args.signature_limit,
+    )
+    web.run_app(server.app(), host=args.host, port=args.port, reuse_port=args.processes > 1, print=None,
+                access_log=None)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Alle Prozesse verwenden denselben Zeitpunkt, damit die synthetische Historie übereinstimmt
+    now = int(time.time())
+    if args.processes <= 1:
+        serve(args, now)
+        return
+    workers = [multiprocessing.Process(target=serve, args=(args, now), daemon=True) for _ in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    # SIGTERM (z.B. Popen.terminate() in bench_pipeline) wie Strg+C behandeln; sonst endet nur der Elternprozess
+    # und die Worker halten den Port weiter belegt
+    signal.signal(signal.SIGTERM, lambda signum, frame: signal.default_int_handler(signum, frame))
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple
+from solana_api import get_rpc_manager
+from known_accounts import VOTE_PROGRAM_ID, KNOWN_PROGRAM_ACCOUNTS
+from tx_records import loads
+from config import BLOCK_SCAN_FETCH_WORKERS, BLOCK_SCAN_DECODE_PROCESSES
+
+class WalletActivity(NamedTuple):
+    address: str
+    count: int
+    last_slot: int
+
+def decode_block(slot: int, raw: bytes) -> List[Tuple[str, int]]:
+    # Läuft im Prozesspool: zählt die Signer aller Nicht-Vote-Transaktionen eines Blocks
+    data = loads(raw)
+    result = data.get('result') or {}
+    counts = {}
+    for tx in result.get('transactions') or []:
+        keys = (tx.get('transaction') or {}).get('accountKeys') or []
+        if any(key.get('pubkey') == VOTE_PROGRAM_ID for key in keys):
+            continue
+        for key in keys:
+            if key.get('signer') and key['pubkey'] not in KNOWN_PROGRAM_ACCOUNTS:
+                counts[key['pubkey']] = counts.get(key['pubkey'], 0) + 1
+    return list(counts.items())
+
+async def fetch_current_slot() -> Optional[int]:
+    response = await get_rpc_manager().execute_rpc_call({"jsonrpc": "2.0", "id": 1, "method": "getSlot",
+                                                          "params": [{"commitment": "finalized"}]})
+    if response and 'result' in response:
+        return response['result']
+    return None
+
+async def fetch_block_slots(start_slot: int, end_slot: int) -> List[int]:
+    # getBlocks liefert nur Slots mit Block (übersprungene Slots entfallen)
+    response = await get_rpc_manager().execute_rpc_call({"jsonrpc": "2.0", "id": 1, "method": "getBlocks",
+                                                          "params": [start_slot, end_slot]})
+    if response and 'result' in response:
+        return response['result']
+    return list(range(start_slot, end_slot + 1))
+
+async def fetch_block_raw(slot: int) -> Optional[bytes]:
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "getBlock",
+        "params": [
+            slot,
+            {"encoding": "json", "transactionDetails": "accounts", "rewards": False,
+             "maxSupportedTransactionVersion": 0}
+        ]
+    }
+    response = await get_rpc_manager().execute_rpc_call_raw(payload)
+    return response if isinstance(response, bytes) else None
+
+async def scan_blocks(start_slot: int, end_slot: int, fetch_workers: int = BLOCK_SCAN_FETCH_WORKERS,
+                      decode_processes: int = BLOCK_SCAN_DECODE_PROCESSES) -> AsyncIterator[List[WalletActivity]]:
+    # Producer/Consumer: Fetch-Worker laden Rohblöcke, ein Prozesspool dekodiert sie,
+    # der Aufrufer erhält pro Block die Aktivitäts-Updates (Adresse, Anzahl, Slot)
+    loop = asyncio.get_running_loop()
+    slots = await fetch_block_slots(start_slot, end_slot)
+    slot_queue = asyncio.Queue()
+    for slot in slots:
+        slot_queue.put_nowait(slot)
+    updates = asyncio.Queue(maxsize=fetch_workers * 2)
+    logger = logging.getLogger('wallet_identification')
+
+    # Pool außerhalb eines with-Blocks: das Herunterfahren wartet auf die Prozesse und läuft
+    # daher in einem Thread statt im Event Loop
+    pool = ProcessPoolExecutor(max_workers=decode_processes)
+
+    async def fetch_worker():
+        while True:
+            try:
+                slot = slot_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            # Ein fehlerhafter Block (oder ein abgestürzter Dekodier-Prozess) wird übersprungen, nicht der ganze Scan
+            try:
+                raw = await fetch_block_raw(slot)
+                if raw is None:
+                    logger.warning(f"Skipping slot {slot}: block could not be fetched")
+                    continue
+                counts = await loop.run_in_executor(pool, decode_block, slot, raw)
+            except Exception as e:
+                logger.error(f"Skipping slot {slot}: {type(e).__name__}: {e}")
+                continue
+            await updates.put([WalletActivity(address, count, slot) for address, count in counts])
+
+    async def run_workers():
+        try:
+            await asyncio.gather(*(fetch_worker() for _ in range(max(1, fetch_workers))))
+        finally:
+            await updates.put(None)
+
+    producer = asyncio.ensure_future(run_workers())
+    try:
+        while True:
+            batch = await updates.get()
+            if batch is None:
+                break
+            yield batch
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+        await loop.run_in_executor(None, partial(pool.shutdown, wait=True, cancel_futures=True))
+
+__all__ = ['WalletActivity', 'decode_block', 'fetch_current_slot', 'scan_blocks']
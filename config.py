@@ -7,12 +7,16 @@ load_dotenv()
 # API Konfiguration
 API_URL = os.getenv('API_URL', 'https://api.mainnet-beta.solana.com')
 API_KEY = os.getenv('API_KEY', '')
+# Kommagetrennte Liste eigener RPC-Endpoints (leer = Standardliste in solana_api.py)
+RPC_ENDPOINTS = [endpoint.strip() for endpoint in os.getenv('RPC_ENDPOINTS', '').split(',') if endpoint.strip()]
 
 # Analyse Parameter
 TIME_FRAME_DAYS = int(os.getenv('TIME_FRAME_DAYS', 30))
 MIN_TRANSACTIONS = int(os.getenv('MIN_TRANSACTIONS', 1))
 NUM_SIGNATURES = int(os.getenv('NUM_SIGNATURES', 10))
 TOP_TRADER_THRESHOLD = float(os.getenv('TOP_TRADER_THRESHOLD', 0.1))
+SIGNATURE_PAGE_SIZE = int(os.getenv('SIGNATURE_PAGE_SIZE', 1000))
+SIGNATURE_FIRST_PAGE_SIZE = int(os.getenv('SIGNATURE_FIRST_PAGE_SIZE', 100))
 
 # Logging Konfiguration
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -21,5 +25,79 @@ LOG_FORMAT = os.getenv('LOG_FORMAT', '%(asctime)s - %(levelname)s - %(message)s'
 # Rate Limiting
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', 5))
 INITIAL_DELAY = float(os.getenv('INITIAL_DELAY', 1.0))
+RPC_BATCH_SIZE = int(os.getenv('RPC_BATCH_SIZE', 50))
+# Lebensdauer (Sekunden) zwischengespeicherter Ergebnisse volatiler Methoden wie getBalance
+RPC_MEMO_TTL = float(os.getenv('RPC_MEMO_TTL', 2.0))
+# Startwert und Grenzen der adaptiven Rate pro Endpoint
+RPC_REQUESTS_PER_SECOND = float(os.getenv('RPC_REQUESTS_PER_SECOND', 10))
+RPC_MIN_REQUESTS_PER_SECOND = float(os.getenv('RPC_MIN_REQUESTS_PER_SECOND', 0.5))
+RPC_MAX_REQUESTS_PER_SECOND = float(os.getenv('RPC_MAX_REQUESTS_PER_SECOND', 40))
+# Höchstens eine Halbierung der Rate pro Fenster (Sekunden, mindestens eine Latenz des Endpoints)
+RPC_RATE_LIMIT_COOLDOWN = float(os.getenv('RPC_RATE_LIMIT_COOLDOWN', 1.0))
+# Obergrenze der exponentiellen Wartezeit zwischen Wiederholungen (Sekunden)
+RPC_MAX_BACKOFF = float(os.getenv('RPC_MAX_BACKOFF', 30))
+# Hedging: lesende Anfragen nach dem Latenz-Perzentil zusätzlich an einen zweiten Endpoint senden
+RPC_HEDGING = os.getenv('RPC_HEDGING', 'false').lower() in ('1', 'true', 'yes')
+RPC_HEDGE_PERCENTILE = float(os.getenv('RPC_HEDGE_PERCENTILE', 95))
+# Höchstens dieser Anteil zusätzlicher Anfragen durch Hedging
+RPC_HEDGE_BUDGET = float(os.getenv('RPC_HEDGE_BUDGET', 0.05))
+RPC_HEDGE_MIN_DELAY = float(os.getenv('RPC_HEDGE_MIN_DELAY', 0.05))
+
+# Nebenläufigkeit
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', 8))
+# Fertige Wallets werden in Blöcken dieser Größe bewertet und sofort in die Ergebnisdateien geschrieben
+SCORING_CHUNK_WALLETS = int(os.getenv('SCORING_CHUNK_WALLETS', 256))
+# Ergebnisse werden in Reihenfolge der Eingabe geschrieben; so viele Wallets dürfen die Worker der ältesten
+# noch offenen Wallet voraus sein (mindestens ANALYSIS_WORKERS). Begrenzt die zurückgehaltenen Ergebnisse
+RESULTS_ORDER_WINDOW = int(os.getenv('RESULTS_ORDER_WINDOW', 1024))
+# Bewertung braucht nur den Kontostand vor der ältesten Transaktion im Zeitraum und den aktuellen Kontostand
+# (getMultipleAccounts); 'true' lädt jede Transaktion des Zeitraums, z.B. für genaue Zu- und Abflüsse
+FULL_BALANCE_TIMELINE = os.getenv('FULL_BALANCE_TIMELINE', 'false').lower() in ('1', 'true', 'yes')
+# Anzahl Prozesse für die Analyse (1 = alles in einem Prozess); jeder erhält 1/N des Rate-Budgets
+ANALYSIS_SHARDS = int(os.getenv('ANALYSIS_SHARDS', 1))
+
+# Wallet-Erkennung: 'signatures' (Vote-Programm-Signaturen) oder 'blocks' (Block-Scan)
+DISCOVERY_MODE = os.getenv('DISCOVERY_MODE', 'signatures')
+BLOCK_SCAN_SLOTS = int(os.getenv('BLOCK_SCAN_SLOTS', 150))
+BLOCK_SCAN_FETCH_WORKERS = int(os.getenv('BLOCK_SCAN_FETCH_WORKERS', 8))
+BLOCK_SCAN_DECODE_PROCESSES = int(os.getenv('BLOCK_SCAN_DECODE_PROCESSES', os.cpu_count() or 1))
+MAX_IDENTIFIED_WALLETS = int(os.getenv('MAX_IDENTIFIED_WALLETS', 1000))
+# Anzahl überwachter Adressen im Space-Saving-Zähler (fester Speicherbedarf)
+HEAVY_HITTER_CAPACITY = int(os.getenv('HEAVY_HITTER_CAPACITY', 10000))
+
+# HTTP Verbindungspool
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', 30))
+HTTP_LIMIT_PER_HOST = int(os.getenv('HTTP_LIMIT_PER_HOST', 20))
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', 300))
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 30))
+
+# Persistenter Cache für finalisierte Transaktionen und historische Signaturseiten
+TX_CACHE_ENABLED = os.getenv('TX_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+TX_CACHE_PATH = os.getenv('TX_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'tx_cache.sqlite'))
+TX_CACHE_MAX_MB = float(os.getenv('TX_CACHE_MAX_MB', 512))
+
+# Inkrementelle Analyse mit Watermark pro Wallet
+INCREMENTAL_ANALYSIS = os.getenv('INCREMENTAL_ANALYSIS', 'false').lower() in ('1', 'true', 'yes')
+WALLET_STATE_PATH = os.getenv('WALLET_STATE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'wallet_state.sqlite'))
+# Änderungen am Wallet-Zustand werden gesammelt und spätestens nach so vielen Sekunden geschrieben
+WALLET_STATE_CHECKPOINT_SECONDS = float(os.getenv('WALLET_STATE_CHECKPOINT_SECONDS', 10))
+
+# Journal für fortsetzbare Läufe (--resume <run-id>) und Abstand der Checkpoints in Sekunden
+RUN_JOURNAL_DIR = os.getenv('RUN_JOURNAL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'runs'))
+JOURNAL_CHECKPOINT_SECONDS = float(os.getenv('JOURNAL_CHECKPOINT_SECONDS', 10))
+
+# Ergebnisdateien: NDJSON immer, zusätzlich 'parquet' oder 'arrow' (falls pyarrow installiert ist) oder 'none'
+RESULTS_DIR = os.getenv('RESULTS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results'))
+RESULTS_COLUMNAR_FORMAT = os.getenv('RESULTS_COLUMNAR_FORMAT', 'parquet')
+RESULTS_BATCH_ROWS = int(os.getenv('RESULTS_BATCH_ROWS', 1024))
+# Anzahl der Wallets (nach Gewinn) in der Konsolenausgabe und im Top-Trader-Log; alle Ergebnisse stehen in den Dateien
+SUMMARY_TOP_WALLETS = int(os.getenv('SUMMARY_TOP_WALLETS', 20))
+
+# Verzeichnis der Log-Dateien und der gespeicherten Wallet-Listen (identified_wallets_*.json)
+LOG_DIR = os.getenv('LOG_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs'))
+
+# Metriken (Prometheus-Textdatei und JSON-Zusammenfassung am Ende des Laufs); Intervall > 0 schreibt zusätzlich Zwischenstände
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics'))
+METRICS_DUMP_INTERVAL = float(os.getenv('METRICS_DUMP_INTERVAL', 0))
 
 # Weitere Konfigurationsoptionen können hier hinzugefügt werden
\ No newline at end of file
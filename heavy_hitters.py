@@ -0,0 +1,60 @@
+import heapq
+from typing import Dict, Hashable, List, NamedTuple, Optional
+
+class HeavyHitter(NamedTuple):
+    key: Hashable
+    count: int
+    error: int
+    last_seen: Optional[int]
+
+    @property
+    def guaranteed_count(self) -> int:
+        # Untere Schranke der wahren Häufigkeit; die obere ist count
+        return self.count - self.error
+
+class SpaceSaving:
+    # Space-Saving-Zähler (Metwally et al.) mit fester Anzahl überwachter Schlüssel:
+    # der Speicher bleibt konstant, die Überschätzung je Schlüssel ist höchstens total / capacity
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = 0
+        self._entries: Dict[Hashable, List] = {}  # key -> [count, error, last_seen]
+        self._heap: List = []  # (count, key); veraltete Einträge werden beim Entnehmen korrigiert
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(self, key: Hashable, count: int = 1, seen: Optional[int] = None):
+        self.total += count
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[0] += count
+            if seen is not None and (entry[2] is None or seen > entry[2]):
+                entry[2] = seen
+            return
+        error = 0
+        if len(self._entries) >= self.capacity:
+            # Den Schlüssel mit der kleinsten Zählung ersetzen und dessen Zählung als Fehler übernehmen
+            error = self._pop_min()
+        self._entries[key] = [error + count, error, seen]
+        heapq.heappush(self._heap, (error + count, key))
+
+    def _pop_min(self) -> int:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            entry = self._entries[key]
+            if entry[0] == count:
+                del self._entries[key]
+                return count
+            heapq.heappush(self._heap, (entry[0], key))
+
+    @property
+    def max_error(self) -> int:
+        return self.total // self.capacity if len(self._entries) >= self.capacity else 0
+
+    def top(self, k: Optional[int] = None) -> List[HeavyHitter]:
+        hitters = [HeavyHitter(key, count, error, seen) for key, (count, error, seen) in self._entries.items()]
+        hitters.sort(key=lambda hitter: (hitter.count, hitter.guaranteed_count), reverse=True)
+        return hitters if k is None else hitters[:k]
+
+__all__ = ['HeavyHitter', 'SpaceSaving']
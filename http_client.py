@@ -0,0 +1,56 @@
+import aiohttp
+import asyncio
+from typing import Dict, Optional, Tuple
+from config import HTTP_KEEPALIVE_TIMEOUT, HTTP_LIMIT_PER_HOST, HTTP_DNS_CACHE_TTL, HTTP_TIMEOUT
+
+class HTTPClient:
+    # Langlebige Session pro Endpoint, damit TCP/TLS-Verbindungen wiederverwendet werden
+    def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None):
+        self.base_url = base_url
+        self.headers = headers or {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=HTTP_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+                use_dns_cache=True
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+            )
+        return self._session
+
+    def post(self, url: str, **kwargs):
+        return self.session.post(url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+# Ein Client pro Basis-URL und Header-Satz (z.B. Solscan mit API-Token neben anonymen Aufrufen derselben URL)
+_clients: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], HTTPClient] = {}
+
+def get_http_client(base_url: str, headers: Optional[Dict[str, str]] = None) -> HTTPClient:
+    key = (base_url, tuple(sorted((headers or {}).items())))
+    client = _clients.get(key)
+    if client is None:
+        client = HTTPClient(base_url, headers)
+        _clients[key] = client
+    return client
+
+async def close_http_clients():
+    clients = list(_clients.values())
+    _clients.clear()
+    await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+__all__ = ['HTTPClient', 'get_http_client', 'close_http_clients']
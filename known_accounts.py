@@ -0,0 +1,43 @@
+# Bekannte Programm- und Systemkonten, die bei der Wallet-Erkennung ignoriert werden
+VOTE_PROGRAM_ID = "Vote111111111111111111111111111111111111111"
+
+KNOWN_PROGRAM_ACCOUNTS = frozenset({
+    # Native Programme
+    "11111111111111111111111111111111",
+    VOTE_PROGRAM_ID,
+    "Stake11111111111111111111111111111111111111",
+    "Config1111111111111111111111111111111111111",
+    "ComputeBudget111111111111111111111111111111",
+    "AddressLookupTab1e1111111111111111111111111",
+    "BPFLoader1111111111111111111111111111111111",
+    "BPFLoader2111111111111111111111111111111111",
+    "BPFLoaderUpgradeab1e11111111111111111111111",
+    "Ed25519SigVerify111111111111111111111111111",
+    "KeccakSecp256k11111111111111111111111111111",
+    # Sysvars
+    "SysvarC1ock11111111111111111111111111111111",
+    "SysvarRent111111111111111111111111111111111",
+    "SysvarRecentB1ockHashes11111111111111111111",
+    "SysvarS1otHashes111111111111111111111111111",
+    "SysvarStakeHistory1111111111111111111111111",
+    "SysvarEpochSchedu1e111111111111111111111111",
+    "SysvarFees111111111111111111111111111111111",
+    "SysvarRewards111111111111111111111111111111",
+    "Sysvar1nstructions1111111111111111111111111",
+    # SPL-Programme
+    "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+    "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb",
+    "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL",
+    "MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr",
+    "Memo1UhkJRfHyvLMcVucJwxXeuD728EQVDDwQDxFMNo",
+    "metaqbxxUerdq28cj1RbAWkYQm3ybzjb6a8bt518x1s",
+    # Verbreitete DEX-/Aggregator-Programme
+    "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4",
+    "whirLbMiicVdio4qvUfM5KAg6Ct8VwpYzGff3uctyCc",
+    "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8",
+    "9W959DqEETiGZocYWCQPaJ6sBmUzgfxXfqGeTEdp3aQP",
+    "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin",
+    "srmqPvymJeFKQ4zGQed1GFppgo9v4bsNMtRzuq8vW8Q",
+})
+
+__all__ = ['VOTE_PROGRAM_ID', 'KNOWN_PROGRAM_ACCOUNTS']
@@ -0,0 +1,102 @@
+import os
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class _TargetQueueHandler(QueueHandler):
+    # Markiert jeden Eintrag mit seiner Zieldatei; propagierte Einträge (Kind-Logger -> Root) landen so in beiden Dateien
+    def __init__(self, log_queue, target: str):
+        super().__init__(log_queue)
+        self.target = target
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.log_target = self.target
+        return record
+
+    def enqueue(self, record):
+        super().enqueue(record)
+        # Nach stop_logging() (z.B. Log-Einträge beim Herunterfahren) den Listener neu starten
+        if _listener is None:
+            with _lock:
+                _ensure_listener()
+
+class _TargetDispatcher(logging.Handler):
+    # Läuft im Listener-Thread und reicht Einträge an den Datei-Handler ihres Ziels weiter
+    def __init__(self):
+        super().__init__()
+        self.handlers: Dict[str, logging.Handler] = {}
+
+    def handle(self, record):
+        handler = self.handlers.get(getattr(record, 'log_target', None))
+        if handler is not None:
+            handler.handle(record)
+        return True
+
+    def close(self):
+        for handler in self.handlers.values():
+            handler.close()
+        super().close()
+
+_queue: queue.SimpleQueue = queue.SimpleQueue()
+_dispatcher = _TargetDispatcher()
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+_file_suffix: Optional[str] = None
+
+def set_log_file_suffix(suffix: Optional[str]):
+    # Eigene Log-Dateien pro Prozess (z.B. Shard-Prozesse): wallet_analysis.log -> wallet_analysis.<suffix>.log.
+    # Rotieren mehrere Prozesse dieselbe Datei, gehen beim Umbenennen Einträge verloren. Vor dem ersten Logger aufrufen
+    global _file_suffix
+    _file_suffix = suffix
+
+def log_file_path(log_path: str) -> str:
+    if not _file_suffix:
+        return log_path
+    root, extension = os.path.splitext(log_path)
+    return f"{root}.{_file_suffix}{extension}"
+
+def _ensure_listener():
+    global _listener
+    if _listener is None:
+        _listener = QueueListener(_queue, _dispatcher)
+        _listener.start()
+
+def get_queued_logger(name: Optional[str], log_path: str, level: int = logging.INFO, fmt: str = LOG_FORMAT,
+                      max_bytes: int = 1024 * 1024, backup_count: int = 3, replace: bool = False) -> logging.Logger:
+    # Der Logger schreibt nur in eine Queue; Formatieren und Dateizugriffe übernimmt der Listener-Thread,
+    # damit Log-I/O nie die RPC-Coroutinen auf dem Event Loop blockiert. name=None konfiguriert den Root-Logger
+    logger = logging.getLogger(name)
+    with _lock:
+        if replace:
+            logger.handlers.clear()
+        if not any(isinstance(handler, _TargetQueueHandler) for handler in logger.handlers):
+            os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+            target = os.path.abspath(log_file_path(log_path))
+            if target not in _dispatcher.handlers:
+                file_handler = RotatingFileHandler(target, maxBytes=max_bytes, backupCount=backup_count, mode='a')
+                file_handler.setFormatter(logging.Formatter(fmt))
+                _dispatcher.handlers[target] = file_handler
+            logger.addHandler(_TargetQueueHandler(_queue, target))
+            logger.setLevel(level)
+        _ensure_listener()
+    return logger
+
+def stop_logging():
+    # Wartet, bis alle Einträge geschrieben sind; ein späterer Logger startet den Listener erneut
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in _dispatcher.handlers.values():
+            handler.flush()
+
+atexit.register(stop_logging)
+
+__all__ = ['LOG_FORMAT', 'get_queued_logger', 'log_file_path', 'set_log_file_suffix', 'stop_logging']
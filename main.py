@@ -1,91 +1,163 @@
 import os
 import asyncio
-from wallet_identification import identify_active_wallets_from_signatures
+import argparse
+from wallet_identification import identify_active_wallets_from_signatures, identify_active_wallets_from_blocks
 from wallet_analysis import analyze_active_wallets
+from sharding import analyze_sharded, merge_stats
+from run_journal import new_run_id, open_run_journal
+from results_sink import ResultsWriter
+from log_setup import get_queued_logger, stop_logging
+from metrics import get_metrics
+from solana_api import close_connections
+from tx_cache import close_tx_cache
+from wallet_state import close_wallet_state_store
+from config import DISCOVERY_MODE, ANALYSIS_SHARDS, METRICS_DUMP_INTERVAL, LOG_DIR
 import logging
-from logging.handlers import RotatingFileHandler
 import json
-from datetime import datetime
 
 def setup_logger(name, log_file, level=logging.INFO):
-    # Erstelle absoluten Pfad zum Log-Verzeichnis
-    project_dir = os.path.dirname(os.path.abspath(__file__))
-    log_path = os.path.join(project_dir, 'logs', log_file)
+    log_path = os.path.join(LOG_DIR, log_file)
     
-    # Erstelle Log-Verzeichnis
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-    
-    # Erstelle Logger
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
-    
-    # Entferne existierende Handler
-    if logger.hasHandlers():
-        logger.handlers.clear()
-    
-    # Rotating File Handler
-    file_handler = RotatingFileHandler(
-        log_path,
-        maxBytes=1024 * 1024,  # 1MB
-        backupCount=3,
-        mode='a'
-    )
-    
-    # Formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
-    return logger
+    # Logger schreibt über die Log-Queue; existierende Handler werden ersetzt
+    return get_queued_logger(name, log_path, level, replace=True)
 
 def write_to_log(logger, data, message):
+    # Eine kompakte JSON-Zeile pro Eintrag statt eines eingerückten Dumps der ganzen Liste
     logger.info(message)
-    logger.info(json.dumps(data, indent=2))
+    for item in data:
+        logger.info(json.dumps(item, separators=(',', ':')))
 
-async def main():
-    # Erstelle Timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+def load_wallets(path):
+    # Watchlist als JSON-Liste (wie identified_wallets_*.json) oder eine Adresse pro Zeile
+    with open(path) as f:
+        content = f.read()
+    if content.lstrip().startswith('['):
+        return json.loads(content)
+    return [line.strip() for line in content.splitlines() if line.strip()]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Solana Wallet Analysis")
+    parser.add_argument('--shards', type=int, default=ANALYSIS_SHARDS,
+                        help="Anzahl Analyse-Prozesse; die Wallets werden per Hash auf die Prozesse verteilt")
+    parser.add_argument('--wallets', metavar='FILE',
+                        help="Watchlist statt Wallet-Erkennung (JSON-Liste oder eine Adresse pro Zeile)")
+    parser.add_argument('--discovery', choices=['signatures', 'blocks'], default=DISCOVERY_MODE,
+                        help="Methode der Wallet-Erkennung")
+    parser.add_argument('--resume', metavar='RUN_ID',
+                        help="Abgebrochenen Lauf fortsetzen: fertige Wallets aus dem Journal übernehmen, offene erneut analysieren")
+    return parser.parse_args(argv)
+
+async def main(shards=1, wallets_file=None, discovery_mode=DISCOVERY_MODE, resume=None):
+    # Lauf-ID aus Zeitstempel und Zufallsanteil (auch für Log- und Metrikdateien)
+    run_id = new_run_id()
+    shard_stats = {}
+    journal = None
+    results = None
+    metrics = get_metrics()
+    dump_task = None
     
-    # Setup Logger
-    start_logger = setup_logger('start_logger', f'process/start_process_{timestamp}.log')
-    start_logger.info("Starting Solana Wallet Analysis")
+    try:
+        # Setup Logger
+        start_logger = setup_logger('start_logger', f'process/start_process_{run_id}.log')
+        start_logger.info("Starting Solana Wallet Analysis")
 
-    print("Identifying active wallets...")
-    identified_wallets = await identify_active_wallets_from_signatures(num_signatures=10, min_transactions=1)
+        if resume:
+            journal = open_run_journal(resume, create=False)
+            identified_wallets = journal.wallets()
+            progress = journal.progress()
+            print(f"Resuming run {resume}: {progress['done']} of {progress['total']} wallets already analyzed")
+        elif wallets_file:
+            print(f"Loading wallets from {wallets_file}...")
+            identified_wallets = load_wallets(wallets_file)
+        elif discovery_mode == 'blocks':
+            print("Identifying active wallets...")
+            with metrics.stage('discovery'):
+                identified_wallets = await identify_active_wallets_from_blocks(min_transactions=1)
+        else:
+            print("Identifying active wallets...")
+            with metrics.stage('discovery'):
+                identified_wallets = await identify_active_wallets_from_signatures(num_signatures=10, min_transactions=1)
 
-    identified_logger = setup_logger('identified_logger', f'wallets/identified_wallets_{timestamp}.log')
-    write_to_log(identified_logger, identified_wallets, f"Found {len(identified_wallets)} active wallets")
+        if journal is None:
+            # Ergebnis der Erkennung sofort sichern, damit ein Abbruch der Analyse nicht alles verwirft
+            journal = open_run_journal(run_id)
+            journal.save_wallets(identified_wallets)
+            print(f"Run ID: {run_id} (resume with --resume {run_id})")
 
-    print(f"Found active wallets: {len(identified_wallets)}")
-    print("\nAnalyzing the identified active wallets...")
-    
-    active_wallets, top_traders = await analyze_active_wallets(identified_wallets, time_frame_days=30)
+        # Die vollständige Wallet-Liste steht im Journal des Laufs
+        identified_logger = setup_logger('identified_logger', f'wallets/identified_wallets_{run_id}.log')
+        identified_logger.info(f"Found {len(identified_wallets)} active wallets (run {journal.run_id}, journal {journal.path})")
 
-    analyzed_logger = setup_logger('analyzed_logger', f'analysis/analyzed_wallets_{timestamp}.log')
-    write_to_log(analyzed_logger, active_wallets, "Analysis Results")
+        print(f"Found active wallets: {len(identified_wallets)}")
+        print("\nAnalyzing the identified active wallets...")
+        if METRICS_DUMP_INTERVAL > 0:
+            # Zwischenstände für lange Läufe (im Shard-Modus erst nach Abschluss der Shards vollständig)
+            dump_task = asyncio.ensure_future(metrics.dump_periodically(run_id))
+    
+        # Ergebnisse werden pro Wallet direkt in die Ergebnisdateien gestreamt
+        results = ResultsWriter(journal.run_id)
+        if shards > 1:
+            summary, shard_stats = await analyze_sharded(identified_wallets, shards, time_frame_days=30,
+                                                         journal=journal, sink=results)
+        else:
+            summary = await analyze_active_wallets(identified_wallets, time_frame_days=30, journal=journal, sink=results)
+        results.close()
 
-    # Speichere Top Trader Informationen
-    if top_traders:
-        top_traders_logger = setup_logger('top_traders_logger', f'traders/top_traders_{timestamp}.log')
-        write_to_log(top_traders_logger, top_traders, "Top Traders (>10% profit in 30 days)")
+        analyzed_logger = setup_logger('analyzed_logger', f'analysis/analyzed_wallets_{run_id}.log')
+        analyzed_logger.info(f"Analysis Results: {results.count} active wallets written to {results.ndjson_path}"
+                             f"{' and ' + results.columnar_path if results.columnar_path else ''}")
 
-    print("\nAnalysis Results:")
-    for wallet in active_wallets:
-        print(f"Address: {wallet['address']}")
-        print(f"Transactions in the last 30 days: {wallet['transaction_count']}")
-        print(f"Last activity: {wallet['last_activity']}")
-        print(f"Profit: {wallet['profit']:.2%}")
-        print("-" * 50)
+        # Konsole und Top-Trader-Log zeigen nur die Wallets mit dem höchsten Gewinn; alle stehen in den Ergebnisdateien
+        top_traders = summary.top_traders()
+        if top_traders:
+            top_traders_logger = setup_logger('top_traders_logger', f'traders/top_traders_{run_id}.log')
+            write_to_log(top_traders_logger, top_traders, f"Top Traders (>10% profit in 30 days): "
+                                                          f"{len(top_traders)} of {summary.top_trader_count} by profit")
 
-    if top_traders:
-        print("\nTop Traders (>10% profit in 30 days):")
-        for trader in top_traders:
-            print(f"Address: {trader['address']}")
-            print(f"Profit: {trader['profit']:.2%}")
+        print(f"\nAnalysis Results ({summary.count} active wallets, top {len(summary.active_wallets())} by profit):")
+        for wallet in summary.active_wallets():
+            print(f"Address: {wallet['address']}")
+            print(f"Transactions in the last 30 days: {wallet['transaction_count']}")
+            print(f"Last activity: {wallet['last_activity']}")
+            print(f"Profit: {wallet['profit']:.2%}")
             print("-" * 50)
 
-    end_logger = setup_logger('end_logger', f'process/end_process_{timestamp}.log')
-    end_logger.info("Solana Wallet Analysis completed")
+        if top_traders:
+            print(f"\nTop Traders (>10% profit in 30 days, {len(top_traders)} of {summary.top_trader_count}):")
+            for trader in top_traders:
+                print(f"Address: {trader['address']}")
+                print(f"Profit: {trader['profit']:.2%}")
+                print("-" * 50)
+
+        end_logger = setup_logger('end_logger', f'process/end_process_{run_id}.log')
+        end_logger.info("Solana Wallet Analysis completed")
+    finally:
+        if dump_task is not None:
+            dump_task.cancel()
+        # Schließe die gemeinsamen HTTP-Verbindungen, den Wallet-Zustand und den Transaktions-Cache
+        if results is not None:
+            results.close()
+        if journal is not None:
+            journal.close()
+        rpc_stats = await close_connections()
+        close_wallet_state_store()
+        cache_stats = close_tx_cache()
+        # Im Shard-Modus kommen die Zähler der Analyse-Prozesse hinzu
+        rpc_stats = merge_stats([rpc_stats, shard_stats.get('rpc')], 'saved_ratio', 'saved', 'requests')
+        cache_stats = merge_stats([cache_stats, shard_stats.get('cache')], 'hit_rate', 'hits', 'hits+misses', ('size_bytes',))
+        if cache_stats:
+            print(f"\nCache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.1%} hit rate)")
+        if rpc_stats:
+            print(f"RPC: {rpc_stats['requests']} requests, {rpc_stats['coalesced']} coalesced, "
+                  f"{rpc_stats['memo_hits']} memoised ({rpc_stats['saved_ratio']:.1%} saved), "
+                  f"{rpc_stats['hedged']} hedged ({rpc_stats['hedge_wins']} won by the hedge)")
+        if results is not None:
+            print(f"Results: {results.ndjson_path}")
+        # Pro Aufruf eigene Dateien; ein fortgesetzter Lauf überschreibt die Metriken des ursprünglichen nicht
+        prom_path, json_path = metrics.write(run_id)
+        print(f"Metrics: {prom_path}, {json_path}")
+        stop_logging()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    asyncio.run(main(shards=args.shards, wallets_file=args.wallets, discovery_mode=args.discovery, resume=args.resume))
\ No newline at end of file
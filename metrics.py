@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import asyncio
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config import METRICS_DIR, METRICS_DUMP_INTERVAL
+
+# Obergrenzen der Latenz-Buckets in Sekunden (wie die Prometheus-Standardbuckets, nach oben erweitert)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # letzter Eintrag: > größter Bucket (+Inf)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: 'Histogram'):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        # Lineare Interpolation innerhalb des Buckets, in dem das Quantil liegt
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + '}'
+
+class MetricsRegistry:
+    # Zähler und Latenz-Histogramme pro Metrik und Label-Kombination (z.B. endpoint, method, stage)
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels(labels))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        # Laufzeit eines Analyseschritts (Erkennung, Signaturen, Kontostände, Bewertung, ...)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.monotonic() - start, stage=stage)
+
+    def snapshot(self) -> Dict[str, Any]:
+        # Picklebare Rohdaten, z.B. zur Übergabe aus einem Shard-Prozess
+        return {
+            'counters': dict(self.counters),
+            'histograms': {key: (histogram.counts, histogram.sum, histogram.count) for key, histogram in self.histograms.items()},
+        }
+
+    def merge_snapshot(self, snapshot: Dict[str, Any]):
+        for key, value in snapshot['counters'].items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, (counts, total, count) in snapshot['histograms'].items():
+            other = Histogram()
+            other.counts, other.sum, other.count = list(counts), total, count
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                self.histograms[key] = other
+            else:
+                histogram.merge(other)
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f'# TYPE {name} counter')
+            for (metric, labels), value in sorted(self.counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {value:g}')
+        for name in sorted({name for name, _ in self.histograms}):
+            lines.append(f'# TYPE {name} histogram')
+            for (metric, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    lines.append(f'{name}_bucket{_format_labels(labels, (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {histogram.sum:g}')
+                lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Any]:
+        counters: Dict[str, List[Dict[str, Any]]] = {}
+        for (name, labels), value in sorted(self.counters.items()):
+            counters.setdefault(name, []).append(dict(labels, value=value))
+        histograms: Dict[str, List[Dict[str, Any]]] = {}
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            histograms.setdefault(name, []).append(dict(
+                labels, count=histogram.count, sum=histogram.sum,
+                mean=histogram.sum / histogram.count if histogram.count else None,
+                p50=histogram.quantile(0.5), p95=histogram.quantile(0.95), p99=histogram.quantile(0.99)))
+        return {'started': self.started, 'elapsed_seconds': time.time() - self.started,
+                'counters': counters, 'histograms': histograms}
+
+    def write(self, run_id: str, directory: str = METRICS_DIR) -> Tuple[str, str]:
+        # Prometheus-Textformat (z.B. für den node_exporter Textfile-Collector) und JSON-Zusammenfassung;
+        # atomar ersetzt, damit ein Leser nie eine halb geschriebene Datei sieht
+        os.makedirs(directory, exist_ok=True)
+        prom_path = os.path.join(directory, f'metrics_{run_id}.prom')
+        json_path = os.path.join(directory, f'metrics_{run_id}.json')
+        for path, content in ((prom_path, self.to_prometheus()), (json_path, json.dumps(self.summary(), indent=2))):
+            with open(path + '.tmp', 'w') as f:
+                f.write(content)
+            os.replace(path + '.tmp', path)
+        return prom_path, json_path
+
+    async def dump_periodically(self, run_id: str, interval: float = METRICS_DUMP_INTERVAL):
+        # Für lange Läufe: Zwischenstand alle interval Sekunden schreiben (als Task starten, am Ende abbrechen)
+        while True:
+            await asyncio.sleep(interval)
+            self.write(run_id)
+
+_metrics: Optional[MetricsRegistry] = None
+
+def get_metrics() -> MetricsRegistry:
+    global _metrics
+    if _metrics is None:
+        _metrics = MetricsRegistry()
+    return _metrics
+
+def reset_metrics() -> MetricsRegistry:
+    # Neue, leere Registry, z.B. pro Shard-Lauf, damit ein wiederverwendeter Prozess nichts doppelt meldet
+    global _metrics
+    _metrics = MetricsRegistry()
+    return _metrics
+
+__all__ = ['Histogram', 'MetricsRegistry', 'LATENCY_BUCKETS', 'get_metrics', 'reset_metrics']
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+class TokenBucket:
+    # Einfacher Token-Bucket: rate Anfragen pro Sekunde, Bursts bis capacity
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0):
+        while not self.try_acquire(tokens):
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+class AdaptiveTokenBucket(TokenBucket):
+    # Halbiert die Rate bei 429, erhöht sie bei Erfolg schrittweise wieder (AIMD)
+    def __init__(self, rate: float, min_rate: float, max_rate: float, increase: float = 0.1, cooldown: float = 1.0):
+        super().__init__(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.cooldown = cooldown
+        self.blocked_until = 0.0
+        self.last_decrease = float('-inf')
+
+    def peek_tokens(self) -> float:
+        return min(self.capacity, self.tokens + (time.monotonic() - self.updated) * self.rate)
+
+    def expected_wait(self, tokens: float = 1.0) -> float:
+        wait = max(0.0, self.blocked_until - time.monotonic())
+        if self.rate > 0:
+            wait = max(wait, (tokens - self.peek_tokens()) / self.rate)
+        return wait
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        if time.monotonic() < self.blocked_until:
+            return False
+        return super().try_acquire(tokens)
+
+    async def acquire(self, tokens: float = 1.0):
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(self.expected_wait(tokens))
+
+    def on_success(self):
+        self._refill()
+        self.rate = min(self.max_rate, self.rate + self.increase)
+        self.capacity = max(self.rate, 1.0)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None, rtt: float = 0.0) -> bool:
+        # Höchstens eine Halbierung pro Cooldown-Fenster (mindestens eine RTT): gleichzeitig laufende Anfragen,
+        # die mit 429 zurückkommen, melden dieselbe Überlast und dürfen die Rate nicht bis min_rate drücken
+        now = time.monotonic()
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+        if now - self.last_decrease < max(self.cooldown, rtt):
+            return False
+        self._refill()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.capacity = max(self.rate, 1.0)
+        self.tokens = 0.0
+        self.last_decrease = now
+        return True
+
+class EndpointHealth:
+    # Gleitende Mittelwerte für Latenz und Fehlerrate eines Endpoints
+    def __init__(self, alpha: float = 0.2, initial_latency: float = 0.2):
+        self.alpha = alpha
+        self.latency = initial_latency
+        self.error_rate = 0.0
+        self.in_flight = 0
+
+    def record_success(self, latency: float):
+        self.latency += self.alpha * (latency - self.latency)
+        self.error_rate -= self.alpha * self.error_rate
+
+    def record_failure(self):
+        self.error_rate += self.alpha * (1.0 - self.error_rate)
+
+class LatencyWindow:
+    # Die letzten size Latenzen einer Methode, für Perzentile wie p95
+    def __init__(self, size: int = 256):
+        self.samples = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def record(self, latency: float):
+        self.samples.append(latency)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+class HedgeBudget:
+    # Jede primäre Anfrage spart ratio Token an, jede Hedge-Anfrage verbraucht einen:
+    # zusätzlicher Verkehr bleibt so bei höchstens ratio der Anfragen (plus kleinem Burst)
+    def __init__(self, ratio: float, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+
+    def on_request(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def available(self) -> bool:
+        return self.tokens >= 1.0
+
+    def spend(self):
+        self.tokens -= 1.0
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+__all__ = ['TokenBucket', 'AdaptiveTokenBucket', 'EndpointHealth', 'LatencyWindow', 'HedgeBudget', 'parse_retry_after']
@@ -0,0 +1,141 @@
+import os
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
+from tx_records import dumps
+from config import RESULTS_DIR, RESULTS_COLUMNAR_FORMAT, RESULTS_BATCH_ROWS, SUMMARY_TOP_WALLETS
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+def _arrow_schema():
+    # Felder eines Wallet-Ergebnisses (Wallet.to_dict() plus Top-Trader-Flag)
+    return pyarrow.schema([
+        ("address", pyarrow.string()),
+        ("transaction_count", pyarrow.int64()),
+        ("last_activity", pyarrow.string()),
+        ("profit", pyarrow.float64()),
+        ("current_balance", pyarrow.float64()),
+        ("balance_30d_ago", pyarrow.float64()),
+        ("balance_change_30d", pyarrow.float64()),
+        ("is_top_trader", pyarrow.bool_()),
+    ])
+
+class ResultsWriter:
+    # Schreibt jedes Wallet-Ergebnis sofort als NDJSON-Zeile und, falls pyarrow installiert ist,
+    # zusätzlich spaltenweise (Parquet oder Arrow IPC) in Batches zu batch_rows Zeilen.
+    # Ein fortgesetzter Lauf bewertet alle Wallets neu und überschreibt daher die Dateien des Laufs
+    def __init__(self, run_id: str, directory: str = RESULTS_DIR, columnar_format: str = RESULTS_COLUMNAR_FORMAT,
+                 batch_rows: int = RESULTS_BATCH_ROWS):
+        os.makedirs(directory, exist_ok=True)
+        self.ndjson_path = os.path.join(directory, f'wallets_{run_id}.ndjson')
+        self._ndjson = open(self.ndjson_path, 'wb')
+        self.batch_rows = batch_rows
+        self.count = 0
+        self.top_traders = 0
+        self._rows: List[Dict[str, Any]] = []
+        self._columnar = None
+        self.columnar_path: Optional[str] = None
+        if pyarrow is not None and columnar_format in ('parquet', 'arrow'):
+            self._schema = _arrow_schema()
+            if columnar_format == 'parquet':
+                self.columnar_path = os.path.join(directory, f'wallets_{run_id}.parquet')
+                self._columnar = pyarrow.parquet.ParquetWriter(self.columnar_path, self._schema)
+            else:
+                self.columnar_path = os.path.join(directory, f'wallets_{run_id}.arrow')
+                self._columnar = pyarrow.ipc.new_stream(self.columnar_path, self._schema)
+
+    def write(self, wallet_info: Dict[str, Any], is_top_trader: bool = False):
+        row = dict(wallet_info, is_top_trader=bool(is_top_trader))
+        self._ndjson.write(dumps(row) + b'\n')
+        self.count += 1
+        self.top_traders += row['is_top_trader']
+        if self._columnar is not None:
+            self._rows.append(row)
+            if len(self._rows) >= self.batch_rows:
+                self._flush_columnar()
+
+    def _flush_columnar(self):
+        if not self._rows:
+            return
+        self._columnar.write_batch(pyarrow.RecordBatch.from_pylist(self._rows, schema=self._schema))
+        self._rows = []
+
+    def flush(self):
+        self._ndjson.flush()
+        if self._columnar is not None:
+            self._flush_columnar()
+
+    def close(self):
+        if self._ndjson.closed:
+            return
+        self.flush()
+        self._ndjson.close()
+        if self._columnar is not None:
+            self._columnar.close()
+            self._columnar = None
+
+    def __enter__(self) -> 'ResultsWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class _Descending(str):
+    # Umgekehrte Ordnung für den Gleichstand im Min-Heap: die kleinere Adresse gilt als besser
+    def __lt__(self, other):
+        return str.__gt__(self, other)
+
+    def __gt__(self, other):
+        return str.__lt__(self, other)
+
+class ResultsSummary:
+    # Zähler und die top_n Wallets mit dem höchsten Gewinn für Konsole und Log. Der Speicherbedarf hängt nicht
+    # von der Anzahl der Wallets ab; vollständig sind nur die Ergebnisdateien
+    def __init__(self, top_n: int = SUMMARY_TOP_WALLETS):
+        self.top_n = top_n
+        self.count = 0
+        self.top_trader_count = 0
+        # Min-Heaps nach (Gewinn, Adresse): bei gleichem Gewinn steht die kleinere Adresse vorne. Entscheidend ist nicht
+        # die Reihenfolge der Ergebnisse, damit ein Lauf mit mehreren Shards dieselbe Auswahl liefert wie einer in einem Prozess.
+        # Die laufende Nummer unterscheidet nur doppelte Adressen und vermeidet den Vergleich der Dicts
+        self._active: List[Tuple[float, str, int, Dict[str, Any]]] = []
+        self._top_traders: List[Tuple[float, str, int, Dict[str, Any]]] = []
+        self._sequence = 0
+
+    def write(self, wallet_info: Dict[str, Any], is_top_trader: bool = False):
+        self.count += 1
+        self._push(self._active, wallet_info)
+        if is_top_trader:
+            self.top_trader_count += 1
+            self._push(self._top_traders, wallet_info)
+
+    def _push(self, heap: List[Tuple[float, str, int, Dict[str, Any]]], wallet_info: Dict[str, Any]):
+        if self.top_n <= 0:
+            return
+        self._sequence += 1
+        item = (wallet_info['profit'], _Descending(wallet_info['address']), -self._sequence, wallet_info)
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, item)
+        elif item[:3] > heap[0][:3]:
+            heapq.heapreplace(heap, item)
+
+    def merge(self, other: 'ResultsSummary'):
+        # Zusammenfassung eines Shard-Prozesses übernehmen
+        self.count += other.count
+        self.top_trader_count += other.top_trader_count
+        for wallet_info in other.active_wallets():
+            self._push(self._active, wallet_info)
+        for wallet_info in other.top_traders():
+            self._push(self._top_traders, wallet_info)
+
+    def active_wallets(self) -> List[Dict[str, Any]]:
+        return [wallet_info for *_, wallet_info in sorted(self._active, key=lambda item: item[:3], reverse=True)]
+
+    def top_traders(self) -> List[Dict[str, Any]]:
+        return [wallet_info for *_, wallet_info in sorted(self._top_traders, key=lambda item: item[:3], reverse=True)]
+
+__all__ = ['ResultsSummary', 'ResultsWriter']
@@ -0,0 +1,206 @@
+import os
+import time
+import asyncio
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from balance_timeline import BalancePoint
+from sqlite_utils import connect, with_lock_retry
+from config import RUN_JOURNAL_DIR, JOURNAL_CHECKPOINT_SECONDS
+
+# Spätestens nach so vielen fertigen Wallets schreiben, auch wenn das Zeitintervall noch läuft
+CHECKPOINT_WALLETS = 500
+
+class RunJournal:
+    # Journal eines Analyselaufs: Ergebnis der Wallet-Erkennung und die Kontostandspunkte jeder fertigen Wallet.
+    # Ein abgebrochener Lauf wird mit --resume <run-id> fortgesetzt: fertige Wallets werden aus dem Journal
+    # übernommen, nur offene (oder fehlgeschlagene) erneut analysiert
+    def __init__(self, path: str, run_id: Optional[str] = None, checkpoint_seconds: float = JOURNAL_CHECKPOINT_SECONDS,
+                 checkpoint_wallets: int = CHECKPOINT_WALLETS):
+        self.path = path
+        self.run_id = run_id
+        self.checkpoint_seconds = checkpoint_seconds
+        self.checkpoint_wallets = checkpoint_wallets
+        self.last_checkpoint = time.monotonic()
+        # Fertige Wallets werden gesammelt und pro Checkpoint in einer kurzen Transaktion geschrieben,
+        # damit mehrere Shard-Prozesse sich die Schreibsperre nicht gegenseitig lange vorenthalten.
+        # Die *_async-Methoden schreiben in einem eigenen Thread, damit das Warten auf die Sperre den Event Loop nicht anhält
+        self._pending: List[Tuple[str, List[BalancePoint]]] = []
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='run_journal')
+        self.conn = connect(path, check_same_thread=False)
+        with_lock_retry(self.conn, self._create_schema)
+
+    def _create_schema(self):
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS run_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS run_wallets (
+                position INTEGER PRIMARY KEY,
+                address TEXT NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_run_wallets_address ON run_wallets (address);
+            CREATE TABLE IF NOT EXISTS run_points (
+                address TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                block_time INTEGER,
+                pre_balance INTEGER NOT NULL,
+                post_balance INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_run_points_address ON run_points (address);
+        """)
+        self.conn.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM run_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value):
+        def write():
+            self.conn.execute("INSERT OR REPLACE INTO run_meta (key, value) VALUES (?, ?)", (key, str(value)))
+            self.conn.commit()
+        with self._lock:
+            with_lock_retry(self.conn, write)
+
+    def window_start(self, min_block_time: int) -> int:
+        # Beginn des Analysezeitraums: beim ersten Aufruf festgelegt, beim Fortsetzen unverändert übernommen
+        with self._lock:
+            stored = self.get_meta('min_block_time')
+            if stored is None:
+                self.set_meta('min_block_time', min_block_time)
+                return min_block_time
+            return int(stored)
+
+    def save_wallets(self, wallet_addresses: List[str]):
+        # Ergebnis der Wallet-Erkennung; ein erneuter Aufruf ändert die Liste eines Laufs nicht mehr
+        def write():
+            self.conn.executemany("INSERT INTO run_wallets (position, address) VALUES (?, ?)", enumerate(wallet_addresses))
+            self.conn.commit()
+        with self._lock:
+            if self.conn.execute("SELECT 1 FROM run_wallets LIMIT 1").fetchone():
+                return
+            with_lock_retry(self.conn, write)
+
+    def wallets(self) -> List[str]:
+        with self._lock:
+            return [address for address, in self.conn.execute("SELECT address FROM run_wallets ORDER BY position")]
+
+    def completed(self, addresses: Optional[Iterable[str]] = None) -> Dict[str, List[BalancePoint]]:
+        # Kontostandspunkte der fertigen Wallets (auch Wallets ohne Transaktionen im Zeitraum); mit addresses nur
+        # diese, damit jeder Shard-Prozess nur seine Partition lädt. Gefiltert wird über eine temporäre Tabelle
+        # statt eines IN mit beliebig vielen Parametern
+        with self._lock:
+            return self._completed(addresses)
+
+    def _completed(self, addresses: Optional[Iterable[str]]) -> Dict[str, List[BalancePoint]]:
+        wallet_filter = point_filter = ""
+        if addresses is not None:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (address TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM wanted")
+            self.conn.executemany("INSERT OR IGNORE INTO wanted (address) VALUES (?)", ((address,) for address in addresses))
+            wallet_filter = " AND address IN (SELECT address FROM wanted)"
+            point_filter = " WHERE address IN (SELECT address FROM wanted)"
+        points: Dict[str, List[BalancePoint]] = {
+            address: [] for address, in self.conn.execute(f"SELECT DISTINCT address FROM run_wallets WHERE done = 1{wallet_filter}")
+        }
+        rows = self.conn.execute(
+            f"SELECT address, slot, block_time, pre_balance, post_balance FROM run_points{point_filter} ORDER BY rowid"
+        )
+        for address, slot, block_time, pre_balance, post_balance in rows:
+            if address in points:
+                points[address].append(BalancePoint(slot, block_time, pre_balance, post_balance))
+        if addresses is not None:
+            self.conn.execute("DELETE FROM wanted")
+            self.conn.commit()
+        return points
+
+    def record_wallet(self, address: str, points: Iterable[BalancePoint]):
+        if self._add_pending(address, points):
+            self.checkpoint()
+
+    async def record_wallet_async(self, address: str, points: Iterable[BalancePoint]):
+        if self._add_pending(address, points):
+            await self.checkpoint_async()
+
+    def _add_pending(self, address: str, points: Iterable[BalancePoint]) -> bool:
+        # Periodischer Checkpoint statt eines Commits pro Wallet: nach Anzahl oder Zeit; damit auch langsame Wallets
+        # (keine weitere fertig) nicht ungesichert bleiben, schreibt zusätzlich checkpoint_periodically
+        with self._lock:
+            self._pending.append((address, list(points)))
+            return (len(self._pending) >= self.checkpoint_wallets
+                    or time.monotonic() - self.last_checkpoint >= self.checkpoint_seconds)
+
+    async def checkpoint_periodically(self):
+        # Als Task neben der Analyse starten und am Ende abbrechen
+        while True:
+            await asyncio.sleep(max(0.0, self.last_checkpoint + self.checkpoint_seconds - time.monotonic()))
+            if self._pending:
+                await self.checkpoint_async()
+            else:
+                self.last_checkpoint = time.monotonic()
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def window_start_async(self, min_block_time: int) -> int:
+        return await self._run(self.window_start, min_block_time)
+
+    async def completed_async(self, addresses: Optional[Iterable[str]] = None) -> Dict[str, List[BalancePoint]]:
+        return await self._run(self.completed, addresses)
+
+    async def checkpoint_async(self):
+        await self._run(self.checkpoint)
+
+    def checkpoint(self):
+        with self._lock:
+            self._checkpoint()
+
+    def _checkpoint(self):
+        # Gesammelte Wallets erst nach dem Commit verwerfen, damit sie bei einer Sperre nicht verloren gehen
+        pending = list(self._pending)
+        addresses = [(address,) for address, _ in pending]
+
+        def write():
+            self.conn.executemany("DELETE FROM run_points WHERE address = ?", addresses)
+            self.conn.executemany(
+                "INSERT INTO run_points (address, slot, block_time, pre_balance, post_balance) VALUES (?, ?, ?, ?, ?)",
+                [(address, point.slot, point.block_time, point.pre_balance, point.post_balance)
+                 for address, points in pending for point in points]
+            )
+            self.conn.executemany("UPDATE run_wallets SET done = 1 WHERE address = ?", addresses)
+            self.conn.commit()
+        with_lock_retry(self.conn, write)
+        del self._pending[:len(pending)]
+        self.last_checkpoint = time.monotonic()
+
+    def progress(self) -> Dict[str, int]:
+        with self._lock:
+            total, done = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(done), 0) FROM run_wallets").fetchone()
+        return {"total": total, "done": done, "pending": total - done}
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._checkpoint()
+            self.conn.close()
+
+def new_run_id() -> str:
+    # Zeitstempel plus Zufallsanteil: zwei Läufe in derselben Sekunde teilen sich kein Journal
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(3)}"
+
+def journal_path(run_id: str) -> str:
+    return os.path.join(RUN_JOURNAL_DIR, f'run_{run_id}.sqlite')
+
+def open_run_journal(run_id: str, create: bool = True) -> RunJournal:
+    path = journal_path(run_id)
+    if not create and not os.path.exists(path):
+        raise FileNotFoundError(f"No journal for run {run_id} at {path}")
+    return RunJournal(path, run_id)
+
+__all__ = ['RunJournal', 'journal_path', 'new_run_id', 'open_run_journal']
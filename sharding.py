@@ -0,0 +1,188 @@
+import os
+import heapq
+import asyncio
+import zlib
+import multiprocessing
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from wallet_analysis import analyze_active_wallets, get_logger
+from solana_api import configure_rpc_manager, close_connections
+from tx_cache import close_tx_cache
+from wallet_state import close_wallet_state_store
+from run_journal import RunJournal, open_run_journal
+from results_sink import ResultsSummary, ResultsWriter
+from metrics import get_metrics, reset_metrics
+from log_setup import set_log_file_suffix
+from config import RESULTS_BATCH_ROWS
+
+class ShardResult(NamedTuple):
+    summary: ResultsSummary
+    rpc_stats: Optional[Dict[str, Any]]
+    cache_stats: Optional[Dict[str, Any]]
+    metrics: Dict[str, Any]
+
+def shard_of(address: str, shards: int) -> int:
+    # Stabiler Hash (hash() ist pro Prozess zufällig), damit eine Wallet immer im selben Shard landet
+    return zlib.crc32(address.encode()) % shards
+
+class QueueSink:
+    # Ergebnis-Sink im Shard-Prozess: reicht die Zeilen blockweise an den Elternprozess weiter, der sie sofort
+    # in die Ergebnisdateien des Laufs schreibt. Jeder Shard hat eine eigene, begrenzte Queue; ein langsamer
+    # Schreiber bremst die Shards
+    def __init__(self, queue, batch_rows: int = RESULTS_BATCH_ROWS):
+        self.queue = queue
+        self.batch_rows = batch_rows
+        self._rows: List[Tuple[Dict[str, Any], bool]] = []
+
+    def write(self, wallet_info: Dict[str, Any], is_top_trader: bool = False):
+        self._rows.append((wallet_info, bool(is_top_trader)))
+        if len(self._rows) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            self.queue.put(self._rows)
+            self._rows = []
+
+def _iter_rows(queue):
+    while True:
+        rows = queue.get()
+        if rows is None:
+            return
+        yield from rows
+
+def _drain_results(queues, sink: ResultsWriter, positions: Dict[str, int]):
+    # Läuft in einem Thread des Elternprozesses bis zur Endmarke (None) jeder Queue. Jeder Shard liefert seine
+    # Zeilen in Eingabereihenfolge; die Zeilen aller Shards werden nach der Position der Adresse in der Eingabe
+    # zusammengeführt, die Ergebnisdateien entsprechen also einem Lauf in einem Prozess. Gewartet wird dabei nur
+    # auf den Shard mit der nächsten Zeile, die übrigen halten höchstens ihre volle Queue zurück. Nach einem
+    # Schreibfehler wird weiter geleert, damit kein Shard an der vollen Queue hängen bleibt
+    error = None
+    rows = heapq.merge(*(_iter_rows(queue) for queue in queues), key=lambda row: positions[row[0]['address']])
+    for wallet_info, is_top_trader in rows:
+        if error is not None:
+            continue
+        try:
+            sink.write(wallet_info, is_top_trader)
+        except Exception as e:
+            error = e
+    if error is not None:
+        raise error
+
+def partition_wallets(wallet_addresses: List[str], shards: int) -> List[List[str]]:
+    partitions: List[List[str]] = [[] for _ in range(shards)]
+    for address in wallet_addresses:
+        partitions[shard_of(address, shards)].append(address)
+    return partitions
+
+async def _analyze_shard(wallet_addresses: List[str], rate_share: float, time_frame_days: int, run_id: Optional[str],
+                         results_queue=None) -> ShardResult:
+    # Eigener Manager mit seinem Anteil am Rate-Budget; Event Loop, HTTP-Pool und Journal-Verbindung gehören diesem Prozess
+    configure_rpc_manager(rate_share=rate_share)
+    metrics = reset_metrics()
+    journal = open_run_journal(run_id) if run_id else None
+    sink = QueueSink(results_queue) if results_queue is not None else None
+    try:
+        summary = await analyze_active_wallets(wallet_addresses, time_frame_days=time_frame_days, journal=journal, sink=sink)
+        if sink is not None:
+            sink.flush()
+    finally:
+        if journal is not None:
+            journal.close()
+        rpc_stats = await close_connections()
+        close_wallet_state_store()
+        cache_stats = close_tx_cache()
+    return ShardResult(summary, rpc_stats, cache_stats, metrics.snapshot())
+
+def _init_shard_process():
+    # Jeder Shard-Prozess schreibt und rotiert seine eigenen Log-Dateien (z.B. wallet_analysis.shard-<pid>.log)
+    set_log_file_suffix(f'shard-{os.getpid()}')
+
+def run_shard(wallet_addresses: List[str], rate_share: float, time_frame_days: int, run_id: Optional[str] = None,
+              results_queue=None) -> ShardResult:
+    # Einstiegspunkt im Worker-Prozess
+    return asyncio.run(_analyze_shard(wallet_addresses, rate_share, time_frame_days, run_id, results_queue))
+
+def merge_stats(stats: List[Optional[Dict[str, Any]]], ratio_key: str, numerator: str, denominator: str,
+                max_keys: Tuple[str, ...] = ()) -> Optional[Dict[str, Any]]:
+    # Zähler summieren (max_keys: Maximum, z.B. Größe einer gemeinsamen Datei), Quote aus den Summen neu berechnen
+    stats = [item for item in stats if item]
+    if not stats:
+        return None
+    merged: Dict[str, Any] = {}
+    for item in stats:
+        for key, value in item.items():
+            if key in max_keys:
+                merged[key] = max(merged.get(key, 0), value)
+            elif key != ratio_key and isinstance(value, (int, float)):
+                merged[key] = merged.get(key, 0) + value
+    total = sum(merged.get(key, 0) for key in denominator.split('+'))
+    merged[ratio_key] = merged.get(numerator, 0) / total if total else 0.0
+    return merged
+
+def merge_shard_results(results: List[ShardResult]) -> ResultsSummary:
+    # Zähler summieren, die besten Wallets aller Shards neu auswählen
+    summary = ResultsSummary()
+    for result in results:
+        summary.merge(result.summary)
+    return summary
+
+async def analyze_sharded(wallet_addresses: List[str], shards: int, time_frame_days: int = 30,
+                          journal: Optional[RunJournal] = None, sink: Optional[ResultsWriter] = None
+                          ) -> Tuple[ResultsSummary, Dict[str, Any]]:
+    logger = get_logger()
+    run_id = None
+    if journal is not None:
+        # Zeitfenster vor dem Start festlegen, damit alle Shards dasselbe verwenden
+        await journal.window_start_async(int((datetime.now() - timedelta(days=time_frame_days)).timestamp()))
+        await journal.checkpoint_async()
+        run_id = journal.run_id
+    partitions = [partition for partition in partition_wallets(wallet_addresses, shards) if partition]
+    logger.info(f"Analyzing {len(wallet_addresses)} wallets in {len(partitions)} shard processes")
+    # Das Budget auf die tatsächlich gestarteten Prozesse verteilen (leere Partitionen starten keinen)
+    rate_share = 1.0 / max(1, len(partitions))
+
+    # spawn statt fork: die Kindprozesse erben weder Event Loop noch offene Verbindungen des Elternprozesses
+    loop = asyncio.get_running_loop()
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager, ProcessPoolExecutor(max_workers=len(partitions) or 1, mp_context=context,
+                                                         initializer=_init_shard_process) as pool:
+        # Die Shards schicken ihre Ergebnisse während der Analyse; ein Thread schreibt sie sofort in sink
+        queues = [manager.Queue(maxsize=4) if sink is not None else None for _ in partitions]
+        drain = None
+        if sink is not None:
+            positions = {address: position for position, address in enumerate(wallet_addresses)}
+            drain = loop.run_in_executor(None, _drain_results, queues, sink, positions)
+
+        async def shard(partition, results_queue):
+            try:
+                return await loop.run_in_executor(pool, run_shard, partition, rate_share, time_frame_days, run_id, results_queue)
+            finally:
+                if results_queue is not None:
+                    # Der Shard ist fertig (oder abgebrochen), seine Zeilen stehen also vor der Endmarke in der Queue
+                    await loop.run_in_executor(None, results_queue.put, None)
+
+        try:
+            # return_exceptions: erst auf alle Shards warten, damit nach den Endmarken keiner mehr schreibt
+            results = await asyncio.gather(*(shard(partition, results_queue)
+                                             for partition, results_queue in zip(partitions, queues)), return_exceptions=True)
+        finally:
+            if drain is not None:
+                await drain
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    # Metriken der Shard-Prozesse in die Registry des Elternprozesses übernehmen
+    for result in results:
+        get_metrics().merge_snapshot(result.metrics)
+
+    summary = merge_shard_results(results)
+    stats = {
+        'rpc': merge_stats([result.rpc_stats for result in results], 'saved_ratio', 'saved', 'requests'),
+        'cache': merge_stats([result.cache_stats for result in results], 'hit_rate', 'hits', 'hits+misses', ('size_bytes',)),
+    }
+    logger.info(f"Sharded analysis complete. Found {summary.count} active wallets and {summary.top_trader_count} top traders")
+    return summary, stats
+
+__all__ = ['QueueSink', 'ShardResult', 'analyze_sharded', 'merge_shard_results', 'merge_stats', 'partition_wallets', 'run_shard', 'shard_of']
@@ -1,65 +1,456 @@
-import aiohttp
-import logging
-from logging.handlers import RotatingFileHandler
 import os
 import asyncio
-from typing import Dict, Any, Optional
+import json
+import random
+from contextlib import aclosing
+import time
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+from config import (RPC_ENDPOINTS, RPC_BATCH_SIZE, RPC_REQUESTS_PER_SECOND, RPC_MIN_REQUESTS_PER_SECOND,
+                    RPC_MAX_REQUESTS_PER_SECOND, INITIAL_DELAY, SIGNATURE_PAGE_SIZE, SIGNATURE_FIRST_PAGE_SIZE,
+                    RPC_MEMO_TTL, RPC_HEDGING, RPC_HEDGE_PERCENTILE, RPC_HEDGE_BUDGET, RPC_HEDGE_MIN_DELAY,
+                    RPC_RATE_LIMIT_COOLDOWN, RPC_MAX_BACKOFF, LOG_DIR)
+from http_client import get_http_client, close_http_clients
+from log_setup import get_queued_logger
+from metrics import get_metrics
+from rate_limiter import AdaptiveTokenBucket, EndpointHealth, HedgeBudget, LatencyWindow, parse_retry_after
+from tx_cache import TransactionCache, get_tx_cache
+from tx_records import TransactionRecord, decode_transaction_response, dumps, loads
+
+def raw_unless_error(body: bytes) -> Any:
+    # Rohbytes zurückgeben, außer die Antwort ist ein JSON-RPC-Fehler (Schlüssel "error" auf oberster Ebene).
+    # Ohne die Zeichenfolge "error" kann das nicht sein; nur dann wird geparst und der Schlüssel geprüft
+    if b'"error"' in body:
+        data = loads(body)
+        if isinstance(data, dict) and 'error' in data:
+            return data
+    return body
+
+# Ergebnisse dieser Methoden ändern sich laufend und werden nur kurz (RPC_MEMO_TTL) wiederverwendet
+VOLATILE_METHODS = frozenset({"getBalance", "getMultipleAccounts", "getAccountInfo", "getSlot"})
+
+# Lesende Methoden ohne Seiteneffekte dürfen parallel an einen zweiten Endpoint gehen
+HEDGED_METHODS = frozenset({"getTransaction", "getSignaturesForAddress", "getBalance"})
+# Mindestanzahl an Latenzmessungen, bevor ein Perzentil als Hedge-Schwelle gilt
+HEDGE_MIN_SAMPLES = 20
+
+# JSON-RPC-Fehler, die sich durch Wiederholen nicht ändern (bereinigter oder übersprungener Block/Slot,
+# nicht unterstützte Transaktionsversion, fehlende Historie, ungültige Anfrage oder Parameter)
+PERMANENT_RPC_ERROR_CODES = frozenset({-32001, -32002, -32003, -32007, -32009, -32010, -32011, -32015,
+                                       -32600, -32601, -32602})
+# Fehler auf einen ganzen Batch, die "keine Batch-Unterstützung" bedeuten (ungültige Anfrage, Methode unbekannt)
+BATCH_UNSUPPORTED_ERROR_CODES = frozenset({-32600, -32601})
+
+DEFAULT_RPC_ENDPOINTS = [
+    "https://api.mainnet-beta.solana.com",
+    "https://solana-api.projectserum.com",
+    "https://rpc.ankr.com/solana",
+    "https://mainnet.rpcpool.com",
+    "https://solana-mainnet.rpc.extrnode.com"
+]
 
 class SolanaRPCManager:
-    def __init__(self):
-        self.rpc_endpoints = [
-            "https://api.mainnet-beta.solana.com",
-            "https://solana-api.projectserum.com",
-            "https://rpc.ankr.com/solana",
-            "https://mainnet.rpcpool.com",
-            "https://solana-mainnet.rpc.extrnode.com"
-        ]
-        self.current_rpc_index = 0
-        self.retry_count = 0
+    def __init__(self, rpc_endpoints: Optional[List[str]] = None, hedging: bool = RPC_HEDGING, rate_share: float = 1.0):
+        self.rpc_endpoints = list(rpc_endpoints or RPC_ENDPOINTS or DEFAULT_RPC_ENDPOINTS)
+        # Anteil am Rate-Budget der Endpoints (z.B. 1/N bei N Shard-Prozessen)
+        self.max_rate = RPC_MAX_REQUESTS_PER_SECOND * rate_share
         self.max_retries = 3
+        self.batch_size = RPC_BATCH_SIZE
+        self.headers = {"Content-Type": "application/json"}
+        # Endpoints, die JSON-RPC Batch-Anfragen ablehnen
+        self.batch_unsupported = set()
+        # Eigener adaptiver Token-Bucket und Gesundheitswerte pro Endpoint
+        self.rate_limiters = {
+            endpoint: AdaptiveTokenBucket(RPC_REQUESTS_PER_SECOND * rate_share, RPC_MIN_REQUESTS_PER_SECOND * rate_share,
+                                          self.max_rate, cooldown=RPC_RATE_LIMIT_COOLDOWN)
+            for endpoint in self.rpc_endpoints
+        }
+        self.health = {endpoint: EndpointHealth() for endpoint in self.rpc_endpoints}
+        # Gleichzeitige identische Anfragen teilen sich ein Ergebnis; volatile Methoden kurz zwischenspeichern
+        self._inflight: Dict[Any, asyncio.Future] = {}
+        self._memo: Dict[Any, Tuple[float, Any]] = {}
+        self.memo_ttl = RPC_MEMO_TTL
+        self.stats = {"requests": 0, "coalesced": 0, "memo_hits": 0, "hedged": 0, "hedge_wins": 0}
+        # Hedging nur mit mehreren Endpoints; Latenz-Fenster pro Methode (Batches zusätzlich pro Größenklasse)
+        # bestimmen die Wartezeit bis zum Hedge
+        self.hedging = hedging and len(self.rpc_endpoints) > 1
+        self.hedge_budget = HedgeBudget(RPC_HEDGE_BUDGET)
+        self.method_latency: Dict[str, LatencyWindow] = {}
         self.setup_logger()
 
     def setup_logger(self):
-        project_dir = os.path.dirname(os.path.abspath(__file__))
-        log_path = os.path.join(project_dir, 'logs', 'api', 'solana_api.log')
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        self.logger = logging.getLogger('solana_api')
-        if not self.logger.handlers:
-            handler = RotatingFileHandler(
-                log_path,
-                maxBytes=1024 * 1024,
-                backupCount=3,
-                mode='a'
-            )
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
-            self.logger.setLevel(logging.INFO)
-
-    async def execute_rpc_call(self, payload: Dict[str, Any]) -> Optional[Dict]:
-        while self.retry_count < self.max_retries * len(self.rpc_endpoints):
-            current_endpoint = self.rpc_endpoints[self.current_rpc_index]
-            headers = {"Content-Type": "application/json"}
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(current_endpoint, json=payload, headers=headers) as response:
-                        data = await response.json()
-                        if 'error' in data and ('rate limit' in str(data['error']).lower() or
-                                                'too many requests' in str(data['error']).lower()):
-                            self.logger.warning(f"Rate limit reached for {current_endpoint}, switching RPC...")
-                            self.current_rpc_index = (self.current_rpc_index + 1) % len(self.rpc_endpoints)
-                            self.retry_count += 1
-                            await asyncio.sleep(1)
-                            continue
+        log_path = os.path.join(LOG_DIR, 'api', 'solana_api.log')
+        self.logger = get_queued_logger('solana_api', log_path)
+
+    @staticmethod
+    def is_rate_limited(data: Dict[str, Any]) -> bool:
+        return 'error' in data and ('rate limit' in str(data['error']).lower() or
+                                    'too many requests' in str(data['error']).lower())
+
+    @classmethod
+    def is_retryable_error(cls, data: Dict[str, Any]) -> bool:
+        # Rate Limits, Knoten im Rückstand (-32005), nicht verfügbare Blöcke und unbekannte Serverfehler
+        # werden wiederholt, dauerhafte Fehler sofort an den Aufrufer gegeben
+        if cls.is_rate_limited(data):
+            return True
+        error = data.get('error')
+        code = error.get('code') if isinstance(error, dict) else None
+        return code not in PERMANENT_RPC_ERROR_CODES
+
+    @staticmethod
+    def rejects_batches(data: Any) -> bool:
+        # Nur diese Antworten markieren einen Endpoint dauerhaft; vorübergehende Fehler auf den ganzen Batch
+        # (z.B. -32005 Knoten im Rückstand, -32603) werden wie eine fehlgeschlagene Anfrage wiederholt
+        if not isinstance(data, dict) or not isinstance(data.get('error'), dict):
+            return False
+        error = data['error']
+        return error.get('code') in BATCH_UNSUPPORTED_ERROR_CODES or 'batch' in str(error.get('message', '')).lower()
+
+    def supports_batch(self) -> bool:
+        return any(endpoint not in self.batch_unsupported for endpoint in self.rpc_endpoints)
+
+    def endpoint_score(self, endpoint: str) -> float:
+        # Erwartete Wartezeit auf das Budget plus Latenz (inkl. laufender Anfragen), gewichtet mit der Fehlerrate
+        health = self.health[endpoint]
+        wait = self.rate_limiters[endpoint].expected_wait()
+        return (wait + health.latency * (1 + health.in_flight / self.max_rate)) * (1 + 4 * health.error_rate)
+
+    def select_endpoint(self, exclude=()) -> Optional[str]:
+        candidates = [endpoint for endpoint in self.rpc_endpoints if endpoint not in exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=self.endpoint_score)
+
+    async def acquire_endpoint(self, exclude=()) -> Optional[str]:
+        # Nimmt den besten Endpoint mit freiem Budget; sonst warten und neu auswählen,
+        # damit Aufrufer nicht in der Warteschlange eines gedrosselten Endpoints hängen bleiben
+        while True:
+            endpoint = self.select_endpoint(exclude)
+            if endpoint is None:
+                return None
+            rate_limiter = self.rate_limiters[endpoint]
+            if rate_limiter.try_acquire():
+                return endpoint
+            await asyncio.sleep(max(rate_limiter.expected_wait(), 0.001) * (1 + random.random()))
+
+    def retry_delay(self, attempt: int) -> float:
+        # Exponentiell pro Runde über alle Endpoints, mit Jitter, damit Wiederholungen nicht gleichzeitig eintreffen
+        rounds = (attempt - 1) // len(self.rpc_endpoints)
+        delay = min(RPC_MAX_BACKOFF, INITIAL_DELAY * 2 ** rounds)
+        return random.uniform(delay / 2, delay)
+
+    @staticmethod
+    def method_label(payload: Any) -> str:
+        if isinstance(payload, dict):
+            return payload.get('method') or 'unknown'
+        methods = sorted({item.get('method') or 'unknown' for item in payload})
+        return f"batch:{'+'.join(methods)}"
+
+    @classmethod
+    def latency_key(cls, payload: Any) -> str:
+        # Batch-Latenz wächst mit der Anzahl Einträge: Fenster pro Methode und Größenklasse (nächste Zweierpotenz)
+        if isinstance(payload, dict):
+            return cls.method_label(payload)
+        return f"{cls.method_label(payload)}/{1 << max(0, len(payload) - 1).bit_length()}"
+
+    async def _post(self, endpoint: str, payload: Any, decode: Callable[[bytes], Any] = loads) -> Optional[Any]:
+        rate_limiter = self.rate_limiters[endpoint]
+        health = self.health[endpoint]
+        metrics = get_metrics()
+        method = self.method_label(payload)
+        body = dumps(payload)
+        metrics.inc('rpc_requests_total', endpoint=endpoint, method=method)
+        metrics.inc('rpc_bytes_out_total', len(body), endpoint=endpoint)
+        health.in_flight += 1
+        try:
+            start = time.monotonic()
+            client = get_http_client(endpoint)
+            async with client.post(endpoint, data=body, headers=self.headers) as response:
+                if response.status == 429:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    rate_limiter.on_rate_limited(retry_after, rtt=health.latency)
+                    health.record_failure()
+                    metrics.inc('rpc_rate_limited_total', endpoint=endpoint, method=method)
+                    self.logger.warning(f"Rate limit reached for {endpoint} (Retry-After: {retry_after}), rate now {rate_limiter.rate:.2f}/s")
+                    return None
+                raw = await response.read()
+                if response.status >= 400:
+                    # z.B. 502/503 vom Proxy: der Body ist keine gültige Antwort (mit raw_unless_error sonst ein "Block")
+                    health.record_failure()
+                    metrics.inc('rpc_errors_total', endpoint=endpoint, method=method)
+                    self.logger.error(f"HTTP {response.status} from RPC {endpoint}: {raw[:200].decode(errors='replace')}")
+                    return None
+            metrics.inc('rpc_bytes_in_total', len(raw), endpoint=endpoint)
+            data = decode(raw)
+        except Exception as e:
+            health.record_failure()
+            metrics.inc('rpc_errors_total', endpoint=endpoint, method=method)
+            self.logger.error(f"Error with RPC {endpoint}: {str(e)}")
+            return None
+        finally:
+            health.in_flight -= 1
+
+        if isinstance(data, dict) and self.is_rate_limited(data):
+            rate_limiter.on_rate_limited(rtt=health.latency)
+            health.record_failure()
+            metrics.inc('rpc_rate_limited_total', endpoint=endpoint, method=method)
+            self.logger.warning(f"Rate limit reached for {endpoint}, rate now {rate_limiter.rate:.2f}/s")
+            return None
+        latency = time.monotonic() - start
+        rate_limiter.on_success()
+        health.record_success(latency)
+        metrics.observe('rpc_request_seconds', latency, endpoint=endpoint, method=method)
+        self.method_latency.setdefault(self.latency_key(payload), LatencyWindow()).record(latency)
+        return data
+
+    def hedge_delay(self, payload: Any) -> Optional[float]:
+        items = [payload] if isinstance(payload, dict) else payload
+        if not self.hedging or not items or any(item.get('method') not in HEDGED_METHODS for item in items):
+            return None
+        window = self.method_latency.get(self.latency_key(payload))
+        if window is None or len(window) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(RPC_HEDGE_MIN_DELAY, window.percentile(RPC_HEDGE_PERCENTILE))
+
+    def _acquire_hedge_endpoint(self, exclude) -> Optional[str]:
+        # Nur ein gesunder Endpoint mit sofort freiem Budget; gewartet wird für einen Hedge nicht
+        endpoint = self.select_endpoint(exclude)
+        if endpoint is None or self.health[endpoint].error_rate >= 0.5 or not self.hedge_budget.available():
+            return None
+        if not self.rate_limiters[endpoint].try_acquire():
+            return None
+        self.hedge_budget.spend()
+        return endpoint
+
+    async def _hedged_post(self, endpoint: str, payload: Any, decode: Callable[[bytes], Any]) -> Optional[Any]:
+        # Antwortet der erste Endpoint nicht innerhalb des Perzentils, geht dieselbe Anfrage (auch ein Batch)
+        # an einen zweiten; die erste gültige Antwort gewinnt, die andere Anfrage wird abgebrochen
+        self.hedge_budget.on_request()
+        primary = asyncio.ensure_future(self._post(endpoint, payload, decode))
+        pending = {primary}
+        try:
+            delay = self.hedge_delay(payload)
+            if delay is None:
+                return await primary
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            is_batch = not isinstance(payload, dict)
+            exclude = {endpoint} | self.batch_unsupported if is_batch else {endpoint}
+            hedge_endpoint = self._acquire_hedge_endpoint(exclude=exclude)
+            if hedge_endpoint is None:
+                return await primary
+            method = self.method_label(payload)
+            self.stats["hedged"] += 1
+            get_metrics().inc('rpc_hedged_total', method=method)
+            hedge = asyncio.ensure_future(self._post(hedge_endpoint, payload, decode))
+            pending = {primary, hedge}
+            responses = {}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    data = responses[task] = task.result()
+                    # Ein Batch gilt nur als beantwortet, wenn eine Liste zurückkommt
+                    if data is not None and (not is_batch or isinstance(data, list)):
+                        if task is hedge:
+                            self.stats["hedge_wins"] += 1
+                            get_metrics().inc('rpc_hedge_wins_total', method=method)
                         return data
-            except Exception as e:
-                self.logger.error(f"Error with RPC {current_endpoint}: {str(e)}")
-                self.current_rpc_index = (self.current_rpc_index + 1) % len(self.rpc_endpoints)
-                self.retry_count += 1
-                await asyncio.sleep(1)
+            # Keine gültige Antwort: die des primären Endpoints weitergeben (z.B. für die Batch-Erkennung)
+            return responses.get(primary)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    def request_key(payload: Dict[str, Any]) -> str:
+        # Kanonische Form aus Methode und Parametern (ohne id)
+        return json.dumps([payload.get('method'), payload.get('params', [])], sort_keys=True, separators=(',', ':'))
+
+    def _memo_get(self, key: Any) -> Optional[Any]:
+        entry = self._memo.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._memo[key]
+            return None
+        return entry[1]
+
+    def _memo_put(self, key: Any, method: str, data: Any):
+        if method not in VOLATILE_METHODS or self.memo_ttl <= 0 or not isinstance(data, dict) or 'error' in data:
+            return
+        now = time.monotonic()
+        if len(self._memo) >= 10000:
+            self._memo = {k: v for k, v in self._memo.items() if v[0] >= now}
+        self._memo[key] = (now + self.memo_ttl, data)
+
+    def duplicate_stats(self) -> Dict[str, Any]:
+        requests = self.stats["requests"]
+        saved = self.stats["coalesced"] + self.stats["memo_hits"]
+        return dict(self.stats, saved=saved, saved_ratio=saved / requests if requests else 0.0)
+
+    async def execute_rpc_call(self, payload: Dict[str, Any], decode: Callable[[bytes], Any] = loads) -> Optional[Any]:
+        key = (decode, self.request_key(payload))
+        self.stats["requests"] += 1
+        data = self._memo_get(key)
+        if data is not None:
+            self.stats["memo_hits"] += 1
+            get_metrics().inc('rpc_memo_hits_total', method=payload.get('method'))
+            return dict(data, id=payload.get('id'))
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            get_metrics().inc('rpc_coalesced_total', method=payload.get('method'))
+        else:
+            task = asyncio.ensure_future(self._execute_rpc_call(payload, decode))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        data = await self._await_shared(task)
+        self._memo_put(key, payload.get('method'), data)
+        if isinstance(data, dict) and data.get('id') != payload.get('id'):
+            data = dict(data, id=payload.get('id'))
+        return data
+
+    @staticmethod
+    async def _await_shared(future: asyncio.Future) -> Optional[Any]:
+        # shield: bricht ein Aufrufer ab, läuft die gemeinsame Anfrage für die übrigen weiter.
+        # Wurde nur die Anfrage eines anderen Aufrufers abgebrochen, gilt sie hier als fehlgeschlagen
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.cancelled() and not asyncio.current_task().cancelling():
+                return None
+            raise
+
+    async def _execute_rpc_call(self, payload: Dict[str, Any], decode: Callable[[bytes], Any]) -> Optional[Any]:
+        # Versuche werden pro Aufruf gezählt, damit ein langlebiger Manager nicht irgendwann blockiert
+        max_attempts = self.max_retries * len(self.rpc_endpoints)
+        for attempt in range(1, max_attempts + 1):
+            data = await self._hedged_post(await self.acquire_endpoint(), payload, decode)
+            if data is not None and (attempt == max_attempts or not isinstance(data, dict) or 'error' not in data
+                                     or not self.is_retryable_error(data)):
+                return data
+            get_metrics().inc('rpc_retries_total', method=payload.get('method'))
+            if attempt % len(self.rpc_endpoints) == 0 and attempt < max_attempts:
+                await asyncio.sleep(self.retry_delay(attempt))
         self.logger.error("All RPC endpoints exhausted")
         return None
 
+    async def execute_rpc_call_raw(self, payload: Dict[str, Any]) -> Optional[Any]:
+        # Erfolgreiche Antworten bleiben Rohbytes (z.B. zum Dekodieren in einem Prozesspool),
+        # kleine Fehlerantworten werden geparst, damit Rate Limits weiterhin erkannt werden
+        return await self.execute_rpc_call(payload, decode=raw_unless_error)
+
+    async def execute_rpc_batch(self, payloads: List[Dict[str, Any]], batch_size: Optional[int] = None,
+                                decode: Callable[[bytes], Any] = loads) -> List[Optional[Dict]]:
+        batch_size = batch_size or self.batch_size
+        results: List[Optional[Dict]] = [None] * len(payloads)
+        # Doppelte und bereits laufende Anfragen werden nicht erneut gesendet
+        loop = asyncio.get_running_loop()
+        own: List[int] = []
+        owned: Dict[Any, asyncio.Future] = {}
+        shared: Dict[int, asyncio.Future] = {}
+        for index, payload in enumerate(payloads):
+            key = (decode, self.request_key(payload))
+            self.stats["requests"] += 1
+            memo = self._memo_get(key)
+            if memo is not None:
+                self.stats["memo_hits"] += 1
+                get_metrics().inc('rpc_memo_hits_total', method=payload.get('method'))
+                results[index] = dict(memo, id=payload.get('id'))
+                continue
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                get_metrics().inc('rpc_coalesced_total', method=payload.get('method'))
+                shared[index] = future
+                continue
+            future = loop.create_future()
+            self._inflight[key] = future
+            owned[key] = future
+            own.append(index)
+
+        try:
+            chunks = [own[start:start + batch_size] for start in range(0, len(own), batch_size)]
+            await asyncio.gather(*(self._execute_batch_chunk(payloads, indices, results, decode) for indices in chunks))
+            for index in own:
+                self._memo_put((decode, self.request_key(payloads[index])), payloads[index].get('method'), results[index])
+        except asyncio.CancelledError:
+            for future in owned.values():
+                future.cancel()
+            raise
+        finally:
+            # Auch wenn ein Chunk mit einer Ausnahme abbricht, erhalten mitwartende Aufrufer ein Ergebnis
+            # (None für nicht aufgelöste Einträge) statt eines Abbruchs
+            for index in own:
+                key = (decode, self.request_key(payloads[index]))
+                self._inflight.pop(key, None)
+                if not owned[key].done():
+                    owned[key].set_result(results[index])
+
+        for index, future in shared.items():
+            data = await self._await_shared(future)
+            results[index] = dict(data, id=payloads[index].get('id')) if isinstance(data, dict) else data
+        return results
+
+    async def _execute_batch_chunk(self, payloads: List[Dict[str, Any]], indices: List[int], results: List[Optional[Dict]],
+                                   decode: Callable[[bytes], Any] = loads):
+        # Nur die fehlgeschlagenen Einträge eines Batches werden erneut gesendet
+        pending = list(indices)
+        max_attempts = self.max_retries * len(self.rpc_endpoints)
+        for attempt in range(1, max_attempts + 1):
+            if not pending:
+                break
+            endpoint = await self.acquire_endpoint(exclude=self.batch_unsupported)
+            if endpoint is None:
+                break
+            batch = [dict(payloads[index], id=index) for index in pending]
+            data = await self._hedged_post(endpoint, batch, decode)
+            if data is not None and not isinstance(data, list) and self.rejects_batches(data):
+                self.logger.warning(f"Batch requests not supported by {endpoint}")
+                self.batch_unsupported.add(endpoint)
+                continue
+            if not isinstance(data, list):
+                if data is not None:
+                    self.health[endpoint].record_failure()
+                    self.logger.warning(f"Batch failed on {endpoint}: {str(data)[:200]}, retrying")
+                get_metrics().inc('rpc_retries_total', len(pending), method=self.method_label(batch))
+                if attempt % len(self.rpc_endpoints) == 0 and attempt < max_attempts:
+                    await asyncio.sleep(self.retry_delay(attempt))
+                continue
+
+            responses = {item.get('id'): item for item in data if isinstance(item, dict)}
+            failed = []
+            for index in pending:
+                item = responses.get(index)
+                if item is not None:
+                    results[index] = dict(item, id=payloads[index].get('id'))
+                # Dauerhafte Fehler bleiben als Fehlerantwort stehen und werden nicht erneut gesendet
+                if item is None or ('error' in item and self.is_retryable_error(item)):
+                    failed.append(index)
+            if failed:
+                get_metrics().inc('rpc_retries_total', len(failed), method=self.method_label(batch))
+                self.logger.warning(f"{len(failed)} of {len(pending)} batch items failed on {endpoint}, retrying them")
+                if any(self.is_rate_limited(responses[index]) for index in failed if index in responses):
+                    self.rate_limiters[endpoint].on_rate_limited(rtt=self.health[endpoint].latency)
+                    self.health[endpoint].record_failure()
+                # Fehlgeschlagene Einträge erst nach einer Pause erneut senden, nicht sofort im nächsten Durchlauf
+                if attempt < max_attempts:
+                    await asyncio.sleep(self.retry_delay(attempt))
+            pending = failed
+
+        if pending and not self.supports_batch():
+            # Fallback auf Einzelaufrufe, wenn kein Endpoint Batches unterstützt; ohne Coalescing, denn die
+            # laufende Anfrage unter diesem Schlüssel ist der Batch selbst
+            fallback = await asyncio.gather(*(self._execute_rpc_call(payloads[index], decode) for index in pending))
+            for index, data in zip(pending, fallback):
+                results[index] = data
+            pending = [index for index in pending if results[index] is None]
+        if pending:
+            # Nach allen Versuchen offene Einträge: letzte Fehlerantwort bzw. None geht an den Aufrufer
+            get_metrics().inc('rpc_unresolved_total', len(pending), method=self.method_label([payloads[index] for index in pending]))
+            self.logger.error(f"{len(pending)} batch items unresolved after {max_attempts} attempts "
+                              f"(e.g. {payloads[pending[0]].get('method')} {payloads[pending[0]].get('params', [])[:1]})")
+
 class SolscanAPIManager:
     def __init__(self):
         self.base_url = "https://pro-api.solscan.io"
@@ -68,41 +459,80 @@ class SolscanAPIManager:
             "Content-Type": "application/json",
             "token": self.api_key
         }
+        self.client = get_http_client(self.base_url, self.headers)
+
+    async def _get(self, path: str, params: Dict[str, Any], what: str):
+        endpoint = f"{self.base_url}{path}"
+        metrics = get_metrics()
+        metrics.inc('solscan_requests_total', path=path)
+        try:
+            start = time.monotonic()
+            async with self.client.get(endpoint, params=params) as response:
+                raw = await response.read()
+                metrics.inc('solscan_bytes_in_total', len(raw), path=path)
+                if response.status == 200:
+                    metrics.observe('solscan_request_seconds', time.monotonic() - start, path=path)
+                    return loads(raw)
+                if response.status == 429:
+                    metrics.inc('solscan_rate_limited_total', path=path)
+                else:
+                    metrics.inc('solscan_errors_total', path=path)
+                print(f"Error: Status {response.status}, {raw.decode(errors='replace')}")
+                return None
+        except Exception as e:
+            metrics.inc('solscan_errors_total', path=path)
+            print(f"Error fetching {what}: {str(e)}")
+            return None
 
     async def fetch_account_transactions(self, address: str, limit: int = 50, before: str = ""):
-        endpoint = f"{self.base_url}/v2.0/account/transactions"
         params = {"account": address, "limit": limit}
         if before:
             params["before"] = before
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(endpoint, params=params, headers=self.headers) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        print(f"Error: Status {response.status}, {await response.text()}")
-                        return None
-        except Exception as e:
-            print(f"Error fetching transactions: {str(e)}")
-            return None
+        return await self._get("/v2.0/account/transactions", params, "transactions")
+
+    def iter_account_transactions(self, address: str, page_size: int = 50,
+                                  min_block_time: Optional[int] = None) -> AsyncIterator[Dict]:
+        async def fetch_page(before):
+            response = await self.fetch_account_transactions(address, limit=page_size, before=before or "")
+            if not response or 'data' not in response:
+                return None
+            return response['data']
+
+        def next_cursor(page, before):
+            if len(page) < page_size or _below_cutoff(page[-1], min_block_time):
+                return None
+            return page[-1].get('txHash')
+
+        return _take_until_cutoff(paginate(fetch_page, next_cursor), min_block_time)
 
     async def fetch_account_tokens(self, address: str):
-        endpoint = f"{self.base_url}/v2.0/account/token-accounts"
-        params = {"account": address}
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(endpoint, params=params, headers=self.headers) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        print(f"Error: Status {response.status}, {await response.text()}")
-                        return None
-        except Exception as e:
-            print(f"Error fetching account tokens: {str(e)}")
-            return None
+        return await self._get("/v2.0/account/token-accounts", {"account": address}, "account tokens")
+
+_rpc_manager: Optional[SolanaRPCManager] = None
+
+def get_rpc_manager() -> SolanaRPCManager:
+    # Gemeinsamer Manager, statt bei jedem Aufruf einen neuen zu erzeugen
+    global _rpc_manager
+    if _rpc_manager is None:
+        _rpc_manager = SolanaRPCManager()
+    return _rpc_manager
+
+def configure_rpc_manager(**kwargs) -> SolanaRPCManager:
+    # Ersetzt den gemeinsamen Manager, z.B. mit rate_share für einen Shard-Prozess
+    global _rpc_manager
+    _rpc_manager = SolanaRPCManager(**kwargs)
+    return _rpc_manager
+
+async def close_connections() -> Optional[Dict[str, Any]]:
+    # Liefert die Duplikat-Statistik des RPC-Managers (falls einer existierte)
+    global _rpc_manager
+    stats = _rpc_manager.duplicate_stats() if _rpc_manager is not None else None
+    _rpc_manager = None
+    await close_http_clients()
+    return stats
 
 async def fetch_recent_signatures(num_signatures=10):
-    solana_rpc = SolanaRPCManager()
+    solana_rpc = get_rpc_manager()
     payload = {
         "jsonrpc": "2.0",
         "id": 1,
@@ -117,9 +547,8 @@ async def fetch_recent_signatures(num_signatures=10):
         return [tx['signature'] for tx in response['result']]
     return []
 
-async def fetch_transaction_details(signature: str):
-    solana_rpc = SolanaRPCManager()
-    payload = {
+def _transaction_payload(signature: str) -> Dict[str, Any]:
+    return {
         "jsonrpc": "2.0",
         "id": 1,
         "method": "getTransaction",
@@ -128,10 +557,144 @@ async def fetch_transaction_details(signature: str):
             {"encoding": "json", "maxSupportedTransactionVersion": 0}
         ]
     }
-    response = await solana_rpc.execute_rpc_call(payload)
-    if response and 'result' in response:
-        return response['result']
-    return None
+
+async def fetch_transaction_details(signature: str):
+    return (await fetch_transactions_details([signature]))[0]
+
+async def fetch_transactions_details(signatures: List[str]) -> List[Optional[TransactionRecord]]:
+    # Antworten werden direkt aus den Rohbytes in kompakte TransactionRecords dekodiert
+    solana_rpc = get_rpc_manager()
+    tx_cache = get_tx_cache()
+    cached = await tx_cache.get_many_async(TransactionCache.transaction_key(signature) for signature in signatures) if tx_cache else {}
+    results = [cached.get(TransactionCache.transaction_key(signature)) for signature in signatures]
+    results = [TransactionRecord.from_row(row) if row is not None else None for row in results]
+    missing = [index for index, result in enumerate(results) if result is None]
+    if not missing:
+        return results
+
+    # Fällt intern auf Einzelaufrufe zurück, wenn der Endpoint keine Batches unterstützt
+    responses = await solana_rpc.execute_rpc_batch([_transaction_payload(signatures[index]) for index in missing],
+                                                    decode=decode_transaction_response)
+    fetched = []
+    for index, response in zip(missing, responses):
+        if response and response.get('result'):
+            results[index] = response['result']
+            fetched.append((TransactionCache.transaction_key(signatures[index]), response['result'].to_row()))
+    if tx_cache:
+        await tx_cache.put_many_async(fetched)
+    return results
+
+async def fetch_signatures_for_address(address: str, limit: int = 1000, before: Optional[str] = None,
+                                       until: Optional[str] = None) -> Optional[List[Dict]]:
+    options: Dict[str, Any] = {"limit": limit}
+    if before:
+        options["before"] = before
+    if until:
+        options["until"] = until
+
+    # Nur Seiten vor einem festen Cursor sind unveränderlich; die neueste Seite wird immer abgefragt
+    tx_cache = get_tx_cache() if before else None
+    cache_key = TransactionCache.signatures_key(address, options) if tx_cache else None
+    if tx_cache:
+        cached = await tx_cache.get_async(cache_key)
+        if cached is not None:
+            return cached
+
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "getSignaturesForAddress",
+        "params": [address, options]
+    }
+    response = await get_rpc_manager().execute_rpc_call(payload)
+    if not response or 'result' not in response:
+        return None
+    signatures = response['result']
+    if tx_cache and all(tx.get('confirmationStatus', 'finalized') == 'finalized' for tx in signatures):
+        await tx_cache.put_async(cache_key, signatures)
+    return signatures
+
+async def fetch_balances(addresses: List[str], chunk_size: int = 100) -> Dict[str, int]:
+    # Kontostände in Lamports über getMultipleAccounts (max. 100 Adressen pro Aufruf), Chunks parallel
+    solana_rpc = get_rpc_manager()
+    addresses = list(dict.fromkeys(addresses))
+    chunks = [addresses[start:start + chunk_size] for start in range(0, len(addresses), chunk_size)]
+
+    async def fetch_chunk(chunk):
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getMultipleAccounts",
+            "params": [
+                chunk,
+                {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}
+            ]
+        }
+        response = await solana_rpc.execute_rpc_call(payload)
+        if not response or 'result' not in response:
+            solana_rpc.logger.warning(f"Failed to fetch balances for {len(chunk)} addresses")
+            return {}
+        # Nicht existierende Konten liefern null und haben 0 Lamports
+        return {address: (account or {}).get('lamports', 0)
+                for address, account in zip(chunk, response['result']['value'])}
+
+    balances: Dict[str, int] = {}
+    for chunk_balances in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+        balances.update(chunk_balances)
+    return balances
+
+class PageFetchError(Exception):
+    pass
+
+async def paginate(fetch_page: Callable[[Optional[str]], Awaitable[Optional[List[Dict]]]],
+                   next_cursor: Callable[[List[Dict], Optional[str]], Optional[str]]) -> AsyncIterator[Dict]:
+    # Liefert Einträge Seite für Seite; die nächste Seite wird schon geladen, während die aktuelle verarbeitet wird
+    cursor = None
+    task = asyncio.ensure_future(fetch_page(cursor))
+    try:
+        while task is not None:
+            page = await task
+            task = None
+            if page is None:
+                raise PageFetchError(f"Failed to fetch page after cursor {cursor}")
+            if not page:
+                return
+            cursor = next_cursor(page, cursor)
+            if cursor:
+                task = asyncio.ensure_future(fetch_page(cursor))
+            for item in page:
+                yield item
+    finally:
+        if task is not None:
+            task.cancel()
+
+def _below_cutoff(item: Dict, min_block_time: Optional[int]) -> bool:
+    return min_block_time is not None and bool(item.get('blockTime')) and item['blockTime'] <= min_block_time
+
+async def _take_until_cutoff(items: AsyncIterator[Dict], min_block_time: Optional[int]) -> AsyncIterator[Dict]:
+    # Ergebnisse sind absteigend nach Zeit sortiert: beim ersten Eintrag vor dem Zeitfenster abbrechen
+    async with aclosing(items):
+        async for item in items:
+            if _below_cutoff(item, min_block_time):
+                return
+            yield item
+
+def iter_signatures_for_address(address: str, min_block_time: Optional[int] = None, until: Optional[str] = None,
+                                page_size: int = SIGNATURE_PAGE_SIZE,
+                                first_page_size: int = SIGNATURE_FIRST_PAGE_SIZE) -> AsyncIterator[Dict]:
+    # Die erste Seite ist klein, damit ruhige Wallets keine volle Seite laden; danach volle Seiten
+    def page_limit(before):
+        return page_size if before else min(first_page_size, page_size)
+
+    async def fetch_page(before):
+        return await fetch_signatures_for_address(address, limit=page_limit(before), before=before, until=until)
+
+    def next_cursor(page, before):
+        if len(page) < page_limit(before) or _below_cutoff(page[-1], min_block_time):
+            return None
+        return page[-1]['signature']
+
+    return _take_until_cutoff(paginate(fetch_page, next_cursor), min_block_time)
 
 async def test_api_connection():
     test_address = "Vote111111111111111111111111111111111111111"
@@ -148,4 +711,6 @@ async def test_api_connection():
         print(f"Fehler bei API-Verbindung: {str(e)}")
         return False
 
-__all__ = ['SolanaRPCManager', 'SolscanAPIManager', 'fetch_recent_signatures', 'fetch_transaction_details', 'test_api_connection']
\ No newline at end of file
+__all__ = ['SolanaRPCManager', 'SolscanAPIManager', 'get_rpc_manager', 'configure_rpc_manager', 'close_connections', 'fetch_recent_signatures',
+           'fetch_transaction_details', 'fetch_transactions_details', 'fetch_signatures_for_address', 'fetch_balances', 'PageFetchError',
+           'paginate', 'iter_signatures_for_address', 'test_api_connection']
\ No newline at end of file
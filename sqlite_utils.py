@@ -0,0 +1,37 @@
+import os
+import time
+import random
+import sqlite3
+from typing import Any, Callable
+
+# Wartezeit auf eine Sperre, bevor SQLite "database is locked" meldet; mehrere Shard-Prozesse teilen sich
+# Transaktions-Cache, Wallet-Zustand und Journal
+SQLITE_TIMEOUT = 30
+# Weitere Versuche, falls eine Sperre trotzdem nicht rechtzeitig frei wird
+LOCK_RETRIES = 5
+
+def connect(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=SQLITE_TIMEOUT, check_same_thread=check_same_thread)
+    with_lock_retry(conn, lambda: conn.execute("PRAGMA journal_mode=WAL"))
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def is_locked(error: Exception) -> bool:
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+def with_lock_retry(conn: sqlite3.Connection, function: Callable[[], Any], retries: int = LOCK_RETRIES) -> Any:
+    # Führt eine Transaktion aus; bei einer Sperre wird zurückgerollt und nach einer kurzen Pause wiederholt.
+    # function darf seinen Zustand erst nach dem Commit ändern, damit ein Wiederholen nichts doppelt zählt
+    for attempt in range(retries + 1):
+        try:
+            return function()
+        except sqlite3.OperationalError as e:
+            if not is_locked(e) or attempt == retries:
+                raise
+            if conn.in_transaction:
+                conn.rollback()
+            time.sleep(random.uniform(0.05, 0.1) * 2 ** attempt)
+
+__all__ = ['LOCK_RETRIES', 'SQLITE_TIMEOUT', 'connect', 'is_locked', 'with_lock_retry']
@@ -0,0 +1,67 @@
+import os
+import sys
+import socket
+import tempfile
+from contextlib import asynccontextmanager
+import pytest
+
+# Konfiguration wird beim Import von config gelesen: Caches, Journale und Ergebnisse in ein temporäres
+# Verzeichnis legen und das Rate-Limit anheben, bevor ein Projektmodul importiert wird
+_TMP_DIR = tempfile.mkdtemp(prefix='wallet_analyzer_tests_')
+for key, value in {
+    'RPC_ENDPOINTS': '',
+    'TX_CACHE_ENABLED': 'false',
+    'TX_CACHE_PATH': os.path.join(_TMP_DIR, 'tx_cache.sqlite'),
+    'WALLET_STATE_PATH': os.path.join(_TMP_DIR, 'wallet_state.sqlite'),
+    'INCREMENTAL_ANALYSIS': 'false',
+    'RUN_JOURNAL_DIR': os.path.join(_TMP_DIR, 'runs'),
+    'RESULTS_DIR': os.path.join(_TMP_DIR, 'results'),
+    'METRICS_DIR': os.path.join(_TMP_DIR, 'metrics'),
+    'LOG_DIR': os.path.join(_TMP_DIR, 'logs'),
+    'RPC_REQUESTS_PER_SECOND': '1000',
+    'RPC_MAX_REQUESTS_PER_SECOND': '2000',
+    'INITIAL_DELAY': '0.01',
+}.items():
+    os.environ[key] = value
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, os.path.join(PROJECT_DIR, 'benchmarks'))
+
+import log_setup
+
+_get_queued_logger = log_setup.get_queued_logger
+
+def _test_logger(name, log_path, *args, **kwargs):
+    # Log-Dateien der Module ebenfalls ins temporäre Verzeichnis statt nach logs/ im Projekt
+    log_path = os.path.join(_TMP_DIR, 'logs', os.path.basename(os.path.dirname(os.path.abspath(log_path))),
+                            os.path.basename(log_path))
+    return _get_queued_logger(name, log_path, *args, **kwargs)
+
+log_setup.get_queued_logger = _test_logger
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def mock_rpc():
+    # Startet den Mock-RPC-Server aus benchmarks/ im Event Loop des Tests:
+    # async with mock_rpc(latency_ms=..., error_rate=...) as (url, server)
+    from aiohttp import web
+    from mock_rpc_server import MockRPCServer, SyntheticChain
+
+    @asynccontextmanager
+    async def start(txs_per_wallet: int = 5, **options):
+        server = MockRPCServer(SyntheticChain(txs_per_wallet), **options)
+        runner = web.AppRunner(server.app())
+        await runner.setup()
+        port = _free_port()
+        site = web.TCPSite(runner, '127.0.0.1', port)
+        await site.start()
+        try:
+            yield f"http://127.0.0.1:{port}/", server
+        finally:
+            await runner.cleanup()
+    return start
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from balance_timeline import BalancePoint, BalanceTimeline, balance_point
+from solana_api import configure_rpc_manager, close_connections
+from wallet_analysis import analyze_wallet
+from wallet_state import WalletStateStore
+
+def test_balance_point_uses_index_of_wallet_in_account_keys():
+    tx = {"slot": 5, "blockTime": 50,
+          "transaction": {"message": {"accountKeys": ['payer', 'wallet']}},
+          "meta": {"preBalances": [10, 20], "postBalances": [9, 25], "loadedAddresses": {"writable": [], "readonly": []}}}
+    assert balance_point(tx, 'wallet') == BalancePoint(5, 50, 20, 25)
+    assert balance_point(tx) == BalancePoint(5, 50, 10, 9)
+    assert balance_point(tx, 'other') is None
+
+def test_from_signatures_orders_by_slot_then_position_in_block():
+    # Neueste zuerst; b und c liegen im selben Slot, c steht im Block hinter b
+    signatures = [{"signature": 'c', "slot": 2}, {"signature": 'b', "slot": 2}, {"signature": 'a', "slot": 1}]
+    points = {'a': BalancePoint(1, 10, 100, 90), 'b': BalancePoint(2, 20, 90, 50), 'c': BalancePoint(2, 20, 50, 70)}
+    timeline = BalanceTimeline.from_signatures('w', signatures, points)
+    assert [point.post_balance for point in timeline.points] == [90, 50, 70]
+    assert (timeline.start_balance, timeline.end_balance, timeline.balance_change) == (100, 70, -30)
+
+def test_from_endpoints_keeps_count_start_and_end_balance():
+    signatures = [{"signature": 'c', "slot": 3, "blockTime": 30}, {"signature": 'b', "slot": 2, "blockTime": 20},
+                  {"signature": 'a', "slot": 1, "blockTime": 10}]
+    timeline = BalanceTimeline.from_endpoints('w', signatures, BalancePoint(1, 10, 100, 90), 120)
+    assert len(timeline) == 3
+    assert [point.slot for point in timeline.points] == [1, 2, 3]
+    assert (timeline.start_balance, timeline.end_balance) == (100, 120)
+    single = BalanceTimeline.from_endpoints('w', signatures[2:], BalancePoint(1, 10, 100, 90), 120)
+    assert single.points == [BalancePoint(1, 10, 100, 90)]
+
+def test_from_signatures_rejects_incomplete_history():
+    signatures = [{"signature": 'b', "slot": 2}, {"signature": 'a', "slot": 1}]
+    assert BalanceTimeline.from_signatures('w', signatures, {'b': BalancePoint(2, 20, 90, 50)}) is None
+
+def test_incremental_analysis_reuses_stored_balances(mock_rpc, tmp_path):
+    logger = logging.getLogger('test')
+    time_threshold = datetime.now() - timedelta(days=30)
+
+    async def run():
+        async with mock_rpc(txs_per_wallet=4) as (url, server):
+            fetched = []
+            transaction = server.chain.transaction
+            server.chain.transaction = lambda signature: fetched.append(signature) or transaction(signature)
+            configure_rpc_manager(rpc_endpoints=[url])
+            store = WalletStateStore(path=str(tmp_path / 'state.sqlite'))
+            try:
+                first = await analyze_wallet('wallet1', time_threshold, logger, state_store=store)
+                first_fetches = len(fetched)
+                second = await analyze_wallet('wallet1', time_threshold, logger, state_store=store)
+                return first, second, first_fetches, len(fetched), server.chain.balances('wallet1')
+            finally:
+                store.close()
+                await close_connections()
+
+    first, second, first_fetches, total_fetches, balances = asyncio.run(run())
+    assert first == second
+    assert [point.pre_balance for point in first] == balances[:-1]
+    assert first_fetches == 4
+    # Der zweite Lauf kennt alle Kontostände aus dem Wallet-Zustand und lädt keine Transaktion erneut
+    assert total_fetches == 4
+
+def test_missing_transaction_fails_the_wallet(mock_rpc):
+    logger = logging.getLogger('test')
+    time_threshold = datetime.now() - timedelta(days=30)
+
+    async def run():
+        async with mock_rpc(txs_per_wallet=4) as (url, server):
+            transaction = server.chain.transaction
+            server.chain.transaction = lambda signature: None if signature.endswith(':1') else transaction(signature)
+            configure_rpc_manager(rpc_endpoints=[url])
+            try:
+                return await analyze_wallet('wallet1', time_threshold, logger)
+            finally:
+                await close_connections()
+
+    assert asyncio.run(run()) is None
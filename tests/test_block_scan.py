@@ -0,0 +1,64 @@
+import asyncio
+import json
+import block_scan
+from block_scan import WalletActivity, decode_block, scan_blocks
+from known_accounts import VOTE_PROGRAM_ID
+from solana_api import SolanaRPCManager, close_connections, raw_unless_error
+
+def block(*transactions):
+    return json.dumps({"jsonrpc": "2.0", "id": 1, "result": {"transactions": [
+        {"transaction": {"accountKeys": [{"pubkey": key, "signer": signer} for key, signer in keys]}}
+        for keys in transactions
+    ]}}).encode()
+
+def test_decode_block_counts_signers_of_non_vote_transactions():
+    raw = block([('alice', True), ('bob', False)], [('alice', True), ('carol', True)],
+                [('validator', True), (VOTE_PROGRAM_ID, False)])
+    assert sorted(decode_block(1, raw)) == [('alice', 2), ('carol', 1)]
+
+def test_raw_unless_error_checks_the_top_level_key():
+    error = b'{"jsonrpc":"2.0","id":1,"error":{"code":-32007,"message":"Slot skipped"}}'
+    assert raw_unless_error(error)['error']['code'] == -32007
+    # "error" als Wert oder in einem verschachtelten Objekt ist kein JSON-RPC-Fehler
+    nested = b'{"jsonrpc":"2.0","id":1,"result":{"note":"error","meta":{"error":null}}}'
+    assert raw_unless_error(nested) is nested
+    late = b'{"jsonrpc":"2.0","id":1,"result":{"transactions":[' + b'{},' * 200 + b'{}]},"error":{"code":-32000}}'
+    assert raw_unless_error(late)['error']['code'] == -32000
+
+def test_scan_skips_failed_blocks(monkeypatch):
+    blocks = {1: block([('alice', True)]), 2: b'not json', 3: None, 4: block([('bob', True)])}
+
+    async def fetch_block_slots(start_slot, end_slot):
+        return list(blocks)
+
+    async def fetch_block_raw(slot):
+        if slot == 3:
+            raise RuntimeError("connection reset")
+        return blocks[slot]
+
+    monkeypatch.setattr(block_scan, 'fetch_block_slots', fetch_block_slots)
+    monkeypatch.setattr(block_scan, 'fetch_block_raw', fetch_block_raw)
+
+    async def run():
+        return [batch async for batch in scan_blocks(1, 4, fetch_workers=2, decode_processes=1)]
+
+    batches = asyncio.run(run())
+    assert sorted(activity for batch in batches for activity in batch) == [WalletActivity('alice', 1, 1),
+                                                                           WalletActivity('bob', 1, 4)]
+
+def test_http_errors_are_failures_not_raw_blocks(mock_rpc):
+    async def run():
+        async with mock_rpc(http_error_rate=1.0) as (url, server):
+            manager = SolanaRPCManager(rpc_endpoints=[url])
+            manager.retry_delay = lambda attempt: 0
+            try:
+                data = await manager.execute_rpc_call_raw({"jsonrpc": "2.0", "id": 1, "method": "getBlock", "params": [1]})
+                return data, manager.health[url].error_rate, server.stats["http_errors"]
+            finally:
+                await close_connections()
+
+    data, error_rate, http_errors = asyncio.run(run())
+    # 503 wird wiederholt und am Ende als Fehlschlag gemeldet statt als Block-Rohdaten
+    assert data is None
+    assert error_rate > 0
+    assert http_errors == 3
@@ -0,0 +1,45 @@
+import asyncio
+from mock_rpc_server import synthetic_wallet
+from solana_api import configure_rpc_manager, close_connections, fetch_balances
+
+def test_balances_are_fetched_in_chunks_of_multiple_accounts(mock_rpc):
+    wallets = [synthetic_wallet(index) for index in range(250)]
+
+    async def run():
+        async with mock_rpc() as (url, server):
+            account = server.chain.account
+            # Nicht existierende Konten liefert getMultipleAccounts als null
+            server.chain.account = lambda address: None if address == wallets[0] else account(address)
+            configure_rpc_manager(rpc_endpoints=[url])
+            try:
+                balances = await fetch_balances(wallets + wallets[:10], chunk_size=100)
+                return balances, dict(server.stats), {wallet: server.chain.balance(wallet) for wallet in wallets}
+            finally:
+                await close_connections()
+
+    balances, stats, expected = asyncio.run(run())
+    # Doppelte Adressen werden nur einmal abgefragt: 250 Adressen in drei Aufrufen
+    assert stats['requests'] == 3
+    assert balances == dict(expected, **{wallets[0]: 0})
+
+def test_failed_chunk_is_left_out(mock_rpc):
+    wallets = [synthetic_wallet(index) for index in range(4)]
+
+    async def run():
+        async with mock_rpc() as (url, server):
+            result = server.result
+
+            def failing_result(method, params):
+                # Unbekannte Methode: der Mock antwortet mit einem JSON-RPC-Fehler
+                if method == 'getMultipleAccounts' and wallets[0] in params[0]:
+                    raise KeyError(method)
+                return result(method, params)
+
+            server.result = failing_result
+            configure_rpc_manager(rpc_endpoints=[url])
+            try:
+                return await fetch_balances(wallets, chunk_size=2)
+            finally:
+                await close_connections()
+
+    assert set(asyncio.run(run())) == set(wallets[2:])
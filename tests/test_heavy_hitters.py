@@ -0,0 +1,36 @@
+import random
+from collections import Counter
+from heavy_hitters import SpaceSaving
+
+def test_counts_are_exact_below_capacity():
+    sketch = SpaceSaving(10)
+    for key, seen in [('a', 5), ('b', 3), ('a', 7), ('a', 6)]:
+        sketch.update(key, seen=seen)
+    sketch.update('b', 4)
+    assert [(hitter.key, hitter.count, hitter.error, hitter.last_seen) for hitter in sketch.top()] == \
+        [('b', 5, 0, 3), ('a', 3, 0, 7)]
+    assert sketch.max_error == 0
+
+def test_memory_and_error_stay_bounded_on_a_skewed_stream():
+    rng = random.Random(7)
+    capacity = 50
+    sketch = SpaceSaving(capacity)
+    # 10 häufige Schlüssel und ein langer Schwanz seltener Schlüssel
+    stream = [f"hot{rng.randrange(10)}" if rng.random() < 0.5 else f"cold{rng.randrange(5000)}" for _ in range(20000)]
+    for key in stream:
+        sketch.update(key)
+    truth = Counter(stream)
+
+    assert len(sketch) == capacity
+    assert len(sketch._heap) <= capacity
+    assert sketch.total == len(stream)
+    bound = sketch.max_error
+    assert bound == len(stream) // capacity
+    for hitter in sketch.top():
+        # Überschätzung höchstens total / capacity, guaranteed_count ist eine untere Schranke
+        assert hitter.guaranteed_count <= truth[hitter.key] <= hitter.count
+        assert hitter.count - truth[hitter.key] <= bound
+    # Jeder Schlüssel mit mehr als total / capacity Vorkommen wird sicher überwacht
+    monitored = {hitter.key for hitter in sketch.top()}
+    assert {key for key, count in truth.items() if count > bound} <= monitored
+    assert {hitter.key for hitter in sketch.top(10)} == {f"hot{index}" for index in range(10)}
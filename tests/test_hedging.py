@@ -0,0 +1,87 @@
+import asyncio
+import time
+from rate_limiter import LatencyWindow
+from solana_api import SolanaRPCManager, close_connections
+
+SLOW, FAST = "http://slow.invalid/", "http://fast.invalid/"
+
+def payload(signature, request_id=1):
+    return {"jsonrpc": "2.0", "id": request_id, "method": "getTransaction", "params": [signature]}
+
+class TwoEndpointManager(SolanaRPCManager):
+    # Der erste Endpoint antwortet erst nach einer Sekunde, der zweite sofort
+    def __init__(self, batch_on_fast=True):
+        super().__init__(rpc_endpoints=[SLOW, FAST], hedging=True)
+        self.batch_on_fast = batch_on_fast
+        self.posts = []
+        # Der langsame Endpoint soll zuerst gewählt werden
+        self.select_endpoint = lambda exclude=(): next(endpoint for endpoint in self.rpc_endpoints if endpoint not in exclude)
+
+    async def _post(self, endpoint, payload, decode=None):
+        self.posts.append(endpoint)
+        if endpoint == SLOW:
+            await asyncio.sleep(1.0)
+        items = [payload] if isinstance(payload, dict) else payload
+        responses = [{"jsonrpc": "2.0", "id": item['id'], "result": f"{item['params'][0]}@{endpoint}"} for item in items]
+        if isinstance(payload, dict):
+            return responses[0]
+        if endpoint == FAST and not self.batch_on_fast:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch not supported"}}
+        return responses
+
+def warm(manager, payload, latency=0.01):
+    window = manager.method_latency.setdefault(manager.latency_key(payload), LatencyWindow())
+    for _ in range(20):
+        window.record(latency)
+
+def test_latency_key_groups_batches_by_size_class():
+    key = SolanaRPCManager.latency_key
+    assert key(payload("a")) == "getTransaction"
+    assert key([payload("a")]) == "batch:getTransaction/1"
+    assert key([payload("a")] * 3) == key([payload("a")] * 4) == "batch:getTransaction/4"
+    assert key([payload("a")] * 5) == "batch:getTransaction/8"
+
+def test_batch_chunks_are_hedged_to_a_second_endpoint():
+    manager = TwoEndpointManager()
+    warm(manager, [payload("a"), payload("b")])
+
+    async def scenario():
+        start = time.monotonic()
+        try:
+            results = await manager.execute_rpc_batch([payload("a", 1), payload("b", 2)])
+            return results, time.monotonic() - start
+        finally:
+            await close_connections()
+
+    results, elapsed = asyncio.run(scenario())
+    assert [result["result"] for result in results] == [f"a@{FAST}", f"b@{FAST}"]
+    assert [result["id"] for result in results] == [1, 2]
+    assert manager.stats["hedged"] == manager.stats["hedge_wins"] == 1
+    assert elapsed < 0.5
+
+def test_hedge_without_batch_support_does_not_win():
+    manager = TwoEndpointManager(batch_on_fast=False)
+    warm(manager, [payload("a")])
+
+    async def scenario():
+        try:
+            return await manager.execute_rpc_batch([payload("a")])
+        finally:
+            await close_connections()
+
+    results = asyncio.run(scenario())
+    assert results[0]["result"] == f"a@{SLOW}"
+    assert manager.stats["hedge_wins"] == 0
+    assert manager.batch_unsupported == set()
+
+def test_no_hedge_before_enough_samples():
+    manager = TwoEndpointManager()
+
+    async def scenario():
+        try:
+            return await manager.execute_rpc_call(payload("a"))
+        finally:
+            await close_connections()
+
+    assert asyncio.run(scenario())["result"] == f"a@{SLOW}"
+    assert manager.posts == [SLOW]
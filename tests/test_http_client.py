@@ -0,0 +1,55 @@
+import asyncio
+from aiohttp import web
+from conftest import _free_port
+from http_client import close_http_clients, get_http_client
+
+def test_clients_are_shared_per_base_url():
+    async def run():
+        first = get_http_client('http://a/')
+        try:
+            return (first, get_http_client('http://a/'), get_http_client('http://b/'),
+                    get_http_client('http://a/', {"token": "x"}), get_http_client('http://a/', {"token": "x"}))
+        finally:
+            await close_http_clients()
+
+    first, again, other, with_token, with_token_again = asyncio.run(run())
+    assert first is again
+    assert first is not other
+    # Andere Header ergeben einen eigenen Client statt stillschweigend ignoriert zu werden
+    assert with_token is not first and with_token is with_token_again
+    assert with_token.headers == {"token": "x"}
+
+def test_requests_reuse_one_keepalive_connection():
+    peers = []
+
+    async def handle(request):
+        peers.append(request.transport.get_extra_info('peername'))
+        return web.json_response({"ok": True})
+
+    async def run():
+        app = web.Application()
+        app.router.add_post('/', handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        port = _free_port()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        url = f"http://127.0.0.1:{port}/"
+        try:
+            client = get_http_client(url)
+            for _ in range(3):
+                async with client.post(url, json={}) as response:
+                    assert (await response.json()) == {"ok": True}
+            session = client.session
+            await close_http_clients()
+            # Nach dem Schließen wird eine neue Session angelegt, der Registry-Eintrag ist entfernt
+            reopened = client.session
+            await client.close()
+            return session, reopened, get_http_client(url) is client
+        finally:
+            await close_http_clients()
+            await runner.cleanup()
+
+    session, reopened, shared = asyncio.run(run())
+    assert len(peers) == 3 and len(set(peers)) == 1
+    assert session.closed and reopened is not session
+    assert not shared
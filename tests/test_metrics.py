@@ -0,0 +1,55 @@
+import json
+from metrics import Histogram, MetricsRegistry
+
+def test_prometheus_text_format():
+    metrics = MetricsRegistry()
+    metrics.inc('rpc_requests_total', method='getTransaction', endpoint='http://a/')
+    metrics.inc('rpc_requests_total', 2, method='getTransaction', endpoint='http://a/')
+    metrics.inc('rpc_errors_total', reason='say "hi"\n')
+    histogram = Histogram(buckets=(0.1, 1.0))
+    metrics.histograms[('rpc_latency_seconds', (('method', 'getSlot'),))] = histogram
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert metrics.to_prometheus().splitlines() == [
+        '# TYPE rpc_errors_total counter',
+        'rpc_errors_total{reason="say \\"hi\\"\\n"} 1',
+        '# TYPE rpc_requests_total counter',
+        'rpc_requests_total{endpoint="http://a/",method="getTransaction"} 3',
+        '# TYPE rpc_latency_seconds histogram',
+        # Buckets sind kumulativ; ein Wert auf der Grenze zählt zum Bucket (le)
+        'rpc_latency_seconds_bucket{method="getSlot",le="0.1"} 2',
+        'rpc_latency_seconds_bucket{method="getSlot",le="1"} 3',
+        'rpc_latency_seconds_bucket{method="getSlot",le="+Inf"} 4',
+        'rpc_latency_seconds_sum{method="getSlot"} 3.65',
+        'rpc_latency_seconds_count{method="getSlot"} 4',
+    ]
+
+def test_quantiles_interpolate_within_buckets():
+    histogram = Histogram(buckets=(1.0, 2.0))
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 1.5, 1.5, 1.5):
+        histogram.observe(value)
+    assert histogram.quantile(0.25) == 1.0
+    assert histogram.quantile(0.5) == 1.0 + 1.0 / 3
+
+def test_merge_snapshot_adds_shard_metrics():
+    parent, shard = MetricsRegistry(), MetricsRegistry()
+    parent.inc('analysis_wallets_total', result='active')
+    shard.inc('analysis_wallets_total', 2, result='active')
+    shard.observe('stage_seconds', 0.2, stage='scoring')
+    parent.observe('stage_seconds', 0.3, stage='scoring')
+    parent.merge_snapshot(shard.snapshot())
+    assert parent.counters[('analysis_wallets_total', (('result', 'active'),))] == 3
+    histogram = parent.histograms[('stage_seconds', (('stage', 'scoring'),))]
+    assert (histogram.count, round(histogram.sum, 6)) == (2, 0.5)
+
+def test_write_creates_prometheus_and_json_files(tmp_path):
+    metrics = MetricsRegistry()
+    metrics.inc('tx_cache_lookups_total', kind='txr', result='hit')
+    prom_path, json_path = metrics.write('run1', directory=str(tmp_path))
+    with open(prom_path) as f:
+        assert f.read() == metrics.to_prometheus()
+    with open(json_path) as f:
+        summary = json.load(f)
+    assert summary['counters'] == {'tx_cache_lookups_total': [{'kind': 'txr', 'result': 'hit', 'value': 1}]}
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['metrics_run1.json', 'metrics_run1.prom']
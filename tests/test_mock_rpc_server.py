@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+import socket
+import signal
+import subprocess
+import urllib.request
+from conftest import PROJECT_DIR, _free_port
+
+def wait_for_port(port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Mock RPC server on port {port} did not start")
+
+def port_is_free(port):
+    with socket.socket() as sock:
+        # SO_REUSEADDR: Verbindungen in TIME_WAIT zählen nicht, ein noch lauschender Worker schon
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(('127.0.0.1', port))
+        except OSError:
+            return False
+        return True
+
+def test_sigterm_stops_all_server_processes():
+    port = _free_port()
+    server = subprocess.Popen([sys.executable, os.path.join(PROJECT_DIR, 'benchmarks', 'mock_rpc_server.py'),
+                               '--port', str(port), '--processes', '2'])
+    try:
+        wait_for_port(port)
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=15) == 0
+        # Die Worker-Prozesse sind mit dem Elternprozess beendet und geben den Port frei
+        deadline = time.monotonic() + 5
+        while not port_is_free(port) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert port_is_free(port)
+    finally:
+        if server.poll() is None:
+            server.kill()
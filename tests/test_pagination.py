@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+import solana_api
+from solana_api import PageFetchError, iter_signatures_for_address, paginate
+
+# 100 Signaturen, neueste zuerst: sig0 hat blockTime 1000, sig99 hat blockTime 901
+HISTORY = [{"signature": f"sig{index}", "blockTime": 1000 - index} for index in range(100)]
+
+def fake_signature_source(monkeypatch, fail_after=None):
+    calls = []
+
+    async def fetch_signatures_for_address(address, limit=1000, before=None, until=None):
+        calls.append((limit, before))
+        if fail_after is not None and len(calls) > fail_after:
+            return None
+        start = 0 if before is None else next(index for index, item in enumerate(HISTORY) if item['signature'] == before) + 1
+        return HISTORY[start:start + limit]
+
+    monkeypatch.setattr(solana_api, 'fetch_signatures_for_address', fetch_signatures_for_address)
+    return calls
+
+async def collect(items):
+    return [item async for item in items]
+
+def test_small_first_page_then_full_pages_until_the_cutoff(monkeypatch):
+    calls = fake_signature_source(monkeypatch)
+    items = asyncio.run(collect(iter_signatures_for_address('w', min_block_time=960, page_size=20, first_page_size=5)))
+    assert [item['blockTime'] for item in items] == list(range(1000, 960, -1))
+    # Die Seite mit dem ersten Eintrag vor dem Zeitfenster ist die letzte geladene
+    assert calls == [(5, None), (20, 'sig4'), (20, 'sig24')]
+
+def test_short_page_ends_the_history(monkeypatch):
+    calls = fake_signature_source(monkeypatch)
+    items = asyncio.run(collect(iter_signatures_for_address('w', page_size=40, first_page_size=40)))
+    assert len(items) == 100
+    assert [before for _, before in calls] == [None, 'sig39', 'sig79']
+
+def test_failed_page_raises(monkeypatch):
+    fake_signature_source(monkeypatch, fail_after=1)
+    with pytest.raises(PageFetchError):
+        asyncio.run(collect(iter_signatures_for_address('w', page_size=10, first_page_size=10)))
+
+def test_next_page_is_prefetched_and_cancelled_on_early_exit():
+    started = []
+    cancelled = []
+
+    async def fetch_page(cursor):
+        started.append(cursor)
+        try:
+            await asyncio.sleep(0 if cursor is None else 10)
+        except asyncio.CancelledError:
+            cancelled.append(cursor)
+            raise
+        return [{"id": 1}, {"id": 2}]
+
+    async def run():
+        pages = paginate(fetch_page, lambda page, cursor: 'next')
+        first = await pages.__anext__()
+        # Während der erste Eintrag verarbeitet wird, läuft die Anfrage für die nächste Seite bereits
+        await asyncio.sleep(0)
+        prefetched = list(started)
+        await pages.aclose()
+        return first, prefetched
+
+    first, prefetched = asyncio.run(run())
+    assert first == {"id": 1}
+    assert prefetched == [None, 'next']
+    assert cancelled == ['next']
@@ -0,0 +1,62 @@
+import time
+from rate_limiter import AdaptiveTokenBucket, EndpointHealth, TokenBucket, parse_retry_after
+from config import INITIAL_DELAY
+from solana_api import SolanaRPCManager
+
+def test_token_bucket_limits_bursts_to_capacity():
+    bucket = TokenBucket(rate=1.0, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+def test_concurrent_rate_limits_halve_the_rate_once_per_cooldown():
+    bucket = AdaptiveTokenBucket(rate=40, min_rate=0.5, max_rate=40, cooldown=10.0)
+    # Zehn gleichzeitig laufende Anfragen kommen mit 429 zurück: eine Überlast, eine Halbierung
+    decreases = [bucket.on_rate_limited() for _ in range(10)]
+    assert decreases.count(True) == 1
+    assert bucket.rate == 20
+
+def test_rate_halves_again_after_cooldown():
+    bucket = AdaptiveTokenBucket(rate=40, min_rate=0.5, max_rate=40, cooldown=10.0)
+    bucket.on_rate_limited()
+    bucket.last_decrease -= 10.0
+    assert bucket.on_rate_limited()
+    assert bucket.rate == 10
+
+def test_cooldown_is_at_least_one_round_trip():
+    bucket = AdaptiveTokenBucket(rate=40, min_rate=0.5, max_rate=40, cooldown=0.0)
+    bucket.on_rate_limited(rtt=5.0)
+    assert not bucket.on_rate_limited(rtt=5.0)
+
+def test_retry_after_blocks_even_without_decrease():
+    bucket = AdaptiveTokenBucket(rate=40, min_rate=0.5, max_rate=40, cooldown=10.0)
+    bucket.on_rate_limited()
+    bucket.on_rate_limited(retry_after=30)
+    assert not bucket.try_acquire()
+    assert bucket.expected_wait() > 29
+
+def test_success_increases_rate_up_to_max():
+    bucket = AdaptiveTokenBucket(rate=1.0, min_rate=0.5, max_rate=1.2, increase=0.1)
+    for _ in range(5):
+        bucket.on_success()
+    assert bucket.rate == 1.2
+
+def test_endpoint_health_tracks_errors():
+    health = EndpointHealth(alpha=0.5)
+    health.record_failure()
+    assert health.error_rate == 0.5
+    health.record_success(0.1)
+    assert health.error_rate == 0.25
+
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    http_date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 60))
+    assert 55 < parse_retry_after(http_date) <= 60
+
+def test_retry_delay_grows_per_round_with_jitter():
+    manager = SolanaRPCManager(rpc_endpoints=["http://a.invalid/", "http://b.invalid/"])
+    first_round = [manager.retry_delay(1) for _ in range(50)] + [manager.retry_delay(2) for _ in range(50)]
+    third_round = [manager.retry_delay(5) for _ in range(50)]
+    assert all(INITIAL_DELAY / 2 <= delay <= INITIAL_DELAY for delay in first_round)
+    assert all(2 * INITIAL_DELAY <= delay <= 4 * INITIAL_DELAY for delay in third_round)
+    assert len(set(first_round)) > 1
@@ -0,0 +1,78 @@
+import json
+import asyncio
+from metrics import reset_metrics
+from mock_rpc_server import synthetic_wallet
+from results_sink import ResultsSummary, ResultsWriter
+from solana_api import configure_rpc_manager, close_connections
+from wallet_analysis import analyze_active_wallets
+
+def wallet(address, profit):
+    return {"address": address, "profit": profit}
+
+def test_summary_keeps_only_the_most_profitable_wallets():
+    summary = ResultsSummary(top_n=2)
+    for index, profit in enumerate([0.1, 0.5, -0.2, 0.3, 0.5]):
+        summary.write(wallet(f"w{index}", profit), is_top_trader=profit > 0.2)
+    assert (summary.count, summary.top_trader_count) == (5, 3)
+    assert [item["address"] for item in summary.active_wallets()] == ["w1", "w4"]
+    assert [item["address"] for item in summary.top_traders()] == ["w1", "w4"]
+
+def test_summary_ties_do_not_depend_on_write_order():
+    # Bei gleichem Gewinn entscheidet die Adresse, damit Shards in beliebiger Reihenfolge dasselbe Ergebnis liefern
+    selections = []
+    for addresses in (["c", "a", "d", "b"], ["b", "d", "a", "c"]):
+        summary = ResultsSummary(top_n=2)
+        for address in addresses:
+            summary.write(wallet(address, 0.5))
+        selections.append([item["address"] for item in summary.active_wallets()])
+    assert selections == [["a", "b"], ["a", "b"]]
+
+def test_summary_merge_adds_counts_and_reselects():
+    first, second = ResultsSummary(top_n=2), ResultsSummary(top_n=2)
+    first.write(wallet("a", 0.1))
+    first.write(wallet("b", 0.4), is_top_trader=True)
+    second.write(wallet("c", 0.2))
+    merged = ResultsSummary(top_n=2)
+    merged.merge(first)
+    merged.merge(second)
+    assert (merged.count, merged.top_trader_count) == (3, 1)
+    assert [item["address"] for item in merged.active_wallets()] == ["b", "c"]
+
+def test_writer_streams_ndjson_rows(tmp_path):
+    with ResultsWriter('test', directory=str(tmp_path), columnar_format='none') as writer:
+        writer.write(wallet("a", 0.1))
+        writer.write(wallet("b", 0.4), is_top_trader=True)
+        writer.flush()
+        with open(writer.ndjson_path) as f:
+            rows = [json.loads(line) for line in f]
+    assert rows == [dict(wallet("a", 0.1), is_top_trader=False), dict(wallet("b", 0.4), is_top_trader=True)]
+    assert (writer.count, writer.top_traders) == (2, 1)
+
+class RecordingSink:
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.rows = []
+        self.done_at_write = []
+
+    def write(self, wallet_info, is_top_trader=False):
+        self.rows.append(wallet_info)
+        self.done_at_write.append(self.metrics.counters.get(('analysis_wallets_total', (('result', 'active'),)), 0))
+
+def test_results_are_written_per_chunk_during_analysis(mock_rpc):
+    wallets = [synthetic_wallet(index) for index in range(6)]
+    metrics = reset_metrics()
+    sink = RecordingSink(metrics)
+
+    async def run():
+        async with mock_rpc(txs_per_wallet=3) as (url, server):
+            configure_rpc_manager(rpc_endpoints=[url])
+            try:
+                return await analyze_active_wallets(wallets, max_workers=1, sink=sink, chunk_wallets=2)
+            finally:
+                await close_connections()
+
+    summary = asyncio.run(run())
+    assert sorted(row["address"] for row in sink.rows) == sorted(wallets)
+    assert summary.count == len(sink.rows) == 6
+    # Der erste Block wird geschrieben, sobald zwei Wallets fertig sind, nicht erst am Ende
+    assert sink.done_at_write[0] == 2
@@ -0,0 +1,159 @@
+import asyncio
+from solana_api import SolanaRPCManager, close_connections
+
+def payload(signature, request_id=1):
+    return {"jsonrpc": "2.0", "id": request_id, "method": "getTransaction", "params": [signature]}
+
+class ScriptedManager(SolanaRPCManager):
+    # Antworten pro Batch-Eintrag über eine Funktion (signature, attempt) -> Antwort ohne id
+    def __init__(self, answer, reverse=False):
+        super().__init__(rpc_endpoints=["http://rpc.invalid/"])
+        self.answer = answer
+        self.reverse = reverse
+        self.posts = []
+
+    async def _post(self, endpoint, batch, decode=None):
+        self.posts.append([item['params'][0] for item in batch])
+        attempt = len(self.posts)
+        responses = [dict(self.answer(item['params'][0], attempt), jsonrpc="2.0", id=item['id']) for item in batch]
+        return responses[::-1] if self.reverse else responses
+
+def run(manager, payloads):
+    async def scenario():
+        try:
+            return await manager.execute_rpc_batch(payloads)
+        finally:
+            await close_connections()
+    return asyncio.run(scenario())
+
+def test_batch_matches_responses_by_id_and_restores_caller_ids():
+    manager = ScriptedManager(lambda signature, attempt: {"result": signature}, reverse=True)
+    results = run(manager, [payload("a", 10), payload("b", 20), payload("c", 30)])
+    assert [(result["id"], result["result"]) for result in results] == [(10, "a"), (20, "b"), (30, "c")]
+
+def test_duplicate_payloads_are_sent_once():
+    manager = ScriptedManager(lambda signature, attempt: {"result": signature})
+    results = run(manager, [payload("a", 1), payload("a", 2)])
+    assert manager.posts == [["a"]]
+    assert [result["id"] for result in results] == [1, 2]
+
+def test_permanent_errors_are_not_retried():
+    def answer(signature, attempt):
+        if signature == "old":
+            return {"error": {"code": -32015, "message": "Transaction version (1) is not supported"}}
+        return {"result": signature}
+    manager = ScriptedManager(answer)
+    results = run(manager, [payload("old"), payload("new")])
+    assert manager.posts == [["old", "new"]]
+    assert results[0]["error"]["code"] == -32015
+    assert results[1]["result"] == "new"
+
+def test_retryable_errors_are_resent_until_they_succeed():
+    def answer(signature, attempt):
+        if signature == "slow" and attempt == 1:
+            return {"error": {"code": -32005, "message": "Node is behind by 42 slots"}}
+        return {"result": signature}
+    manager = ScriptedManager(answer)
+    results = run(manager, [payload("slow"), payload("fast")])
+    assert manager.posts == [["slow", "fast"], ["slow"]]
+    assert results[0]["result"] == "slow"
+
+def test_unresolved_items_return_last_error():
+    manager = ScriptedManager(lambda signature, attempt: {"error": {"code": -32005, "message": "Node is unhealthy"}})
+    results = run(manager, [payload("x")])
+    assert len(manager.posts) == manager.max_retries
+    assert results[0]["error"]["code"] == -32005
+
+def test_memo_hits_in_a_batch_carry_the_callers_id():
+    manager = ScriptedManager(lambda address, attempt: {"result": {"value": 5}})
+    balance = lambda request_id: {"jsonrpc": "2.0", "id": request_id, "method": "getBalance", "params": ["w"]}
+
+    async def scenario():
+        try:
+            await manager.execute_rpc_batch([balance(1)])
+            return await manager.execute_rpc_batch([balance(7)])
+        finally:
+            await close_connections()
+
+    results = asyncio.run(scenario())
+    assert len(manager.posts) == 1
+    assert results == [{"jsonrpc": "2.0", "id": 7, "result": {"value": 5}}]
+
+class FailingManager(ScriptedManager):
+    # Der erste Batch scheitert mit einer Ausnahme (oder hängt, bis er abgebrochen wird)
+    def __init__(self, error=None):
+        super().__init__(lambda signature, attempt: {"result": signature})
+        self.error = error
+
+    async def _post(self, endpoint, batch, decode=None):
+        if not self.posts:
+            self.posts.append(None)
+            await asyncio.sleep(0.05 if self.error else 3600)
+            raise self.error
+        return await super()._post(endpoint, batch, decode)
+
+def test_coalesced_callers_get_none_when_the_owning_batch_raises():
+    manager = FailingManager(RuntimeError("decoder crashed"))
+
+    async def scenario():
+        owner = asyncio.ensure_future(manager.execute_rpc_batch([payload("a")]))
+        await asyncio.sleep(0)
+        try:
+            return await asyncio.gather(owner, manager.execute_rpc_batch([payload("a", 2)]),
+                                        manager.execute_rpc_call(payload("a", 3)), return_exceptions=True)
+        finally:
+            await close_connections()
+
+    owner, batch, single = asyncio.run(scenario())
+    assert isinstance(owner, RuntimeError)
+    assert batch == [None]
+    assert single is None
+
+def test_coalesced_callers_survive_cancellation_of_the_owner():
+    manager = FailingManager()
+
+    async def scenario():
+        owner = asyncio.ensure_future(manager.execute_rpc_batch([payload("a")]))
+        await asyncio.sleep(0)
+        sharer = asyncio.ensure_future(manager.execute_rpc_batch([payload("a", 2)]))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        try:
+            return await sharer, owner.cancelled()
+        finally:
+            await close_connections()
+
+    assert asyncio.run(scenario()) == ([None], True)
+
+class WholeBatchErrorManager(SolanaRPCManager):
+    # Antwortet auf den ganzen Batch mit einem einzelnen Fehlerobjekt (errors: Liste der Antworten pro Versuch)
+    def __init__(self, errors):
+        super().__init__(rpc_endpoints=["http://rpc.invalid/"])
+        self.errors = list(errors)
+        self.posts = 0
+        self.single_calls = 0
+
+    async def _post(self, endpoint, batch, decode=None):
+        if isinstance(batch, dict):
+            self.single_calls += 1
+            return {"jsonrpc": "2.0", "id": batch['id'], "result": batch['params'][0]}
+        self.posts += 1
+        if self.errors:
+            return {"jsonrpc": "2.0", "id": None, "error": self.errors.pop(0)}
+        return [{"jsonrpc": "2.0", "id": item['id'], "result": item['params'][0]} for item in batch]
+
+def test_transient_whole_batch_error_is_retried_as_batch():
+    manager = WholeBatchErrorManager([{"code": -32005, "message": "Node is behind by 42 slots"}])
+    manager.retry_delay = lambda attempt: 0
+    results = run(manager, [payload("a"), payload("b")])
+    assert manager.batch_unsupported == set()
+    assert manager.posts == 2
+    assert [result["result"] for result in results] == ["a", "b"]
+
+def test_batch_rejection_marks_endpoint_unsupported():
+    manager = WholeBatchErrorManager([{"code": -32600, "message": "Invalid request"}])
+    results = run(manager, [payload("a")])
+    assert manager.batch_unsupported == {"http://rpc.invalid/"}
+    # Fallback auf Einzelaufrufe
+    assert (manager.posts, manager.single_calls) == (1, 1)
+    assert results[0]["result"] == "a"
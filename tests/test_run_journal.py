@@ -0,0 +1,90 @@
+import time
+import asyncio
+import threading
+import run_journal
+from balance_timeline import BalancePoint
+from run_journal import RunJournal, new_run_id
+
+def open_journal(tmp_path, **options):
+    options.setdefault('checkpoint_seconds', 3600)
+    return RunJournal(str(tmp_path / 'run.sqlite'), 'test', **options)
+
+def test_resume_returns_completed_wallets_only(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.save_wallets(['a', 'b', 'idle'])
+    journal.save_wallets(['other'])
+    journal.record_wallet('a', [BalancePoint(1, 10, 100, 90)])
+    journal.record_wallet('idle', [])
+    journal.close()
+    resumed = open_journal(tmp_path)
+    assert resumed.wallets() == ['a', 'b', 'idle']
+    assert resumed.completed() == {'a': [BalancePoint(1, 10, 100, 90)], 'idle': []}
+    assert resumed.progress() == {"total": 3, "done": 2, "pending": 1}
+    resumed.close()
+
+def test_completed_can_be_limited_to_a_partition(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.save_wallets(['a', 'b', 'c'])
+    journal.record_wallet('a', [BalancePoint(1, 10, 100, 90)])
+    journal.record_wallet('b', [BalancePoint(2, 20, 50, 60)])
+    journal.checkpoint()
+    assert journal.completed(['b', 'c']) == {'b': [BalancePoint(2, 20, 50, 60)]}
+    assert set(journal.completed()) == {'a', 'b'}
+    journal.close()
+
+def test_checkpoint_after_completed_wallet_count(tmp_path):
+    journal = open_journal(tmp_path, checkpoint_wallets=2)
+    reader = open_journal(tmp_path)
+    journal.save_wallets(['a', 'b'])
+    journal.record_wallet('a', [])
+    assert reader.progress()['done'] == 0
+    journal.record_wallet('b', [])
+    assert reader.progress()['done'] == 2
+    journal.close()
+    reader.close()
+
+def test_periodic_checkpoint_without_further_completed_wallets(tmp_path):
+    journal = open_journal(tmp_path, checkpoint_seconds=0.1)
+    reader = open_journal(tmp_path)
+    journal.save_wallets(['a', 'slow'])
+
+    async def run():
+        task = asyncio.ensure_future(journal.checkpoint_periodically())
+        try:
+            # Nur eine Wallet wird fertig; die zweite bleibt offen, der Checkpoint kommt trotzdem
+            journal.last_checkpoint = time.monotonic()
+            journal.record_wallet('a', [BalancePoint(1, 10, 100, 90)])
+            before = reader.progress()['done']
+            await asyncio.sleep(0.3)
+            return before, reader.progress()['done']
+        finally:
+            task.cancel()
+
+    assert asyncio.run(run()) == (0, 1)
+    journal.close()
+    reader.close()
+
+def test_async_checkpoints_run_outside_the_event_loop_thread(tmp_path, monkeypatch):
+    journal = open_journal(tmp_path, checkpoint_wallets=2)
+    journal.save_wallets(['a', 'b'])
+    threads = []
+    with_lock_retry = run_journal.with_lock_retry
+
+    def record_thread(conn, function):
+        threads.append(threading.current_thread().name)
+        return with_lock_retry(conn, function)
+    monkeypatch.setattr(run_journal, 'with_lock_retry', record_thread)
+
+    async def run():
+        assert await journal.window_start_async(123) == 123
+        await journal.record_wallet_async('a', [BalancePoint(1, 10, 100, 90)])
+        await journal.record_wallet_async('b', [])
+        return await journal.completed_async(['a'])
+
+    assert asyncio.run(run()) == {'a': [BalancePoint(1, 10, 100, 90)]}
+    assert threads and all(name.startswith('run_journal') for name in threads)
+    assert journal.progress()['done'] == 2
+    journal.close()
+
+def test_run_ids_are_unique_within_a_second():
+    assert len({new_run_id() for _ in range(100)}) == 100
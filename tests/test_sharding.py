@@ -0,0 +1,121 @@
+import queue
+import asyncio
+import os
+import zlib
+import log_setup
+import sharding
+from sharding import (QueueSink, ShardResult, _analyze_shard, _drain_results, analyze_sharded, merge_shard_results, merge_stats,
+                      partition_wallets, shard_of)
+from results_sink import ResultsSummary, ResultsWriter
+from mock_rpc_server import synthetic_wallet
+from solana_api import get_rpc_manager
+from config import RPC_MAX_REQUESTS_PER_SECOND
+
+WALLETS = [f"wallet{index}" for index in range(50)]
+
+def test_shard_of_is_stable_across_processes():
+    # crc32 statt hash(): unabhängig von PYTHONHASHSEED
+    assert shard_of("wallet1", 4) == zlib.crc32(b"wallet1") % 4
+    assert all(0 <= shard_of(wallet, 3) < 3 for wallet in WALLETS)
+
+def test_partition_keeps_every_wallet_once_in_input_order():
+    partitions = partition_wallets(WALLETS, 4)
+    assert len(partitions) == 4
+    assert sorted(wallet for partition in partitions for wallet in partition) == sorted(WALLETS)
+    for index, partition in enumerate(partitions):
+        assert all(shard_of(wallet, 4) == index for wallet in partition)
+        assert partition == [wallet for wallet in WALLETS if wallet in partition]
+
+def result(profits, top=()):
+    summary = ResultsSummary()
+    for address, profit in profits.items():
+        summary.write({"address": address, "profit": profit}, address in top)
+    return ShardResult(summary, None, None, {})
+
+def test_merge_combines_shard_summaries_by_profit():
+    results = [result({"wallet7": 0.3, "wallet2": 0.0}, ["wallet7"]), result({"wallet5": 0.1, "wallet1": 0.5}, ["wallet1"])]
+    summary = merge_shard_results(results)
+    assert (summary.count, summary.top_trader_count) == (4, 2)
+    assert [wallet["address"] for wallet in summary.active_wallets()] == ["wallet1", "wallet7", "wallet5", "wallet2"]
+    assert [wallet["address"] for wallet in summary.top_traders()] == ["wallet1", "wallet7"]
+
+class ListSink:
+    def __init__(self):
+        self.rows = []
+
+    def write(self, wallet_info, is_top_trader=False):
+        self.rows.append((wallet_info["address"], is_top_trader))
+
+def test_queue_sink_batches_rows_for_the_parent_writer():
+    rows = queue.Queue()
+    sink = QueueSink(rows, batch_rows=2)
+    for index in range(3):
+        sink.write({"address": f"wallet{index}"}, index == 1)
+    assert rows.qsize() == 1
+    sink.flush()
+    rows.put(None)
+    writer = ListSink()
+    _drain_results([rows], writer, {f"wallet{index}": index for index in range(3)})
+    assert writer.rows == [("wallet0", False), ("wallet1", True), ("wallet2", False)]
+
+def test_drain_merges_shard_rows_in_input_order():
+    positions = {wallet: index for index, wallet in enumerate(WALLETS)}
+    partitions = partition_wallets(WALLETS, 3)
+    queues = []
+    # Die Shards liefern unterschiedlich große Blöcke; die Reihenfolge der Dateien hängt davon nicht ab
+    for batch_rows, partition in zip((1, 4, 7), partitions):
+        rows = queue.Queue()
+        sink = QueueSink(rows, batch_rows=batch_rows)
+        for wallet in partition:
+            sink.write({"address": wallet})
+        sink.flush()
+        rows.put(None)
+        queues.append(rows)
+    writer = ListSink()
+    _drain_results(queues, writer, positions)
+    assert [address for address, _ in writer.rows] == WALLETS
+
+def test_merge_stats_sums_counters_and_recomputes_ratios():
+    merged = merge_stats([{"hits": 3, "misses": 1, "hit_rate": 0.75, "size_bytes": 10},
+                          None, {"hits": 1, "misses": 3, "hit_rate": 0.25, "size_bytes": 12}],
+                         'hit_rate', 'hits', 'hits+misses', ('size_bytes',))
+    assert merged == {"hits": 4, "misses": 4, "hit_rate": 0.5, "size_bytes": 12}
+
+def test_shard_uses_its_share_of_the_rate_budget(monkeypatch):
+    seen = {}
+
+    async def analyze_active_wallets(wallet_addresses, **options):
+        seen['max_rate'] = get_rpc_manager().max_rate
+        return ResultsSummary()
+
+    monkeypatch.setattr(sharding, 'analyze_active_wallets', analyze_active_wallets)
+    shard = asyncio.run(_analyze_shard(["wallet1"], 0.25, 30, None))
+    assert seen['max_rate'] == RPC_MAX_REQUESTS_PER_SECOND * 0.25
+    assert shard.summary.count == 0
+
+def test_shard_processes_write_their_own_log_files(monkeypatch):
+    monkeypatch.setattr(log_setup, '_file_suffix', None)
+    assert log_setup.log_file_path('/logs/wallet_analysis.log') == '/logs/wallet_analysis.log'
+    sharding._init_shard_process()
+    assert log_setup.log_file_path('/logs/wallet_analysis.log') == f'/logs/wallet_analysis.shard-{os.getpid()}.log'
+
+def test_sharded_run_writes_the_same_results_as_a_single_shard(mock_rpc, monkeypatch, tmp_path):
+    # Echte Shard-Prozesse (spawn) gegen den Mock-Server: Ergebnisdateien und Zusammenfassung hängen nicht von der
+    # Anzahl der Shards ab
+    wallets = [synthetic_wallet(index) for index in range(40)]
+
+    async def run(shards):
+        monkeypatch.setenv('WALLET_STATE_PATH', str(tmp_path / f'state_{shards}.sqlite'))
+        with ResultsWriter(f'shards_{shards}', directory=str(tmp_path), columnar_format='none') as writer:
+            summary, _ = await analyze_sharded(wallets, shards, sink=writer)
+        with open(writer.ndjson_path, 'rb') as results:
+            return results.read(), summary.active_wallets(), summary.top_traders()
+
+    async def compare():
+        async with mock_rpc() as (url, server):
+            monkeypatch.setenv('RPC_ENDPOINTS', url)
+            return await run(1), await run(3)
+
+    single, sharded = asyncio.run(compare())
+    assert single[0].count(b'\n') > 0
+    assert sharded == single
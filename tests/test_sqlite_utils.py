@@ -0,0 +1,49 @@
+import sqlite3
+import threading
+import pytest
+import sqlite_utils
+from sqlite_utils import connect, with_lock_retry
+
+def test_retries_locked_transactions(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_utils.time, 'sleep', lambda seconds: None)
+    conn = connect(str(tmp_path / 'db.sqlite'))
+    calls = []
+
+    def write():
+        calls.append(1)
+        if len(calls) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        return "done"
+
+    assert with_lock_retry(conn, write) == "done"
+    assert len(calls) == 3
+
+def test_other_errors_are_not_retried(tmp_path):
+    conn = connect(str(tmp_path / 'db.sqlite'))
+    calls = []
+
+    def write():
+        calls.append(1)
+        conn.execute("SELECT * FROM missing")
+
+    with pytest.raises(sqlite3.OperationalError):
+        with_lock_retry(conn, write)
+    assert len(calls) == 1
+
+def test_writer_waits_for_a_lock_held_by_another_connection(tmp_path):
+    path = str(tmp_path / 'db.sqlite')
+    holder = connect(path, check_same_thread=False)
+    holder.execute("CREATE TABLE t (x INTEGER)")
+    holder.commit()
+    holder.execute("BEGIN IMMEDIATE")
+    holder.execute("INSERT INTO t VALUES (1)")
+    threading.Timer(0.2, holder.commit).start()
+
+    writer = connect(path)
+
+    def write():
+        writer.execute("INSERT INTO t VALUES (2)")
+        writer.commit()
+
+    with_lock_retry(writer, write)
+    assert writer.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 2
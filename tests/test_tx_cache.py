@@ -0,0 +1,63 @@
+import os
+import asyncio
+from metrics import reset_metrics
+from tx_cache import TransactionCache
+
+def open_cache(tmp_path, name='cache.sqlite', max_bytes=10 * 1024 * 1024):
+    return TransactionCache(path=str(tmp_path / name), max_bytes=max_bytes)
+
+def test_roundtrip_and_stats(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put('txr:a', [1, 'a', None])
+    assert cache.get('txr:a') == [1, 'a', None]
+    assert cache.get('txr:b') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['writes']) == (1, 1, 1)
+    cache.close()
+
+def test_put_many_beyond_sqlite_parameter_limit(tmp_path):
+    cache = open_cache(tmp_path)
+    items = [(f'txr:{index}', index) for index in range(2500)]
+    cache.put_many(items)
+    # Zweites Schreiben ersetzt alle Einträge: die Größe darf nicht doppelt gezählt werden
+    cache.put_many(items)
+    stored = cache.conn.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+    assert cache.total_bytes == cache._stored_bytes() == stored
+    assert cache.get_many(key for key, _ in items) == dict(items)
+    cache.close()
+
+def test_eviction_uses_size_written_by_other_processes(tmp_path):
+    # Zufällige Hex-Strings lassen sich kaum komprimieren: jeder Eintrag belegt gut 1100 Bytes
+    first = open_cache(tmp_path, max_bytes=3000)
+    second = open_cache(tmp_path, max_bytes=3000)
+    first.put('txr:old', os.urandom(1000).hex())
+    second.put('txr:other', os.urandom(1000).hex())
+    first.put('txr:new', os.urandom(1000).hex())
+    assert first.get('txr:old') is None
+    assert first.evictions == 1
+    assert first._stored_bytes() == first.conn.execute("SELECT SUM(size) FROM entries").fetchone()[0] <= 3000
+    first.close()
+    second.close()
+
+def test_async_wrappers_count_lookup_metrics(tmp_path):
+    metrics = reset_metrics()
+    cache = open_cache(tmp_path)
+
+    async def run():
+        await cache.put_many_async([('txr:a', 1), ('sigs:b', [2])])
+        return await cache.get_many_async(['txr:a', 'sigs:b', 'txr:c'])
+
+    assert asyncio.run(run()) == {'txr:a': 1, 'sigs:b': [2]}
+    assert metrics.counters[('tx_cache_lookups_total', (('kind', 'txr'), ('result', 'hit')))] == 1
+    assert metrics.counters[('tx_cache_lookups_total', (('kind', 'txr'), ('result', 'miss')))] == 1
+    assert metrics.counters[('tx_cache_lookups_total', (('kind', 'sigs'), ('result', 'hit')))] == 1
+    cache.close()
+
+def test_legacy_transaction_entries_are_purged_on_open(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put_many([('tx:old', {"meta": {}}), ('txr:new', [1]), ('sigs:page', [])])
+    cache.close()
+    reopened = open_cache(tmp_path)
+    assert reopened.get_many(['tx:old', 'txr:new', 'sigs:page']) == {'txr:new': [1], 'sigs:page': []}
+    assert reopened._stored_bytes() == reopened.conn.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+    reopened.close()
@@ -0,0 +1,39 @@
+import json
+import tx_records
+from tx_records import TransactionRecord, decode_transaction_response, dumps, loads
+
+TRANSACTION = {
+    "slot": 7, "blockTime": 70,
+    "transaction": {"message": {"accountKeys": ["payer", {"pubkey": "wallet", "signer": False}], "instructions": []}},
+    "meta": {"preBalances": [10, 20], "postBalances": [9, 25], "logMessages": ["ignored"],
+             "loadedAddresses": {"writable": ["lookup"], "readonly": []}},
+}
+
+def test_backend_order_matches_json_backend():
+    expected = 'msgspec' if tx_records.msgspec is not None else 'orjson' if tx_records.orjson is not None else 'json'
+    assert tx_records.JSON_BACKEND == expected
+    if tx_records.msgspec is not None:
+        assert dumps({"a": [1, None]}) == tx_records.msgspec.json.encode({"a": [1, None]})
+    assert loads(dumps({"a": [1, None]})) == {"a": [1, None]}
+
+def test_decode_single_and_batch_responses():
+    body = json.dumps({"jsonrpc": "2.0", "id": 3, "result": TRANSACTION}).encode()
+    record = decode_transaction_response(body)["result"]
+    assert record == TransactionRecord(7, 70, ("payer", "wallet", "lookup"), record.pre_balances, record.post_balances)
+    assert list(record.pre_balances) == [10, 20] and list(record.post_balances) == [9, 25]
+    assert TransactionRecord.from_row(loads(dumps(record.to_row()))) == record
+
+    batch = json.dumps([{"jsonrpc": "2.0", "id": 1, "result": None},
+                        {"jsonrpc": "2.0", "id": 2, "error": {"code": -32009, "message": "missing"}}]).encode()
+    assert decode_transaction_response(batch) == [{"jsonrpc": "2.0", "id": 1, "result": None},
+                                                  {"jsonrpc": "2.0", "id": 2, "error": {"code": -32009, "message": "missing"}}]
+
+def test_batch_with_unexpected_field_types_still_yields_records():
+    # blockTime als String besteht die msgspec-Validierung nicht; der generische Pfad muss jeden Eintrag umwandeln
+    odd = dict(TRANSACTION, blockTime="70")
+    batch = json.dumps([{"jsonrpc": "2.0", "id": 1, "result": TRANSACTION},
+                        {"jsonrpc": "2.0", "id": 2, "result": odd}]).encode()
+    decoded = decode_transaction_response(batch)
+    assert all(isinstance(item["result"], TransactionRecord) for item in decoded)
+    assert decoded[1]["result"].account_keys == ("payer", "wallet", "lookup")
+    assert [item["result"].to_row()[0] for item in decoded] == [7, 7]
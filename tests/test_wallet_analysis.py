@@ -0,0 +1,110 @@
+import random
+import asyncio
+import wallet_analysis
+from balance_timeline import BalancePoint
+from metrics import reset_metrics
+from solana_api import configure_rpc_manager, close_connections
+from mock_rpc_server import synthetic_wallet
+from wallet_analysis import analyze_active_wallets
+
+def test_worker_pool_bounds_concurrency_and_survives_failures(monkeypatch):
+    metrics = reset_metrics()
+    running = {"now": 0, "max": 0}
+
+    async def analyze_wallet(wallet_address, time_threshold, logger, state_store=None, **options):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        try:
+            await asyncio.sleep(0.01)
+            if wallet_address == 'broken':
+                raise ValueError("boom")
+            if wallet_address == 'failed':
+                return None
+            if wallet_address.startswith('idle'):
+                return []
+            return [BalancePoint(1, int(time_threshold.timestamp()) + 10, 100, 150)]
+        finally:
+            running["now"] -= 1
+
+    async def fetch_balances(wallet_addresses):
+        return {}
+
+    monkeypatch.setattr(wallet_analysis, 'analyze_wallet', analyze_wallet)
+    monkeypatch.setattr(wallet_analysis, 'fetch_balances', fetch_balances)
+    wallets = [f"active{index}" for index in range(10)] + ['broken', 'failed', 'idle0']
+    summary = asyncio.run(analyze_active_wallets(wallets, max_workers=3))
+
+    assert running["max"] == 3
+    # Ein fehlerhaftes Wallet bricht den Lauf nicht ab
+    assert (summary.count, summary.top_trader_count) == (10, 10)
+    assert metrics.counters[('analysis_wallets_total', (('result', 'error'),))] == 1
+    assert metrics.counters[('analysis_wallets_total', (('result', 'failed'),))] == 1
+    assert metrics.counters[('analysis_wallets_total', (('result', 'inactive'),))] == 1
+    assert metrics.counters[('analysis_wallets_total', (('result', 'active'),))] == 10
+
+def test_results_are_written_in_input_order(monkeypatch):
+    reset_metrics()
+    running = {"now": 0, "max": 0}
+    order = random.Random(7)
+
+    async def analyze_wallet(wallet_address, time_threshold, logger, state_store=None, **options):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        try:
+            # Wallets werden in zufälliger Reihenfolge fertig
+            await asyncio.sleep(order.random() * 0.01)
+            if wallet_address.endswith('3'):
+                return None
+            return [BalancePoint(1, int(time_threshold.timestamp()) + 10, 100, 150)]
+        finally:
+            running["now"] -= 1
+
+    async def fetch_balances(wallet_addresses):
+        return {}
+
+    class ListSink:
+        def __init__(self):
+            self.addresses = []
+
+        def write(self, wallet_info, is_top_trader=False):
+            self.addresses.append(wallet_info["address"])
+
+    monkeypatch.setattr(wallet_analysis, 'analyze_wallet', analyze_wallet)
+    monkeypatch.setattr(wallet_analysis, 'fetch_balances', fetch_balances)
+    wallets = [f"wallet{index}" for index in range(40)]
+    sink = ListSink()
+    asyncio.run(analyze_active_wallets(wallets, max_workers=4, sink=sink, chunk_wallets=3, order_window=6))
+
+    assert sink.addresses == [wallet for wallet in wallets if not wallet.endswith('3')]
+    assert running["max"] == 4
+
+def test_summary_mode_fetches_one_transaction_per_wallet(mock_rpc):
+    # Startstand aus der ältesten Transaktion, Endstand aus getMultipleAccounts: dieselben Ergebnisse wie mit
+    # vollständigem Verlauf, aber nur ein getTransaction pro Wallet
+    wallets = [synthetic_wallet(index) for index in range(6)]
+
+    class RowSink:
+        def __init__(self):
+            self.rows = []
+
+        def write(self, wallet_info, is_top_trader=False):
+            self.rows.append((wallet_info, is_top_trader))
+
+    async def run(full_timeline):
+        async with mock_rpc(txs_per_wallet=6) as (url, server):
+            fetched = []
+            transaction = server.chain.transaction
+            server.chain.transaction = lambda signature: fetched.append(signature) or transaction(signature)
+            configure_rpc_manager(rpc_endpoints=[url])
+            sink = RowSink()
+            try:
+                await analyze_active_wallets(wallets, sink=sink, full_timeline=full_timeline)
+            finally:
+                await close_connections()
+            return sink.rows, len(fetched)
+
+    summary_rows, summary_fetches = asyncio.run(run(False))
+    full_rows, full_fetches = asyncio.run(run(True))
+    assert len(summary_rows) == len(wallets)
+    assert summary_rows == full_rows
+    assert (summary_fetches, full_fetches) == (len(wallets), 6 * len(wallets))
@@ -0,0 +1,55 @@
+import numpy as np
+from balance_timeline import BalancePoint
+from wallet_scoring import TransactionColumns, score_wallets
+
+def columns_for(rows):
+    columns = TransactionColumns()
+    for address, points in rows.items():
+        columns.extend(address, points)
+    return columns
+
+def test_scores_start_end_and_flows_per_wallet():
+    columns = columns_for({
+        'a': [BalancePoint(10, 100, 100, 150), BalancePoint(20, 200, 150, 120)],
+        'b': [BalancePoint(15, 150, 50, 40)],
+        'idle': [],
+    })
+    scores = score_wallets(columns, threshold=0.1)
+    assert list(scores.transaction_count) == [2, 1, 0]
+    assert list(scores.start_balance) == [100, 50, 0]
+    assert list(scores.end_balance) == [120, 40, 0]
+    assert list(scores.inflow) == [50, 0, 0]
+    assert list(scores.outflow) == [30, 10, 0]
+    assert np.allclose(scores.profit, [0.2, -0.2, 0.0])
+    assert list(scores.active_indices()) == [0, 1]
+    assert list(scores.top_trader_indices()) == [0]
+    assert scores.wallet(0).to_dict()['balance_change_30d'] == 20 / 1e9
+
+def test_time_window_and_current_balances():
+    columns = columns_for({'a': [BalancePoint(1, 10, 100, 200), BalancePoint(2, 20, 200, 300)]})
+    scores = score_wallets(columns, min_block_time=10, current_balances={'a': 999, 'unknown': 5})
+    assert scores.transaction_count[0] == 1
+    assert scores.start_balance[0] == 200
+    assert scores.current_balance[0] == 999
+    assert scores.last_activity[0] == 20
+
+def test_ties_in_a_slot_keep_insertion_order():
+    points = [BalancePoint(5, 50, 100, 80), BalancePoint(5, 50, 80, 90)]
+    scores = score_wallets(columns_for({'a': points}))
+    assert (scores.start_balance[0], scores.end_balance[0]) == (100, 90)
+
+def test_sort_fallback_for_wide_slot_ranges_matches():
+    # Slot-Spanne * Zeilen >= 2**62 erzwingt den lexsort-Pfad
+    wide = columns_for({
+        'a': [BalancePoint(2 ** 61, 20, 150, 120), BalancePoint(0, 10, 100, 150)],
+        'b': [BalancePoint(1, 15, 50, 40)],
+    })
+    scores = score_wallets(wide)
+    assert list(scores.start_balance) == [100, 50]
+    assert list(scores.end_balance) == [120, 40]
+    assert list(scores.start_slot) == [0, 1]
+
+def test_empty_columns():
+    scores = score_wallets(TransactionColumns())
+    assert len(scores) == 0
+    assert len(scores.active_indices()) == 0
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+from wallet_state import WalletStateStore
+
+def signature(name, block_time, slot):
+    return {"signature": name, "blockTime": block_time, "slot": slot}
+
+def open_store(tmp_path, **options):
+    options.setdefault('checkpoint_seconds', 3600)
+    return WalletStateStore(path=str(tmp_path / 'state.sqlite'), **options)
+
+def test_window_merges_new_signatures_and_drops_expired(tmp_path):
+    store = open_store(tmp_path)
+    store.apply_signatures('w', [signature('b', 200, 20), signature('a', 100, 10)], min_block_time=50)
+    assert store.get_watermark('w') == 'b'
+    window = store.apply_signatures('w', [signature('c', 300, 30)], min_block_time=150)
+    assert [tx['signature'] for tx in window] == ['c', 'b']
+    assert store.get_state('w')['transaction_count'] == 2
+    store.close()
+
+def test_writes_are_deferred_until_checkpoint(tmp_path):
+    store = open_store(tmp_path)
+    reader = open_store(tmp_path)
+    store.apply_signatures('w', [signature('a', 100, 10)], min_block_time=0)
+    store.set_balances('w', 2.0, 1.0, 10)
+    assert reader.get_state('w') is None
+    store.checkpoint()
+    assert reader.get_state('w') == {"newest_signature": 'a', "transaction_count": 1, "last_activity": 100,
+                                     "current_balance": 2.0, "balance_30d_ago": 1.0, "balance_slot": 10}
+    store.close()
+    reader.close()
+
+def test_checkpoint_after_changed_wallet_count(tmp_path):
+    store = open_store(tmp_path, checkpoint_wallets=3)
+    reader = open_store(tmp_path)
+    for index in range(3):
+        store.apply_signatures(f'w{index}', [signature(f's{index}', 100, 10)], min_block_time=0)
+    assert reader.get_watermark('w2') == 's2'
+    store.close()
+    reader.close()
+
+def test_close_flushes_pending_changes(tmp_path):
+    store = open_store(tmp_path)
+    store.apply_signatures('w', [signature('a', 100, 10)], min_block_time=0)
+    store.close()
+    reopened = open_store(tmp_path)
+    assert reopened.get_watermark('w') == 'a'
+    reopened.close()
+
+def test_async_methods_write_outside_the_event_loop_thread(tmp_path):
+    store = open_store(tmp_path, checkpoint_wallets=1)
+    threads = []
+    write_pending = store._write_pending
+
+    def record_thread():
+        threads.append(threading.current_thread().name)
+        write_pending()
+    store._write_pending = record_thread
+
+    async def run():
+        window = await store.apply_signatures_async('w', [signature('a', 100, 10)], min_block_time=0)
+        await store.set_balances_many_async([('w', 2.0, 1.0, 10)])
+        return window, await store.get_watermark_async('w')
+
+    window, watermark = asyncio.run(run())
+    assert [tx['signature'] for tx in window] == ['a'] and watermark == 'a'
+    assert threads and all(name.startswith('wallet_state') for name in threads)
+    store.close()
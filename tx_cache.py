@@ -0,0 +1,224 @@
+import json
+import time
+import zlib
+import asyncio
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from config import TX_CACHE_ENABLED, TX_CACHE_PATH, TX_CACHE_MAX_MB
+from metrics import get_metrics
+from sqlite_utils import connect, with_lock_retry
+from tx_records import dumps, loads
+
+# SQLite begrenzt die Anzahl gebundener Parameter pro Abfrage
+SQL_CHUNK_SIZE = 500
+
+class TransactionCache:
+    # Persistenter Cache für unveränderliche RPC-Ergebnisse (finalisierte Transaktionen, historische Signaturseiten).
+    # Die *_async-Methoden führen die Datenbankarbeit in einem eigenen Thread aus, damit der Event Loop nicht blockiert;
+    # mehrere Prozesse (Shards) dürfen dieselbe Datei verwenden
+    def __init__(self, path: str = TX_CACHE_PATH, max_bytes: int = int(TX_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger('solana_api')
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tx_cache')
+        self.conn = connect(path, check_same_thread=False)
+        with_lock_retry(self.conn, self._create_schema)
+        self.total_bytes = self._stored_bytes()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _create_schema(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+        # Gesamtgröße als Zähler in der Datenbank, damit alle Prozesse (Shards) dieselbe Größe sehen
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.execute("INSERT OR IGNORE INTO meta (key, value) SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM entries")
+        self._purge_legacy_transactions()
+        self.conn.commit()
+
+    @staticmethod
+    def transaction_key(signature: str) -> str:
+        # Transaktionen liegen als kompakte Zeilen (TransactionRecord.to_row) im Cache
+        return f"txr:{signature}"
+
+    @staticmethod
+    def signatures_key(address: str, params: Dict[str, Any]) -> str:
+        canonical = json.dumps([address, params], sort_keys=True, separators=(',', ':'))
+        return f"sigs:{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        return zlib.compress(dumps(value), 6)
+
+    @staticmethod
+    def _decode(blob: bytes) -> Any:
+        return loads(zlib.decompress(blob))
+
+    def _purge_legacy_transactions(self):
+        # Ältere Versionen speicherten vollständige getTransaction-Ergebnisse unter "tx:<signatur>"; diese werden
+        # nicht mehr gelesen und würden nur Platz belegen (Bereichsabfrage statt LIKE, damit der Primärschlüssel greift)
+        legacy = "key >= 'tx:' AND key < 'tx;'"
+        freed, count = self.conn.execute(f"SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries WHERE {legacy}").fetchone()
+        if count:
+            self.conn.execute(f"DELETE FROM entries WHERE {legacy}")
+            self._add_bytes(-freed)
+            self.logger.info(f"Removed {count} legacy transaction cache entries ({freed} bytes)")
+
+    def _stored_bytes(self) -> int:
+        return self.conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0]
+
+    def _add_bytes(self, delta: int):
+        self.conn.execute("UPDATE meta SET value = value + ? WHERE key = 'total_bytes'", (delta,))
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), SQL_CHUNK_SIZE):
+                chunk = keys[start:start + SQL_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.conn.execute(f"SELECT key, value FROM entries WHERE key IN ({placeholders})", chunk).fetchall()
+                for key, blob in rows:
+                    found[key] = self._decode(blob)
+            if found:
+                now = time.time()
+
+                def touch():
+                    self.conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?", [(now, key) for key in found])
+                    self.conn.commit()
+                with_lock_retry(self.conn, touch)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, key: str, value: Any):
+        self.put_many([(key, value)])
+
+    def put_many(self, items: List[Tuple[str, Any]]):
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, value in items:
+            blob = self._encode(value)
+            rows.append((key, blob, len(blob), now))
+
+        def write():
+            # Schreibsperre vor dem Lesen der ersetzten Größen, sonst zählen zwei Prozesse dieselbe Ersetzung
+            self.conn.execute("BEGIN IMMEDIATE")
+            replaced = 0
+            for start in range(0, len(rows), SQL_CHUNK_SIZE):
+                chunk = [row[0] for row in rows[start:start + SQL_CHUNK_SIZE]]
+                placeholders = ','.join('?' * len(chunk))
+                replaced += self.conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM entries WHERE key IN ({placeholders})",
+                                              chunk).fetchone()[0]
+            self.conn.executemany("INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)", rows)
+            self._add_bytes(sum(row[2] for row in rows) - replaced)
+            total_bytes = self._stored_bytes()
+            evicted = 0
+            if total_bytes > self.max_bytes:
+                total_bytes, evicted = self._evict(total_bytes)
+            self.conn.commit()
+            return total_bytes, evicted
+
+        with self._lock:
+            self.total_bytes, evicted = with_lock_retry(self.conn, write)
+            self.writes += len(rows)
+            self.evictions += evicted
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def get_many_async(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        found = await self._run(self.get_many, keys)
+        metrics = get_metrics()
+        for key in keys:
+            # Trefferquote getrennt nach Art des Eintrags (txr = Transaktionen, sigs = Signaturseiten)
+            metrics.inc('tx_cache_lookups_total', kind=key.split(':', 1)[0], result='hit' if key in found else 'miss')
+        return found
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        return (await self.get_many_async([key])).get(key)
+
+    async def put_many_async(self, items: List[Tuple[str, Any]]):
+        if items:
+            await self._run(self.put_many, items)
+
+    async def put_async(self, key: str, value: Any):
+        await self.put_many_async([(key, value)])
+
+    def _evict(self, total_bytes: int) -> Tuple[int, int]:
+        # LRU: älteste Einträge löschen, bis 90% des Limits erreicht sind; Rückgabe: neue Größe, gelöschte Einträge
+        target = int(self.max_bytes * 0.9)
+        evictions = 0
+        while total_bytes > target:
+            rows = self.conn.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT 256").fetchall()
+            if not rows:
+                self._add_bytes(-total_bytes)
+                total_bytes = 0
+                break
+            evicted = []
+            freed = 0
+            for key, size in rows:
+                evicted.append((key,))
+                freed += size
+                if total_bytes - freed <= target:
+                    break
+            self.conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+            self._add_bytes(-freed)
+            total_bytes -= freed
+            evictions += len(evicted)
+        return total_bytes, evictions
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "size_bytes": self.total_bytes
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+_tx_cache: Optional[TransactionCache] = None
+
+def get_tx_cache() -> Optional[TransactionCache]:
+    global _tx_cache
+    if _tx_cache is None and TX_CACHE_ENABLED:
+        _tx_cache = TransactionCache()
+    return _tx_cache
+
+def close_tx_cache() -> Optional[Dict[str, Any]]:
+    global _tx_cache
+    if _tx_cache is None:
+        return None
+    stats = _tx_cache.stats()
+    _tx_cache.close()
+    _tx_cache = None
+    return stats
+
+__all__ = ['TransactionCache', 'get_tx_cache', 'close_tx_cache']
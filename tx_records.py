@@ -0,0 +1,138 @@
+import json
+from array import array
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+# Schnellstes verfügbares JSON-Backend: msgspec (schemagesteuert), orjson, sonst die Standardbibliothek
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = 'msgspec' if msgspec is not None else 'orjson' if orjson is not None else 'json'
+
+def loads(data: Union[bytes, str]) -> Any:
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(value: Any) -> bytes:
+    if msgspec is not None:
+        return msgspec.json.encode(value)
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':')).encode()
+
+class TransactionRecord(NamedTuple):
+    # Kompakte Form eines getTransaction-Ergebnisses mit nur den Feldern, die Erkennung und Analyse lesen;
+    # account_keys enthält auch die per Address Lookup Table geladenen Adressen
+    slot: int
+    block_time: Optional[int]
+    account_keys: Tuple[str, ...]
+    pre_balances: array
+    post_balances: array
+
+    def to_row(self) -> List:
+        return [self.slot, self.block_time, list(self.account_keys), self.pre_balances.tolist(), self.post_balances.tolist()]
+
+    @classmethod
+    def from_row(cls, row: List) -> 'TransactionRecord':
+        slot, block_time, keys, pre_balances, post_balances = row
+        return cls(slot, block_time, tuple(keys), array('q', pre_balances), array('q', post_balances))
+
+def record_from_result(result: Optional[Dict[str, Any]]) -> Optional[TransactionRecord]:
+    # Umwandlung eines bereits geparsten getTransaction-Ergebnisses (json- oder jsonParsed-Encoding)
+    if not result:
+        return None
+    meta = result.get('meta') or {}
+    transaction = result.get('transaction')
+    message = transaction.get('message') or {} if isinstance(transaction, dict) else {}
+    keys = [key['pubkey'] if isinstance(key, dict) else key for key in message.get('accountKeys') or []]
+    loaded = meta.get('loadedAddresses') or {}
+    keys.extend(loaded.get('writable') or [])
+    keys.extend(loaded.get('readonly') or [])
+    return TransactionRecord(result.get('slot', 0), result.get('blockTime'), tuple(keys),
+                             array('q', meta.get('preBalances') or []), array('q', meta.get('postBalances') or []))
+
+def _response_item(item: Any) -> Any:
+    if isinstance(item, dict) and isinstance(item.get('result'), dict):
+        item['result'] = record_from_result(item['result'])
+    return item
+
+if msgspec is not None:
+    # Schema der benötigten Felder: alles andere (Instruktionen, Logs, Token-Balances, ...) wird beim Parsen übersprungen
+    class _AccountKey(msgspec.Struct):
+        pubkey: str
+
+    class _LoadedAddresses(msgspec.Struct):
+        writable: List[str] = []
+        readonly: List[str] = []
+
+    class _Meta(msgspec.Struct):
+        preBalances: List[int] = []
+        postBalances: List[int] = []
+        loadedAddresses: Optional[_LoadedAddresses] = None
+
+    class _Message(msgspec.Struct):
+        accountKeys: List[Union[str, _AccountKey]] = []
+
+    class _Transaction(msgspec.Struct):
+        message: Optional[_Message] = None
+
+    class _Result(msgspec.Struct):
+        slot: int = 0
+        blockTime: Optional[int] = None
+        meta: Optional[_Meta] = None
+        transaction: Optional[_Transaction] = None
+
+    class _Response(msgspec.Struct):
+        id: Any = None
+        result: Optional[_Result] = None
+        error: Any = None
+
+    _response_decoder = msgspec.json.Decoder(Union[List[_Response], _Response])
+
+    def _record_from_struct(result: _Result) -> TransactionRecord:
+        message = result.transaction.message if result.transaction is not None else None
+        keys = [key if isinstance(key, str) else key.pubkey for key in message.accountKeys] if message is not None else []
+        meta = result.meta or _Meta()
+        if meta.loadedAddresses is not None:
+            keys.extend(meta.loadedAddresses.writable)
+            keys.extend(meta.loadedAddresses.readonly)
+        return TransactionRecord(result.slot, result.blockTime, tuple(keys),
+                                 array('q', meta.preBalances), array('q', meta.postBalances))
+
+    def _struct_item(response: _Response) -> Dict[str, Any]:
+        item: Dict[str, Any] = {"jsonrpc": "2.0", "id": response.id}
+        if response.error is not None:
+            item["error"] = response.error
+        else:
+            item["result"] = _record_from_struct(response.result) if response.result is not None else None
+        return item
+
+def _decode_generic(body: bytes) -> Any:
+    data = loads(body)
+    if isinstance(data, list):
+        return [_response_item(item) for item in data]
+    return _response_item(data)
+
+def decode_transaction_response(body: bytes) -> Any:
+    # Rohantwort (einzeln oder Batch) von getTransaction -> JSON-RPC-Dicts mit TransactionRecord als result
+    if msgspec is not None:
+        try:
+            data = _response_decoder.decode(body)
+        except msgspec.ValidationError:
+            # Unerwartete Struktur (z.B. Fehlerantwort des Proxys oder abweichende Feldtypen): generisch parsen,
+            # auch jeden Eintrag eines Batches
+            return _decode_generic(body)
+        if isinstance(data, list):
+            return [_struct_item(response) for response in data]
+        return _struct_item(data)
+    return _decode_generic(body)
+
+__all__ = ['JSON_BACKEND', 'TransactionRecord', 'decode_transaction_response', 'dumps', 'loads', 'record_from_result']
@@ -1,46 +1,47 @@
-import requests
+import aiohttp
+import asyncio
 import json
-import time
 import logging
 import random
 from datetime import datetime, timedelta
+from http_client import get_http_client
+from log_setup import get_queued_logger
+from wallet_scoring import TransactionColumns, score_wallets
 
-logging.basicConfig(filename='solana_wallet_analysis.log', level=logging.DEBUG,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+# Root-Logger wie bisher in solana_wallet_analysis.log, aber über die Log-Queue (ohne Rotation)
+get_queued_logger(None, 'solana_wallet_analysis.log', level=logging.DEBUG,
+                  fmt='%(asctime)s - %(levelname)s - %(message)s', max_bytes=0, backup_count=0)
 
-def fetch_with_retry(url, headers, payload, max_retries=5, initial_delay=1):
+async def fetch_with_retry(url, headers, payload, max_retries=5, initial_delay=1):
+    client = get_http_client(url)
     for attempt in range(max_retries):
         try:
-            response = requests.post(url, headers=headers, json=payload)
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 429:
-                delay = initial_delay * (2 ** attempt) + random.uniform(0, 1)
-                logging.warning(f"Rate limit hit. Retrying in {delay:.2f} seconds.")
-                time.sleep(delay)
-            else:
-                logging.error(f"Request failed with status code: {response.status_code}")
-                return None
-        except requests.exceptions.RequestException as e:
+            async with client.post(url, headers=headers, json=payload) as response:
+                if response.status == 200:
+                    return await response.json()
+                elif response.status == 429:
+                    delay = initial_delay * (2 ** attempt) + random.uniform(0, 1)
+                    logging.warning(f"Rate limit hit. Retrying in {delay:.2f} seconds.")
+                    await asyncio.sleep(delay)
+                else:
+                    logging.error(f"Request failed with status code: {response.status}")
+                    return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logging.error(f"Request error: {e}")
     logging.error("Max retries reached. Giving up.")
     return None
 
-def calculate_profit(transactions):
+def calculate_profit(transactions, wallet_address=None):
+    # Ohne wallet_address wird wie bisher Konto-Index 0 (Fee Payer) ausgewertet
     logging.info(f"Calculating profit for {len(transactions)} transactions")
     end_date = datetime.now()
     start_date = end_date - timedelta(days=30)
-    recent_transactions = [tx for tx in transactions if 'blockTime' in tx and start_date <= datetime.fromtimestamp(tx['blockTime']) <= end_date]
+    columns = TransactionColumns()
+    columns.extend_from_transactions(wallet_address, transactions)
+    scores = score_wallets(columns, int(start_date.timestamp()) - 1, int(end_date.timestamp()))
     
-    total_in = 0
-    total_out = 0
-    for tx in recent_transactions:
-        if 'postBalances' in tx and 'preBalances' in tx:
-            balance_change = tx['postBalances'][0] - tx['preBalances'][0]
-            if balance_change > 0:
-                total_in += balance_change
-            else:
-                total_out += abs(balance_change)
+    total_in = int(scores.inflow[0])
+    total_out = int(scores.outflow[0])
     
     profit = (total_in - total_out) / max(total_out, 1)
     logging.info(f"Calculated profit: {profit:.2%}")
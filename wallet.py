@@ -1,11 +1,59 @@
 # wallet.py
-from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-@dataclass
 class Wallet:
-    address: str
-    transaction_count: int
-    last_activity: Optional[datetime]
-    profit: float
\ No newline at end of file
+    # Kompakte Sicht auf eine Zeile der spaltenbasierten WalletScores (siehe wallet_scoring.py)
+    __slots__ = ('_scores', '_index')
+
+    def __init__(self, scores, index: int):
+        self._scores = scores
+        self._index = index
+
+    @property
+    def address(self) -> str:
+        return self._scores.addresses[self._index]
+
+    @property
+    def transaction_count(self) -> int:
+        return int(self._scores.transaction_count[self._index])
+
+    @property
+    def last_activity(self) -> Optional[datetime]:
+        block_time = int(self._scores.last_activity[self._index])
+        return datetime.fromtimestamp(block_time) if block_time else None
+
+    @property
+    def profit(self) -> float:
+        return float(self._scores.profit[self._index])
+
+    @property
+    def current_balance(self) -> float:
+        return int(self._scores.current_balance[self._index]) / 1e9
+
+    @property
+    def balance_30d_ago(self) -> float:
+        return int(self._scores.start_balance[self._index]) / 1e9
+
+    @property
+    def balance_change_30d(self) -> float:
+        return int(self._scores.end_balance[self._index] - self._scores.start_balance[self._index]) / 1e9
+
+    @property
+    def is_top_trader(self) -> bool:
+        return bool(self._scores.is_top_trader[self._index])
+
+    def to_dict(self) -> dict:
+        last_activity = self.last_activity
+        return {
+            "address": self.address,
+            "transaction_count": self.transaction_count,
+            "last_activity": last_activity.strftime("%Y-%m-%d %H:%M:%S") if last_activity else None,
+            "profit": self.profit,
+            "current_balance": self.current_balance,
+            "balance_30d_ago": self.balance_30d_ago,
+            "balance_change_30d": self.balance_change_30d
+        }
+
+    def __repr__(self) -> str:
+        return f"Wallet(address={self.address!r}, transaction_count={self.transaction_count}, profit={self.profit:.4f})"
@@ -1,114 +1,218 @@
 import os
-import logging
-from logging.handlers import RotatingFileHandler
 from datetime import datetime, timedelta
 import asyncio
-from solana_api import SolanaRPCManager
+from log_setup import get_queued_logger
+from metrics import get_metrics
+from solana_api import iter_signatures_for_address, fetch_balances, fetch_transactions_details, PageFetchError
+from balance_timeline import BalancePoint, BalanceTimeline, balance_point, chronological
+from wallet_scoring import TransactionColumns, score_wallets
+from results_sink import ResultsSummary
+from config import (ANALYSIS_WORKERS, INCREMENTAL_ANALYSIS, SCORING_CHUNK_WALLETS, RESULTS_ORDER_WINDOW, TOP_TRADER_THRESHOLD,
+                    FULL_BALANCE_TIMELINE, LOG_DIR)
+from wallet_state import get_wallet_state_store
 
 def get_logger():
-    project_dir = os.path.dirname(os.path.abspath(__file__))
-    log_path = os.path.join(project_dir, 'logs', 'analysis', 'wallet_analysis.log')
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-    logger = logging.getLogger('wallet_analysis')
-    if not logger.handlers:
-        handler = RotatingFileHandler(
-            log_path,
-            maxBytes=1024 * 1024,
-            backupCount=3,
-            mode='a'
-        )
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
-    return logger
-
-async def analyze_active_wallets(wallet_addresses, time_frame_days=30):
+    log_path = os.path.join(LOG_DIR, 'analysis', 'wallet_analysis.log')
+    return get_queued_logger('wallet_analysis', log_path)
+
+async def collect_signatures(wallet_address, min_block_time, until=None):
+    # Seitenweise bis zum Beginn des Analysezeitraums; None, wenn eine Seite nicht geladen werden konnte
+    signatures = []
+    try:
+        async for tx in iter_signatures_for_address(wallet_address, min_block_time=min_block_time, until=until):
+            signatures.append(tx)
+    except PageFetchError:
+        return None
+    return signatures
+
+async def analyze_wallet(wallet_address, time_threshold, logger, state_store=None, current_balance=None,
+                         full_timeline=FULL_BALANCE_TIMELINE):
+    # Lädt die Signaturen einer Wallet im Zeitfenster und rekonstruiert ihren Kontostandsverlauf; die Bewertung
+    # erfolgt anschließend vektorisiert für einen Block von Wallets. Mit current_balance (vorab geladen) genügt
+    # die älteste Transaktion im Zeitraum, sonst oder mit full_timeline wird jede Transaktion geladen.
+    # Rückgabe: die Kontostandspunkte (leer ohne Transaktionen im Zeitraum) oder None bei einem Fehler
+    logger.debug(f"Analyzing wallet: {wallet_address}")
+    min_block_time = int(time_threshold.timestamp())
+    until = await state_store.get_watermark_async(wallet_address) if state_store is not None else None
+    
+    # Stufen-Zeiten pro Wallet (signature_fetch, transaction_fetch) als Histogramme
+    metrics = get_metrics()
+    with metrics.stage('signature_fetch'):
+        signatures = await collect_signatures(wallet_address, min_block_time, until)
+    if signatures is None:
+        logger.warning(f"Failed to retrieve transaction data for {wallet_address}")
+        return None
+
+    logger.debug(f"Received transaction data for {wallet_address}")
+    if state_store is not None:
+        # Inkrementell: nur neue Signaturen übernehmen, abgelaufene aus dem Fenster entfernen
+        logger.debug(f"{len(signatures)} new signatures for {wallet_address}")
+        recent_transactions = await state_store.apply_signatures_async(wallet_address, signatures, min_block_time)
+    else:
+        recent_transactions = [tx for tx in signatures if tx.get('blockTime')]
+    
+    if not recent_transactions:
+        logger.debug(f"No recent transactions found for {wallet_address}")
+        return []
+
+    # Kontostandsverlauf aus bereits bekannten Kontoständen (Wallet-Zustand) und den übrigen Transaktionen
+    # (Transaktions-Cache bzw. gebündelte getTransaction-Aufrufe) statt historischer RPC-Abfragen
+    points = {tx['signature']: BalancePoint(tx['slot'], tx['blockTime'], tx['preBalance'], tx['postBalance'])
+              for tx in recent_transactions if tx.get('preBalance') is not None}
+    summary_only = not full_timeline and current_balance is not None
+    if summary_only:
+        # Startstand aus der ältesten Transaktion, Endstand aus dem aktuellen Kontostand: ein getTransaction pro Wallet
+        # statt einem pro Signatur
+        oldest = recent_transactions[chronological(recent_transactions)[0]]['signature']
+        missing = [oldest] if oldest not in points else []
+    else:
+        missing = [tx['signature'] for tx in recent_transactions if tx['signature'] not in points]
+    if missing:
+        with metrics.stage('transaction_fetch'):
+            transactions = await fetch_transactions_details(missing)
+        fetched = {}
+        for signature, tx in zip(missing, transactions):
+            point = balance_point(tx, wallet_address) if tx else None
+            if point is not None:
+                fetched[signature] = point
+        points.update(fetched)
+        if state_store is not None and fetched:
+            await state_store.set_points_async(wallet_address, fetched)
+    if summary_only:
+        timeline = (BalanceTimeline.from_endpoints(wallet_address, recent_transactions, points[oldest], current_balance)
+                    if oldest in points else None)
+    else:
+        timeline = BalanceTimeline.from_signatures(wallet_address, recent_transactions, points)
+    if timeline is None:
+        # Unvollständiger Verlauf: als fehlgeschlagen melden, damit das Journal die Wallet erneut analysiert
+        logger.warning(f"Failed to reconstruct balance history for {wallet_address}: "
+                       f"{sum(signature not in points for signature in missing)} transactions missing")
+        return None
+
+    logger.debug(f"Collected {len(timeline)} balance points for {wallet_address}")
+    return timeline.points
+
+async def analyze_active_wallets(wallet_addresses, time_frame_days=30, max_workers=ANALYSIS_WORKERS, incremental=INCREMENTAL_ANALYSIS,
+                                 journal=None, sink=None, chunk_wallets=SCORING_CHUNK_WALLETS, order_window=RESULTS_ORDER_WINDOW,
+                                 full_timeline=FULL_BALANCE_TIMELINE):
+    # Fertige Wallets werden blockweise bewertet und sofort an sink geschrieben, in Reihenfolge von wallet_addresses;
+    # zurück kommt nur eine Zusammenfassung (Zähler und die Wallets mit dem höchsten Gewinn)
     logger = get_logger()
-    logger.info(f"Analyzing {len(wallet_addresses)} wallets in the last {time_frame_days} days")
-    active_wallets = []
-    top_traders = []
+    metrics = get_metrics()
+    logger.info(f"Analyzing {len(wallet_addresses)} wallets in the last {time_frame_days} days with {max_workers} workers"
+                f"{' (incremental)' if incremental else ''}")
     current_time = datetime.now()
     time_threshold = current_time - timedelta(days=time_frame_days)
-    solana_rpc = SolanaRPCManager()
+    state_store = get_wallet_state_store() if incremental else None
 
-    try:
-        for wallet_address in wallet_addresses:
-            logger.debug(f"Analyzing wallet: {wallet_address}")
-            
-            # Abrufen der Transaktionen
-            transactions_payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getSignaturesForAddress",
-                "params": [
-                    wallet_address,
-                    {"limit": 1000}
-                ]
-            }
-            transactions_data = await solana_rpc.execute_rpc_call(transactions_payload)
-            
-            # Abrufen des aktuellen Kontostands
-            balance_payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getBalance",
-                "params": [wallet_address]
-            }
-            balance_data = await solana_rpc.execute_rpc_call(balance_payload)
-            
-            if transactions_data and 'result' in transactions_data:
-                logger.debug(f"Received transaction data for {wallet_address}")
-                recent_transactions = [tx for tx in transactions_data['result'] if 'blockTime' in tx and datetime.fromtimestamp(tx['blockTime']) > time_threshold]
-                
-                if recent_transactions:
-                    if balance_data and 'result' in balance_data:
-                        current_balance = balance_data['result']['value'] / 1e9  # Konvertierung von Lamports zu SOL
-                        oldest_transaction = min(recent_transactions, key=lambda tx: tx['blockTime'])
-                        
-                        # Abrufen des Kontostands vor 30 Tagen
-                        historical_balance_payload = {
-                            "jsonrpc": "2.0",
-                            "id": 1,
-                            "method": "getBalanceAndContext",
-                            "params": [wallet_address, {"slot": oldest_transaction['slot']}]
-                        }
-                        historical_balance_data = await solana_rpc.execute_rpc_call(historical_balance_payload)
-                        
-                        if historical_balance_data and 'result' in historical_balance_data:
-                            balance_30d_ago = historical_balance_data['result']['value'] / 1e9
-                            balance_change_30d = current_balance - balance_30d_ago
-                            profit = (balance_change_30d / balance_30d_ago) if balance_30d_ago > 0 else 0
-
-                            wallet_info = {
-                                "address": wallet_address,
-                                "transaction_count": len(recent_transactions),
-                                "last_activity": datetime.fromtimestamp(recent_transactions[0]['blockTime']).strftime("%Y-%m-%d %H:%M:%S"),
-                                "profit": profit,
-                                "current_balance": current_balance,
-                                "balance_30d_ago": balance_30d_ago,
-                                "balance_change_30d": balance_change_30d
-                            }
-
-                            active_wallets.append(wallet_info)
-                            if profit > 0.1:  # Mehr als 10% Gewinn
-                                top_traders.append(wallet_info)
-
-                            logger.debug(f"Wallet {wallet_address} analyzed. Profit: {profit:.2%}, Balance Change: {balance_change_30d}, Balance 30d ago: {balance_30d_ago}")
-                        else:
-                            logger.warning(f"Failed to retrieve historical balance for {wallet_address}")
-                    else:
-                        logger.warning(f"Failed to retrieve current balance for {wallet_address}")
-                else:
-                    logger.debug(f"No recent transactions found for {wallet_address}")
+    # Ein fortgesetzter Lauf behält das Zeitfenster des ursprünglichen Laufs und übernimmt fertige Wallets
+    completed = {}
+    if journal is not None:
+        time_threshold = datetime.fromtimestamp(await journal.window_start_async(int(time_threshold.timestamp())))
+        completed = await journal.completed_async(wallet_addresses)
+        logger.info(f"Resuming from journal: {sum(address in completed for address in wallet_addresses)} wallets already done")
+
+    # Aktuelle Kontostände aller Wallets vorab in wenigen getMultipleAccounts-Aufrufen laden
+    with metrics.stage('balance_fetch'):
+        balances = await fetch_balances(wallet_addresses)
+    logger.info(f"Prefetched balances for {len(balances)} of {len(wallet_addresses)} wallets")
+
+    min_block_time = int(time_threshold.timestamp())
+    summary = ResultsSummary()
+    chunk = TransactionColumns()
+
+    async def score_chunk(columns):
+        balance_updates = []
+        with metrics.stage('scoring'):
+            # Nur die Kontostände der Wallets dieses Blocks übergeben
+            scores = score_wallets(columns, min_block_time=min_block_time, threshold=TOP_TRADER_THRESHOLD,
+                                   current_balances={address: balances.get(address) for address in columns.addresses})
+            for index in scores.active_indices():
+                wallet = scores.wallet(index)
+                wallet_info = wallet.to_dict()
+                summary.write(wallet_info, wallet.is_top_trader)
+                if sink is not None:
+                    sink.write(wallet_info, wallet.is_top_trader)
+                balance_updates.append((wallet.address, wallet.current_balance, wallet.balance_30d_ago, int(scores.start_slot[index])))
+                logger.debug(f"Wallet {wallet.address} analyzed. Profit: {wallet.profit:.2%}, Balance Change: {wallet.balance_change_30d}, Balance 30d ago: {wallet.balance_30d_ago}")
+        if state_store is not None and balance_updates:
+            await state_store.set_balances_many_async(balance_updates)
+
+    async def add_to_chunk(wallet_address, points):
+        # Wallets ohne Transaktionen im Zeitraum sind nicht aktiv und brauchen keine Bewertung
+        nonlocal chunk
+        if not points:
+            return
+        chunk.extend(wallet_address, points)
+        if len(chunk.addresses) >= chunk_wallets:
+            full, chunk = chunk, TransactionColumns()
+            await score_chunk(full)
+
+    # Worker-Queue mit fester Anzahl Worker; Wallets aus dem Journal stehen sofort fest
+    queue = asyncio.Queue()
+    from_journal = {}
+    for position, wallet_address in enumerate(wallet_addresses):
+        if wallet_address in completed:
+            from_journal[position] = completed.pop(wallet_address)
+        else:
+            queue.put_nowait((position, wallet_address))
+
+    # Fertige Wallets warten in finished, bis alle früheren fertig sind, und werden dann in Eingabereihenfolge
+    # bewertet; so sind die Ergebnisdateien unabhängig davon, welche Wallet zuerst fertig wird. Jede Wallet der
+    # Queue hält bis dahin einen Platz im Fenster, die Worker laufen der ältesten offenen also höchstens so weit voraus
+    finished = {}
+    next_position = 0
+    window = asyncio.Semaphore(max(order_window, max_workers))
+
+    async def emit_ready():
+        nonlocal next_position
+        while next_position < len(wallet_addresses):
+            if next_position in from_journal:
+                points = from_journal.pop(next_position)
+            elif next_position in finished:
+                points = finished.pop(next_position)
+                window.release()
             else:
-                logger.warning(f"Failed to retrieve transaction data for {wallet_address}")
+                return
+            next_position += 1
+            await add_to_chunk(wallet_addresses[next_position - 1], points)
 
-            await asyncio.sleep(1)  # Erhöhte Verzögerung zwischen Anfragen
+    async def worker():
+        while True:
+            await window.acquire()
+            try:
+                position, wallet_address = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                window.release()
+                return
+            try:
+                points = await analyze_wallet(wallet_address, time_threshold, logger, state_store=state_store,
+                                              current_balance=balances.get(wallet_address), full_timeline=full_timeline)
+            except Exception as e:
+                # Ein fehlerhaftes Wallet bricht nicht den gesamten Lauf ab
+                logger.error(f"Unexpected error analyzing wallet {wallet_address}: {str(e)}", exc_info=True)
+                metrics.inc('analysis_wallets_total', result='error')
+                points = None
+            else:
+                metrics.inc('analysis_wallets_total', result='failed' if points is None else 'active' if points else 'inactive')
+                # Fehlgeschlagene Wallets bleiben im Journal offen und werden beim Fortsetzen erneut analysiert
+                if journal is not None and points is not None:
+                    await journal.record_wallet_async(wallet_address, points)
+            finished[position] = points
+            await emit_ready()
 
-        logger.info(f"Analysis complete. Found {len(top_traders)} top traders")
-        return active_wallets, top_traders
+    # Checkpoints auch dann, wenn gerade keine Wallet fertig wird (z.B. nur noch langsame Wallets laufen)
+    checkpoint_task = asyncio.ensure_future(journal.checkpoint_periodically()) if journal is not None else None
+    try:
+        await emit_ready()
+        with metrics.stage('wallet_analysis'):
+            await asyncio.gather(*(worker() for _ in range(max(1, min(max_workers, queue.qsize())))))
+    finally:
+        if checkpoint_task is not None:
+            checkpoint_task.cancel()
+        if journal is not None:
+            await journal.checkpoint_async()
 
-    except Exception as e:
-        logger.error(f"Unexpected error during wallet analysis: {str(e)}", exc_info=True)
-        return [], []
\ No newline at end of file
+    await score_chunk(chunk)
+    logger.info(f"Analysis complete. Found {summary.count} active wallets and {summary.top_trader_count} top traders")
+    return summary
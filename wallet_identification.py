@@ -1,71 +1,85 @@
 import os
-import logging
-from logging.handlers import RotatingFileHandler
 import json
 from datetime import datetime
-from solana_api import fetch_recent_signatures, fetch_transaction_details
+from solana_api import fetch_recent_signatures, fetch_transactions_details
+from log_setup import get_queued_logger
+from block_scan import fetch_current_slot, scan_blocks
+from heavy_hitters import SpaceSaving
+from known_accounts import KNOWN_PROGRAM_ACCOUNTS
+from config import BLOCK_SCAN_SLOTS, MAX_IDENTIFIED_WALLETS, HEAVY_HITTER_CAPACITY, LOG_DIR
 import asyncio
 
 def get_logger():
-    project_dir = os.path.dirname(os.path.abspath(__file__))
-    log_path = os.path.join(project_dir, 'logs', 'wallets', 'wallet_identification.log')
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-    
-    logger = logging.getLogger('wallet_identification')
-    if not logger.handlers:
-        handler = RotatingFileHandler(
-            log_path,
-            maxBytes=1024 * 1024,  # 1MB
-            backupCount=3,
-            mode='a'
-        )
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
-    return logger
+    log_path = os.path.join(LOG_DIR, 'wallets', 'wallet_identification.log')
+    return get_queued_logger('wallet_identification', log_path)
+
+def select_top_wallets(counter, min_transactions, max_wallets, logger):
+    # Top-K nach geschätzter Häufigkeit; die wahre Anzahl liegt in [count - error, count]
+    top = [hitter for hitter in counter.top() if hitter.count >= min_transactions][:max_wallets]
+    logger.info(f"Tracked {len(counter)} of {counter.total} account occurrences, keeping top {len(top)} "
+                f"(max overestimate {counter.max_error})")
+    for hitter in top:
+        logger.debug(f"Wallet {hitter.key}: count {hitter.count} (>= {hitter.guaranteed_count}), last slot {hitter.last_seen}")
+    return [hitter.key for hitter in top]
 
-async def identify_active_wallets_from_signatures(num_signatures=10, min_transactions=1):
+async def identify_active_wallets_from_signatures(num_signatures=10, min_transactions=1, max_wallets=10):
     logger = get_logger()
     logger.info(f"Identifying active wallets from {num_signatures} recent signatures")
     
     signatures = await fetch_recent_signatures(num_signatures)
-    active_wallets = {}
+    active_wallets = SpaceSaving(HEAVY_HITTER_CAPACITY)
     
-    for signature in signatures:
-        tx_details = await fetch_transaction_details(signature)
-        if tx_details and 'transaction' in tx_details and 'message' in tx_details['transaction']:
-            account_keys = tx_details['transaction']['message']['accountKeys']
-            for account in account_keys:
-                if isinstance(account, str):
-                    wallet_address = account
-                elif isinstance(account, dict) and 'pubkey' in account:
-                    wallet_address = account['pubkey']
-                else:
-                    logger.warning(f"Unexpected account format in transaction {signature}")
-                    continue
-                
-                if wallet_address not in active_wallets:
-                    active_wallets[wallet_address] = 1
-                else:
-                    active_wallets[wallet_address] += 1
-        
-        await asyncio.sleep(0.2)
+    transactions = await fetch_transactions_details(signatures)
     
-    identified_wallets = [wallet for wallet, count in active_wallets.items() if count >= min_transactions]
+    for signature, tx_record in zip(signatures, transactions):
+        if tx_record is None:
+            continue
+        if not tx_record.account_keys:
+            logger.warning(f"No account keys in transaction {signature}")
+            continue
+        for wallet_address in tx_record.account_keys:
+            if wallet_address not in KNOWN_PROGRAM_ACCOUNTS:
+                active_wallets.update(wallet_address, seen=tx_record.slot)
+    
+    identified_wallets = select_top_wallets(active_wallets, min_transactions, max_wallets, logger)
     logger.info(f"Identified {len(identified_wallets)} active wallets")
     
+    save_identified_wallets(identified_wallets, logger)
+    return identified_wallets
+
+def save_identified_wallets(identified_wallets, logger):
     # Speichere die identifizierten Wallets in einer Datei
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    project_dir = os.path.dirname(os.path.abspath(__file__))
-    filename = os.path.join(project_dir, 'logs', 'wallets', f'identified_wallets_{timestamp}.json')
+    filename = os.path.join(LOG_DIR, 'wallets', f'identified_wallets_{timestamp}.json')
     os.makedirs(os.path.dirname(filename), exist_ok=True)
     
     with open(filename, 'w') as f:
-        json.dump(identified_wallets[:10], f, indent=2)
+        json.dump(identified_wallets, f, indent=2)
     logger.info(f"Saved identified wallets to {filename}")
+
+async def identify_active_wallets_from_blocks(num_slots=BLOCK_SCAN_SLOTS, min_transactions=1, max_wallets=MAX_IDENTIFIED_WALLETS):
+    # Block-Scan: Signer aller Nicht-Vote-Transaktionen der letzten num_slots Slots zählen
+    logger = get_logger()
+    end_slot = await fetch_current_slot()
+    if end_slot is None:
+        logger.error("Failed to retrieve current slot for block scan")
+        return []
+    start_slot = max(0, end_slot - num_slots + 1)
+    logger.info(f"Identifying active wallets from blocks {start_slot}-{end_slot}")
+    
+    # Fester Speicherbedarf unabhängig von der Anzahl gescannter Transaktionen
+    active_wallets = SpaceSaving(max(HEAVY_HITTER_CAPACITY, max_wallets))
+    blocks = 0
+    async for updates in scan_blocks(start_slot, end_slot):
+        blocks += 1
+        for activity in updates:
+            active_wallets.update(activity.address, activity.count, seen=activity.last_slot)
+    
+    identified_wallets = select_top_wallets(active_wallets, min_transactions, max_wallets, logger)
+    logger.info(f"Scanned {blocks} blocks, identified {len(identified_wallets)} active wallets")
     
-    return identified_wallets[:10]
+    save_identified_wallets(identified_wallets, logger)
+    return identified_wallets
 
 if __name__ == "__main__":
     asyncio.run(identify_active_wallets_from_signatures())
\ No newline at end of file
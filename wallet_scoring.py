@@ -0,0 +1,161 @@
+from array import array
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from balance_timeline import BalancePoint, balance_point
+from wallet import Wallet
+from config import TOP_TRADER_THRESHOLD
+
+class TransactionColumns:
+    # Spaltenspeicher: eine Zeile pro (Wallet, Transaktion) mit Adress-ID, Slot, blockTime und Pre-/Post-Balance
+    def __init__(self):
+        self.addresses: List[str] = []
+        self._address_ids: Dict[str, int] = {}
+        self._address_id = array('q')
+        self._slot = array('q')
+        self._block_time = array('q')
+        self._pre_balance = array('q')
+        self._post_balance = array('q')
+
+    def __len__(self) -> int:
+        return len(self._address_id)
+
+    def address_id(self, address: str) -> int:
+        address_id = self._address_ids.get(address)
+        if address_id is None:
+            address_id = len(self.addresses)
+            self._address_ids[address] = address_id
+            self.addresses.append(address)
+        return address_id
+
+    def lookup(self, address: str) -> Optional[int]:
+        return self._address_ids.get(address)
+
+    def append(self, address: str, point: BalancePoint):
+        if point.block_time is None:
+            return
+        self._address_id.append(self.address_id(address))
+        self._slot.append(point.slot)
+        self._block_time.append(point.block_time)
+        self._pre_balance.append(point.pre_balance)
+        self._post_balance.append(point.post_balance)
+
+    def extend(self, address: str, points: Iterable[BalancePoint]):
+        self.address_id(address)
+        for point in points:
+            self.append(address, point)
+
+    def extend_from_transactions(self, address: Optional[str], transactions: Iterable[Dict]):
+        # Ohne Adresse wird Konto-Index 0 unter dem Schlüssel '' gespeichert
+        key = address or ''
+        self.address_id(key)
+        for tx in transactions:
+            point = balance_point(tx, address) if tx else None
+            if point is not None:
+                self.append(key, point)
+
+    def columns(self):
+        return (np.frombuffer(self._address_id, dtype=np.int64),
+                np.frombuffer(self._slot, dtype=np.int64),
+                np.frombuffer(self._block_time, dtype=np.int64),
+                np.frombuffer(self._pre_balance, dtype=np.int64),
+                np.frombuffer(self._post_balance, dtype=np.int64))
+
+class WalletScores:
+    # Ergebnis-Spalten pro Wallet (Index = Adress-ID)
+    def __init__(self, addresses: List[str], transaction_count, last_activity, start_slot, start_balance, end_balance,
+                 current_balance, inflow, outflow, profit, is_top_trader):
+        self.addresses = addresses
+        self.transaction_count = transaction_count
+        self.last_activity = last_activity
+        self.start_slot = start_slot
+        self.start_balance = start_balance
+        self.end_balance = end_balance
+        self.current_balance = current_balance
+        self.inflow = inflow
+        self.outflow = outflow
+        self.profit = profit
+        self.is_top_trader = is_top_trader
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    @property
+    def balance_change(self):
+        return self.end_balance - self.start_balance
+
+    def wallet(self, index: int) -> Wallet:
+        return Wallet(self, index)
+
+    def active_indices(self):
+        return np.flatnonzero(self.transaction_count > 0)
+
+    def top_trader_indices(self):
+        return np.flatnonzero(self.is_top_trader)
+
+def _first_last_rows(address_id, slot, wallet_count):
+    # Zeilenindex der frühesten und spätesten Transaktion je Wallet (nach Slot, bei Gleichstand nach Einfügereihenfolge)
+    rows = len(address_id)
+    slot_min = int(slot.min())
+    slot_span = int(slot.max()) - slot_min + 1
+    if slot_span * rows < 2 ** 62:
+        # Slot und Zeile in einem int64-Schlüssel: Minimum/Maximum je Wallet ohne Sortierung
+        key = (slot - slot_min) * rows + np.arange(rows, dtype=np.int64)
+        first_key = np.full(wallet_count, np.iinfo(np.int64).max, dtype=np.int64)
+        last_key = np.full(wallet_count, -1, dtype=np.int64)
+        np.minimum.at(first_key, address_id, key)
+        np.maximum.at(last_key, address_id, key)
+        ids = np.flatnonzero(last_key >= 0)
+        return ids, first_key[ids] % rows, last_key[ids] % rows
+    order = np.lexsort((np.arange(rows), slot, address_id))
+    sorted_ids = address_id[order]
+    boundaries = np.flatnonzero(np.diff(sorted_ids)) + 1
+    first = np.concatenate(([0], boundaries))
+    last = np.concatenate((boundaries - 1, [rows - 1]))
+    return sorted_ids[first], order[first], order[last]
+
+def score_wallets(columns: TransactionColumns, min_block_time: Optional[int] = None, max_block_time: Optional[int] = None,
+                  threshold: float = TOP_TRADER_THRESHOLD, current_balances: Optional[Dict[str, int]] = None) -> WalletScores:
+    address_id, slot, block_time, pre_balance, post_balance = columns.columns()
+    wallet_count = len(columns.addresses)
+
+    # Zeitfenster als Maske statt datetime-Vergleichen pro Transaktion
+    mask = np.ones(len(address_id), dtype=bool)
+    if min_block_time is not None:
+        mask &= block_time > min_block_time
+    if max_block_time is not None:
+        mask &= block_time <= max_block_time
+    address_id, slot, block_time = address_id[mask], slot[mask], block_time[mask]
+    pre_balance, post_balance = pre_balance[mask], post_balance[mask]
+
+    delta = post_balance - pre_balance
+    transaction_count = np.bincount(address_id, minlength=wallet_count)
+    inflow = np.bincount(address_id, weights=np.maximum(delta, 0), minlength=wallet_count)
+    outflow = np.bincount(address_id, weights=np.maximum(-delta, 0), minlength=wallet_count)
+
+    # Erste Transaktion je Wallet liefert den Start-, letzte den Endstand
+    start_balance = np.zeros(wallet_count, dtype=np.int64)
+    end_balance = np.zeros(wallet_count, dtype=np.int64)
+    last_activity = np.zeros(wallet_count, dtype=np.int64)
+    start_slot = np.zeros(wallet_count, dtype=np.int64)
+    if len(address_id):
+        ids, first, last = _first_last_rows(address_id, slot, wallet_count)
+        start_slot[ids] = slot[first]
+        start_balance[ids] = pre_balance[first]
+        end_balance[ids] = post_balance[last]
+        np.maximum.at(last_activity, address_id, block_time)
+
+    current_balance = end_balance.copy()
+    if current_balances:
+        for address, lamports in current_balances.items():
+            address_index = columns.lookup(address)
+            if address_index is not None and lamports is not None:
+                current_balance[address_index] = lamports
+
+    balance_change = (end_balance - start_balance).astype(np.float64)
+    profit = np.divide(balance_change, start_balance, out=np.zeros(wallet_count, dtype=np.float64), where=start_balance > 0)
+    is_top_trader = (transaction_count > 0) & (profit > threshold)
+
+    return WalletScores(columns.addresses, transaction_count, last_activity, start_slot, start_balance, end_balance,
+                        current_balance, inflow, outflow, profit, is_top_trader)
+
+__all__ = ['TransactionColumns', 'WalletScores', 'score_wallets']
@@ -0,0 +1,214 @@
+import time
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from balance_timeline import BalancePoint
+from sqlite_utils import connect, with_lock_retry
+from config import WALLET_STATE_PATH, WALLET_STATE_CHECKPOINT_SECONDS
+
+# Spätestens nach so vielen geänderten Wallets schreiben, auch wenn das Zeitintervall noch läuft
+CHECKPOINT_WALLETS = 500
+
+class WalletStateStore:
+    # Speichert pro Wallet die neueste verarbeitete Signatur (Watermark), die Signaturen im
+    # Analysezeitraum und die laufenden Kennzahlen für inkrementelle Analysen.
+    # Änderungen werden wie im RunJournal gesammelt und pro Checkpoint in einer kurzen Transaktion geschrieben.
+    # Wie beim Transaktions-Cache laufen die *_async-Methoden in einem eigenen Thread: wartet ein Shard-Prozess
+    # auf eine Sperre, blockiert das nicht den Event Loop
+    def __init__(self, path: str = WALLET_STATE_PATH, checkpoint_seconds: float = WALLET_STATE_CHECKPOINT_SECONDS,
+                 checkpoint_wallets: int = CHECKPOINT_WALLETS):
+        self.path = path
+        self.checkpoint_seconds = checkpoint_seconds
+        self.checkpoint_wallets = checkpoint_wallets
+        self.last_checkpoint = time.monotonic()
+        self._pending_signatures: List[Tuple[str, str, int, int, int]] = []
+        self._pending_points: List[Tuple[int, int, str, str]] = []
+        self._pending_expiry: List[Tuple[str, int]] = []
+        self._pending_states: Dict[str, Tuple[Optional[str], int, Optional[int], float]] = {}
+        self._pending_balances: Dict[str, Tuple[float, float, int, float]] = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='wallet_state')
+        self.conn = connect(path, check_same_thread=False)
+        with_lock_retry(self.conn, self._create_schema)
+
+    def _create_schema(self):
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS wallet_state (
+                address TEXT PRIMARY KEY,
+                newest_signature TEXT,
+                transaction_count INTEGER NOT NULL DEFAULT 0,
+                last_activity INTEGER,
+                current_balance REAL,
+                balance_30d_ago REAL,
+                balance_slot INTEGER,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS wallet_signatures (
+                address TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                block_time INTEGER NOT NULL,
+                slot INTEGER NOT NULL,
+                PRIMARY KEY (address, signature)
+            );
+            CREATE INDEX IF NOT EXISTS idx_wallet_signatures_time ON wallet_signatures (address, block_time);
+        """)
+        # Reihenfolge innerhalb eines Slots und Kontostände der Wallet vor/nach jeder Transaktion
+        # (ältere Datenbanken werden ergänzt; fehlende Kontostände werden einmal nachgeladen)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(wallet_signatures)")}
+        for column, definition in (('seq', 'INTEGER NOT NULL DEFAULT 0'), ('pre_balance', 'INTEGER'), ('post_balance', 'INTEGER')):
+            if column not in columns:
+                try:
+                    self.conn.execute(f"ALTER TABLE wallet_signatures ADD COLUMN {column} {definition}")
+                except sqlite3.OperationalError as e:
+                    # Ein anderer Shard-Prozess hat die Spalte gerade ergänzt
+                    if 'duplicate column' not in str(e):
+                        raise
+        self.conn.commit()
+
+    def get_state(self, address: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if address in self._pending_states or address in self._pending_balances:
+                self.checkpoint()
+            row = self.conn.execute(
+                "SELECT newest_signature, transaction_count, last_activity, current_balance, balance_30d_ago, balance_slot "
+                "FROM wallet_state WHERE address = ?", (address,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("newest_signature", "transaction_count", "last_activity", "current_balance", "balance_30d_ago", "balance_slot")
+        return dict(zip(keys, row))
+
+    def get_watermark(self, address: str) -> Optional[str]:
+        state = self.get_state(address)
+        return state["newest_signature"] if state else None
+
+    def apply_signatures(self, address: str, new_signatures: List[Dict[str, Any]], min_block_time: int) -> List[Dict[str, Any]]:
+        # Neue Signaturen übernehmen, abgelaufene Einträge verwerfen und das Fenster zurückgeben (neueste zuerst).
+        # Das Fenster wird aus gespeicherten und neuen Signaturen im Speicher gebildet; geschrieben wird beim Checkpoint
+        # Jeder Eintrag enthält seq (größer = später, auch innerhalb eines Slots) und, falls schon bekannt,
+        # preBalance/postBalance der Wallet, damit die Transaktion nicht erneut geladen werden muss
+        with self._lock:
+            return self._apply_signatures(address, new_signatures, min_block_time)
+
+    def _apply_signatures(self, address: str, new_signatures: List[Dict[str, Any]], min_block_time: int) -> List[Dict[str, Any]]:
+        watermark = self.get_watermark(address)
+        stored = self.conn.execute(
+            "SELECT signature, block_time, slot, seq, pre_balance, post_balance FROM wallet_signatures "
+            "WHERE address = ? AND block_time > ?", (address, min_block_time)
+        ).fetchall()
+        # getSignaturesForAddress liefert die neuesten zuerst; neue Signaturen sind jünger als alle gespeicherten
+        base = max((row[3] for row in stored), default=0)
+        rows = [(address, tx['signature'], tx['blockTime'], tx['slot'], base + len(new_signatures) - position)
+                for position, tx in enumerate(new_signatures) if tx.get('blockTime') and tx['blockTime'] > min_block_time]
+        known = {row[0] for row in stored}
+        merged = stored + [row[1:] + (None, None) for row in rows if row[1] not in known]
+        merged.sort(key=lambda row: (row[2], row[3]), reverse=True)
+        window = [{"signature": signature, "blockTime": block_time, "slot": slot, "seq": seq,
+                   "preBalance": pre_balance, "postBalance": post_balance}
+                  for signature, block_time, slot, seq, pre_balance, post_balance in merged]
+
+        newest_signature = new_signatures[0]['signature'] if new_signatures else watermark
+        last_activity = window[0]['blockTime'] if window else None
+        self._pending_signatures.extend(rows)
+        self._pending_expiry.append((address, min_block_time))
+        self._pending_states[address] = (newest_signature, len(window), last_activity, time.time())
+        self._maybe_checkpoint()
+        return window
+
+    def set_points(self, address: str, points: Dict[str, BalancePoint]):
+        # Kontostände vor/nach den Transaktionen des Fensters für spätere Läufe speichern
+        with self._lock:
+            self._pending_points.extend((point.pre_balance, point.post_balance, address, signature)
+                                        for signature, point in points.items())
+            self._maybe_checkpoint()
+
+    def set_balances(self, address: str, current_balance: float, balance_30d_ago: float, balance_slot: int):
+        self.set_balances_many([(address, current_balance, balance_30d_ago, balance_slot)])
+
+    def set_balances_many(self, balances: List[Tuple[str, float, float, int]]):
+        # (address, current_balance, balance_30d_ago, balance_slot) pro Wallet, z.B. für einen bewerteten Block
+        with self._lock:
+            now = time.time()
+            for address, current_balance, balance_30d_ago, balance_slot in balances:
+                self._pending_balances[address] = (current_balance, balance_30d_ago, balance_slot, now)
+            self._maybe_checkpoint()
+
+    def _maybe_checkpoint(self):
+        changed = len(self._pending_states) + len(self._pending_balances)
+        if changed >= self.checkpoint_wallets or time.monotonic() - self.last_checkpoint >= self.checkpoint_seconds:
+            self.checkpoint()
+
+    def checkpoint(self):
+        with self._lock:
+            with_lock_retry(self.conn, self._write_pending)
+            self._pending_signatures = []
+            self._pending_points = []
+            self._pending_expiry = []
+            self._pending_states = {}
+            self._pending_balances = {}
+            self.last_checkpoint = time.monotonic()
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def get_watermark_async(self, address: str) -> Optional[str]:
+        return await self._run(self.get_watermark, address)
+
+    async def apply_signatures_async(self, address: str, new_signatures: List[Dict[str, Any]], min_block_time: int) -> List[Dict[str, Any]]:
+        return await self._run(self.apply_signatures, address, new_signatures, min_block_time)
+
+    async def set_points_async(self, address: str, points: Dict[str, BalancePoint]):
+        await self._run(self.set_points, address, points)
+
+    async def set_balances_many_async(self, balances: List[Tuple[str, float, float, int]]):
+        await self._run(self.set_balances_many, balances)
+
+    def _write_pending(self):
+        # Alle gesammelten Änderungen in einer Transaktion schreiben (Zustand vor Kontoständen, die ihn aktualisieren)
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO wallet_signatures (address, signature, block_time, slot, seq) VALUES (?, ?, ?, ?, ?)",
+            self._pending_signatures
+        )
+        self.conn.executemany(
+            "UPDATE wallet_signatures SET pre_balance = ?, post_balance = ? WHERE address = ? AND signature = ?",
+            self._pending_points
+        )
+        self.conn.executemany("DELETE FROM wallet_signatures WHERE address = ? AND block_time <= ?", self._pending_expiry)
+        self.conn.executemany("""
+            INSERT INTO wallet_state (address, newest_signature, transaction_count, last_activity, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(address) DO UPDATE SET
+                newest_signature = excluded.newest_signature,
+                transaction_count = excluded.transaction_count,
+                last_activity = excluded.last_activity,
+                updated_at = excluded.updated_at
+        """, [(address, *state) for address, state in self._pending_states.items()])
+        self.conn.executemany(
+            "UPDATE wallet_state SET current_balance = ?, balance_30d_ago = ?, balance_slot = ?, updated_at = ? WHERE address = ?",
+            [(*balances, address) for address, balances in self._pending_balances.items()]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self.checkpoint()
+            self.conn.close()
+
+_wallet_state_store: Optional[WalletStateStore] = None
+
+def get_wallet_state_store() -> WalletStateStore:
+    global _wallet_state_store
+    if _wallet_state_store is None:
+        _wallet_state_store = WalletStateStore()
+    return _wallet_state_store
+
+def close_wallet_state_store():
+    global _wallet_state_store
+    if _wallet_state_store is not None:
+        _wallet_state_store.close()
+        _wallet_state_store = None
+
+__all__ = ['WalletStateStore', 'get_wallet_state_store', 'close_wallet_state_store']